@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark da ordenação externa.
+
+Gera conjuntos de dados com diferentes distribuições e tamanhos e mede,
+para cada caso, a vazão das duas fases do algoritmo (geração de runs e
+merge externo), o pico de memória residente e os bytes temporários
+escritos. Com `--formatos`, cada conjunto é convertido para cada formato
+de arquivo e ordenado nele (entrada e saída no mesmo formato). O resultado
+é emitido em JSON para permitir comparar execuções entre versões e
+configurações.
+
+Exemplo:
+    python benchmark.py --registros 100000 1000000 --distribuicoes aleatoria inversa \\
+        --memoria-max 64MiB --formatos csv csv.gz jsonl binario --saida resultados.json
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from exemplo_teste import DISTRIBUICOES, criar_arquivo_teste
+from mergesort_externo import (COMPRESSOES_ARQUIVO, ESTRATEGIAS_RUNS, FormatoBinario,
+                               OrdenacaoExterna, resolver_formato)
+
+MB = 1024 * 1024
+
+# Layout binário dos conjuntos de `criar_arquivo_teste`
+CAMPOS_BINARIO = [('id', 'q'), ('nome', '32s'), ('idade', 'B'), ('salario', 'd'),
+                  ('departamento', '16s')]
+
+
+def _pico_rss_mb() -> float:
+    """
+    Retorna o pico de memória residente (em MiB) do processo atual somado ao
+    dos processos filhos já encerrados (workers da geração de runs).
+    """
+    proprio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    filhos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss é dado em KiB no Linux e em bytes no macOS
+    escala = 1 if sys.platform == 'darwin' else 1024
+    return round((proprio + filhos) * escala / MB, 2)
+
+
+def _vazao(registros: int, tamanho: int, segundos: float) -> dict:
+    """
+    Monta o resumo de uma fase: tempo, registros por segundo e MiB por segundo.
+    """
+    segundos = max(segundos, 1e-9)
+    return {
+        'segundos': round(segundos, 4),
+        'registros_s': round(registros / segundos, 1),
+        'mb_s': round(tamanho / MB / segundos, 2),
+    }
+
+
+def _formato(especificacao: str, larga: bool = False):
+    """
+    Formato de `--formatos`: 'csv' ou 'jsonl' ou 'binario', com a
+    compressão opcional como extensão ('csv.gz', 'binario.zst').
+    """
+    nome, _, extensao = especificacao.partition('.')
+    if nome != 'binario':
+        return resolver_formato(especificacao)
+    campos = CAMPOS_BINARIO + ([('observacao', '1024s')] if larga else [])
+    return FormatoBinario(campos, COMPRESSOES_ARQUIVO['.' + extensao] if extensao else None)
+
+
+def converter_conjunto(arquivo: str, especificacao: str) -> str:
+    """
+    Converte um conjunto CSV gerado para outro formato.
+    
+    Returns:
+        Caminho do arquivo convertido (o próprio `arquivo` para 'csv')
+    """
+    if especificacao == 'csv':
+        return arquivo
+    base = os.path.splitext(arquivo)[0]
+    destino = f"{base}.{especificacao}"
+    with open(arquivo, 'r', encoding='utf-8', newline='') as entrada:
+        reader = csv.reader(entrada)
+        cabecalho = next(reader)
+        formato = _formato(especificacao, 'observacao' in cabecalho)
+        with formato.abrir(destino, 'wb') as saida:
+            formato.gravar(saida, cabecalho, reader)
+    return destino
+
+
+def executar_caso(arquivo: str, registros: int, distribuicao: str,
+                  coluna_chave: str, configuracao: dict, formato: str = 'csv') -> dict:
+    """
+    Ordena um arquivo medindo cada fase separadamente.
+
+    Os tempos das fases vêm de `estatisticas['tempo_runs']` e
+    `estatisticas['tempo_merge']`. É executado em um processo novo para
+    que o pico de memória medido corresponda apenas a este caso.
+
+    Args:
+        arquivo: Arquivo CSV de entrada já gerado
+        registros: Número de registros do arquivo
+        distribuicao: Distribuição usada na geração (apenas informativa)
+        coluna_chave: Coluna usada como chave de ordenação
+        configuracao: Argumentos repassados a `OrdenacaoExterna`
+        formato: Formato do arquivo (veja `--formatos`), usado na entrada e na saída
+
+    Returns:
+        Dicionário com as medições do caso
+    """
+    tamanho = os.path.getsize(arquivo)
+    ordenador = OrdenacaoExterna(silencioso=True, **configuracao)
+    saida = f"{os.path.splitext(arquivo)[0]}_ordenado.{formato}"
+    especificacao = _formato(formato, distribuicao == 'larga')
+
+    inicio = time.perf_counter()
+    ordenador.ordenar_arquivo(arquivo, coluna_chave, arquivo_saida=saida,
+                              formato_entrada=especificacao, formato_saida=especificacao)
+    segundos = time.perf_counter() - inicio
+
+    tamanho_saida = os.path.getsize(saida)
+    os.remove(saida)
+    estatisticas = ordenador.estatisticas
+
+    return {
+        'distribuicao': distribuicao,
+        'formato': estatisticas['formato_entrada'],
+        'registros': registros,
+        'bytes_entrada': tamanho,
+        'configuracao': configuracao,
+        'geracao_runs': _vazao(registros, tamanho, estatisticas['tempo_runs']),
+        'merge_externo': _vazao(registros, tamanho_saida, estatisticas['tempo_merge']),
+        'total': _vazao(registros, tamanho, segundos),
+        'runs': estatisticas['runs'],
+        'passes_merge': estatisticas['passes_merge'],
+        'bytes_temporarios': estatisticas['bytes_escritos'],
+        'pico_disco_temporario': estatisticas['pico_disco_temporario'],
+        'comparacoes': estatisticas['comparacoes'],
+        'pico_rss_mb': _pico_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da ordenação externa")
+    parser.add_argument('--registros', type=float, nargs='+', default=[1e5],
+                        help="Tamanhos dos conjuntos de dados (ex.: 1e5 1e6 1e7)")
+    parser.add_argument('--distribuicoes', nargs='+', choices=DISTRIBUICOES,
+                        default=list(DISTRIBUICOES),
+                        help="Distribuições da coluna chave")
+    parser.add_argument('--coluna', default='id', help="Coluna chave (padrão: id)")
+    parser.add_argument('--formatos', nargs='+', default=['csv'],
+                        help="Formatos de arquivo medidos: csv, jsonl ou binario, com "
+                             "compressão opcional (ex.: csv csv.gz jsonl.zst binario)")
+    parser.add_argument('--tamanho-buffer', type=int, default=100000)
+    parser.add_argument('--fan-in', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--estrategia', choices=ESTRATEGIAS_RUNS, default='buffer')
+    parser.add_argument('--memoria-max', default=None, help="Ex.: 256MiB")
+    parser.add_argument('--compressao', choices=['zlib', 'lz4'], default=None)
+    parser.add_argument('--io-assincrono', action='store_true')
+    parser.add_argument('--particoes-merge', type=int, default=1,
+                        help="Faixas de chave mescladas em paralelo no merge final")
+    parser.add_argument('--diretorios-temp', nargs='+', default=None,
+                        help="Diretórios em que os runs são distribuídos")
+    parser.add_argument('--cota-disco', default=None,
+                        help="Limite de espaço temporário (ex.: 10GiB)")
+    parser.add_argument('--sem-vetorizacao', action='store_true',
+                        help="Ordena os runs com o merge sort interno mesmo com NumPy")
+    parser.add_argument('--mapear-entrada', action='store_true',
+                        help="Ordena índices sobre a entrada mapeada em memória (mmap)")
+    parser.add_argument('--diretorio', default='bench_dados',
+                        help="Diretório dos conjuntos de dados gerados")
+    parser.add_argument('--manter-dados', action='store_true',
+                        help="Não remove os conjuntos de dados ao final")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', default=None,
+                        help="Arquivo JSON de resultados (padrão: stdout)")
+    args = parser.parse_args()
+
+    configuracao = {
+        'tamanho_buffer': args.tamanho_buffer,
+        'fan_in': args.fan_in,
+        'workers': args.workers,
+        'estrategia_runs': args.estrategia,
+        'memoria_max': args.memoria_max,
+        'compressao_runs': args.compressao,
+        'io_assincrono': args.io_assincrono,
+        'mapear_entrada': args.mapear_entrada,
+        'particoes_merge': args.particoes_merge,
+        'diretorios_temp': args.diretorios_temp,
+        'cota_disco': args.cota_disco,
+        'ordenacao_vetorizada': False if args.sem_vetorizacao else None,
+    }
+
+    os.makedirs(args.diretorio, exist_ok=True)
+    # Cada caso roda em um processo 'spawn' para medir o pico de memória isoladamente
+    contexto = multiprocessing.get_context('spawn')
+    casos = []
+
+    for registros in (int(n) for n in args.registros):
+        for distribuicao in args.distribuicoes:
+            arquivo = os.path.join(args.diretorio, f"{distribuicao}_{registros}.csv")
+            if not os.path.exists(arquivo):
+                with contextlib.redirect_stdout(sys.stderr):
+                    criar_arquivo_teste(arquivo, registros, distribuicao, args.semente)
+
+            for formato in args.formatos:
+                convertido = converter_conjunto(arquivo, formato)
+                print(f"Executando: {distribuicao}, {registros} registros, {formato}",
+                      file=sys.stderr)
+                with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                    resultado = executor.submit(executar_caso, convertido, registros, distribuicao,
+                                                args.coluna, configuracao, formato).result()
+                casos.append(resultado)
+                print(f"  total: {resultado['total']['segundos']}s, "
+                      f"{resultado['total']['registros_s']} registros/s, "
+                      f"pico RSS {resultado['pico_rss_mb']} MiB", file=sys.stderr)
+                if convertido != arquivo and not args.manter_dados:
+                    os.remove(convertido)
+
+            if not args.manter_dados:
+                os.remove(arquivo)
+
+    if not args.manter_dados and not os.listdir(args.diretorio):
+        os.rmdir(args.diretorio)
+
+    relatorio = {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'casos': casos,
+    }
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto + '\n')
+        print(f"Resultados salvos em: {args.saida}", file=sys.stderr)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,17 +9,30 @@ import random
 import os
 from mergesort_externo import OrdenacaoExterna
 
-def criar_arquivo_teste(nome_arquivo: str, num_registros: int = 5000):
+# Distribuições da coluna 'id' aceitas por criar_arquivo_teste
+DISTRIBUICOES = ('ordenada', 'aleatoria', 'inversa', 'duplicadas', 'larga')
+
+def criar_arquivo_teste(nome_arquivo: str, num_registros: int = 5000,
+                        distribuicao: str = 'ordenada', semente: int = None):
     """
     Cria um arquivo CSV de teste com dados aleatórios.
     
     Args:
         nome_arquivo: Nome do arquivo CSV a ser criado
         num_registros: Número de registros a serem gerados
+        distribuicao: Distribuição da coluna 'id':
+                     'ordenada' (1..n), 'aleatoria', 'inversa' (n..1),
+                     'duplicadas' (poucos valores distintos) ou 'larga'
+                     (aleatória, com uma coluna extra 'observacao' de ~1 KB)
+        semente: Semente do gerador aleatório (para dados reproduzíveis)
     """
-    print(f"Criando arquivo de teste: {nome_arquivo} com {num_registros} registros")
+    if distribuicao not in DISTRIBUICOES:
+        raise ValueError(f"Distribuição '{distribuicao}' inválida. Use um de: {', '.join(DISTRIBUICOES)}")
+    
+    print(f"Criando arquivo de teste: {nome_arquivo} com {num_registros} registros ({distribuicao})")
     
     # Gerar dados aleatórios
+    gerador = random.Random(semente)
     nomes = ["João", "Maria", "Pedro", "Ana", "Carlos", "Lucia", "Fernando", "Beatriz"]
     sobrenomes = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira"]
     
@@ -27,17 +40,30 @@ def criar_arquivo_teste(nome_arquivo: str, num_registros: int = 5000):
         writer = csv.writer(arquivo)
         
         # Escrever cabeçalho
-        writer.writerow(['id', 'nome', 'idade', 'salario', 'departamento'])
+        cabecalho = ['id', 'nome', 'idade', 'salario', 'departamento']
+        if distribuicao == 'larga':
+            cabecalho.append('observacao')
+        writer.writerow(cabecalho)
         
         # Gerar registros
         for i in range(num_registros):
-            id_registro = i + 1
-            nome = f"{random.choice(nomes)} {random.choice(sobrenomes)}"
-            idade = random.randint(18, 65)
-            salario = round(random.uniform(2000, 15000), 2)
-            departamento = random.choice(['TI', 'RH', 'Vendas', 'Marketing', 'Financeiro'])
+            if distribuicao == 'ordenada':
+                id_registro = i + 1
+            elif distribuicao == 'inversa':
+                id_registro = num_registros - i
+            elif distribuicao == 'duplicadas':
+                id_registro = gerador.randint(1, 100)
+            else:
+                id_registro = gerador.randint(1, num_registros * 10)
+            nome = f"{gerador.choice(nomes)} {gerador.choice(sobrenomes)}"
+            idade = gerador.randint(18, 65)
+            salario = round(gerador.uniform(2000, 15000), 2)
+            departamento = gerador.choice(['TI', 'RH', 'Vendas', 'Marketing', 'Financeiro'])
             
-            writer.writerow([id_registro, nome, idade, salario, departamento])
+            registro = [id_registro, nome, idade, salario, departamento]
+            if distribuicao == 'larga':
+                registro.append(''.join(gerador.choices('abcdefghij ', k=1024)))
+            writer.writerow(registro)
     
     print(f"Arquivo {nome_arquivo} criado com sucesso!")
 
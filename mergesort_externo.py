@@ -1,381 +1,4923 @@
 import os
+import io
 import csv
+import bisect
+import bz2
+import contextlib
+import copy
+import functools
+import gzip
+import heapq
+import itertools
+import json
+import locale
+import lzma
+import math
+import mmap
+import operator
+import pickle
+import queue
+import struct
 import tempfile
 import shutil
-from typing import List, Tuple, Union
+import threading
+import time
+import zlib
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date
+from decimal import ROUND_FLOOR, Context, Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 import sys
 
-class OrdenacaoExterna:
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # compressão LZ4 é opcional
+    lz4_frame = None
+
+try:
+    import numpy as np
+except ImportError:  # ordenação vetorizada dos runs é opcional
+    np = None
+
+try:
+    import zstandard
+except ImportError:  # entrada e saída comprimidas com zstd são opcionais
+    zstandard = None
+
+
+# Quantidade de registros usados para detectar o tipo da coluna chave
+AMOSTRA_DETECCAO = 1000
+
+# Estratégias de formação de runs: buffer de tamanho fixo ordenado em memória
+# ou seleção por substituição (heap de torneio, runs ~2x o buffer)
+ESTRATEGIAS_RUNS = ('buffer', 'selecao_substituicao')
+
+# Memória estimada por registro além dos próprios campos: chave decodificada,
+# tupla (chave, registro) e as listas auxiliares do merge sort interno
+SOBRECARGA_REGISTRO = 200
+
+# Memória estimada por registro no modo de entrada mapeada, além dos bytes da
+# chave: objeto da chave, início e tamanho nos arrays e o par usado na ordenação
+SOBRECARGA_INDICE = 160
+
+# Maior chave codificada (em bytes) ordenada com NumPy; chaves mais longas
+# (texto) usam o merge sort interno
+LARGURA_MAXIMA_VETORIZADA = 32
+
+# Menor buffer de leitura por run no merge; abaixo disso o fan-in é reduzido
+BUFFER_MINIMO_MERGE = 64 * 1024
+
+# Tamanho padrão dos blocos de CSV entregues à thread de escrita no modo
+# assíncrono, quando nem `memoria_max` nem `tamanho_bloco_io` são informados
+TAMANHO_BLOCO_CSV = 1024 * 1024
+
+# Compressões de arquivos de entrada e saída, pela extensão
+COMPRESSOES_ARQUIVO = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd'}
+
+# Formatos de arquivo reconhecidos pela extensão (sem a da compressão)
+EXTENSOES_FORMATO = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+# Argumentos aceitos em cada especificação de `ordenar_multiplas`
+ARGUMENTOS_ORDENACAO = {'coluna_chave', 'ordem', 'arquivo_saida', 'tipo_chave',
+                        'limite', 'unicos', 'agregacoes', 'intervalo_indice'}
+
+# Índice esparso gravado ao lado da saída (`intervalo_indice`)
+EXTENSAO_INDICE = '.idx'
+VERSAO_INDICE = 1
+
+# Manifesto das ordenações retomáveis (`diretorio_trabalho`)
+ARQUIVO_MANIFESTO = 'manifesto.json'
+VERSAO_MANIFESTO = 1
+
+# Remoção de duplicatas: um registro por chave ou só registros idênticos
+MODOS_UNICOS = ('chave', 'registro')
+
+# Funções de agregação por chave
+FUNCOES_AGREGACAO = ('contagem', 'soma', 'minimo', 'maximo')
+
+# Multiplicadores aceitos em `memoria_max` (ex.: '512MB', '2GiB')
+UNIDADES_MEMORIA = {
+    'B': 1,
+    'K': 1024, 'KB': 1000, 'KIB': 1024,
+    'M': 1024 ** 2, 'MB': 1000 ** 2, 'MIB': 1024 ** 2,
+    'G': 1024 ** 3, 'GB': 1000 ** 3, 'GIB': 1024 ** 3,
+    'T': 1024 ** 4, 'TB': 1000 ** 4, 'TIB': 1024 ** 4,
+}
+
+
+def converter_tamanho_memoria(valor: Union[int, str]) -> int:
     """
-    Classe para implementar ordenação externa usando Merge-Sort
-    para arquivos CSV grandes que não cabem na memória RAM.
+    Converte um tamanho de memória em bytes.
+    
+    Args:
+        valor: Número de bytes ou texto com unidade ('2GiB', '512MB', '64k')
+        
+    Returns:
+        Tamanho em bytes
+    """
+    if isinstance(valor, int):
+        return valor
+    
+    texto = valor.strip().upper().replace(' ', '')
+    indice = len(texto)
+    while indice > 0 and texto[indice - 1].isalpha():
+        indice -= 1
+    numero, unidade = texto[:indice], texto[indice:] or 'B'
+    
+    if unidade not in UNIDADES_MEMORIA:
+        raise ValueError(f"Unidade de memória '{unidade}' não reconhecida em {valor!r}")
+    try:
+        return int(float(numero) * UNIDADES_MEMORIA[unidade])
+    except ValueError:
+        raise ValueError(f"Tamanho de memória inválido: {valor!r}")
+
+
+# Formato binário dos runs intermediários: assinatura, cabeçalho do CSV e
+# blocos de registros. Cada bloco tem um prefixo (codec, tamanho) seguido de
+# (chaves decodificadas, registros); os registros são gravados como texto com
+# separadores de campo/registro, ou como lista se algum campo os contiver.
+# Ao final vem o índice de blocos (posição e primeira chave de cada bloco),
+# gravado como um bloco de codec `CODEC_INDICE` seguido do seu tamanho.
+ASSINATURA_RUN = b'MSRUN\x01'
+PREFIXO_BLOCO = struct.Struct('<BI')
+CODEC_INDICE = 255
+SUFIXO_INDICE = struct.Struct('<I')
+PREFIXO_CABECALHO = struct.Struct('<I')
+REGISTROS_POR_BLOCO = 1024
+SEPARADOR_CAMPO = '\x1f'
+SEPARADOR_REGISTRO = '\x1e'
+
+# Codecs de compressão por bloco dos runs intermediários
+CODECS_COMPRESSAO = {None: 0, 'zlib': 1, 'lz4': 2}
+
+
+def _tamanho_registro(linha: List[str]) -> int:
+    """Estima a memória ocupada por um registro já carregado (em bytes)."""
+    tamanho = sys.getsizeof(linha) + SOBRECARGA_REGISTRO
+    for campo in linha:
+        tamanho += sys.getsizeof(campo)
+    return tamanho
+
+
+def _converter_float(texto: str) -> float:
+    """Converte para float, rejeitando NaN (que não possui ordem total)."""
+    valor = float(texto)
+    if valor != valor:
+        raise ValueError(f"Valor NaN não ordenável: {texto!r}")
+    return valor
+
+
+def _converter_decimal(texto: str) -> Decimal:
+    """Converte para Decimal, rejeitando NaN (que não possui ordem total)."""
+    valor = Decimal(texto)
+    if valor.is_nan():
+        raise ValueError(f"Valor NaN não ordenável: {texto!r}")
+    return valor
+
+
+def _converter_data(texto: str) -> date:
+    """Converte uma data no formato ISO (AAAA-MM-DD)."""
+    return date.fromisoformat(texto.strip())
+
+
+# Conversores de texto para o valor tipado de cada tipo de chave suportado
+CONVERSORES_CHAVE = {
+    'int': int,
+    'float': _converter_float,
+    'decimal': _converter_decimal,
+    'date': _converter_data,
+    'str': str,
+}
+
+
+# Colações de texto: ordem binária (pontos de código), sem distinção de
+# maiúsculas/minúsculas ou conforme o locale de LC_COLLATE do processo
+COLACOES = ('binaria', 'sem_caso', 'locale')
+
+# Tabela que inverte cada byte; aplicada à codificação de colunas decrescentes
+_INVERSAO_BYTES = bytes(range(255, -1, -1))
+
+# Marcadores de grupo na codificação de cada coluna: valores convertidos para
+# o tipo da coluna vêm antes dos valores que só puderam ser lidos como texto
+_GRUPO_TIPADO = b'\x01'
+_GRUPO_TEXTO = b'\x02'
+
+
+def _codificar_texto(texto: str) -> bytes:
+    """
+    Codifica texto em UTF-8 preservando a ordem e delimitando o fim.
+    
+    Bytes nulos são escapados (00 -> 00 FF) e o valor termina em 00 00, de
+    modo que um prefixo sempre vem antes do texto mais longo e a coluna
+    seguinte da chave composta nunca interfere na comparação.
+    """
+    return texto.encode('utf-8', 'surrogatepass').replace(b'\x00', b'\x00\xff') + b'\x00\x00'
+
+
+def _codificar_int(valor: int) -> bytes:
+    """
+    Codifica um inteiro de qualquer tamanho como sinal/comprimento/magnitude,
+    terminado em 00 (veja `_codificar_int_fracionario`).
+    """
+    if valor == 0:
+        return b'\x80\x00'
+    magnitude = abs(valor)
+    tamanho = (magnitude.bit_length() + 7) // 8
+    corpo = magnitude.to_bytes(tamanho, 'big')
+    if valor > 0:
+        return bytes((0x80 + tamanho,)) + corpo + b'\x00'
+    return bytes((0x80 - tamanho,)) + corpo.translate(_INVERSAO_BYTES) + b'\x00'
+
+
+def _codificar_int_fracionario(texto: str) -> bytes:
+    """
+    Codifica um número que não é inteiro (como '0.5' ou '1e3') em uma coluna
+    'int', na ordem numérica entre os inteiros.
+    
+    O valor é dividido em parte inteira (piso), codificada como em
+    `_codificar_int` mas com 01 no lugar do terminador, e fração, cujos
+    dígitos (terminados em 00) comparam como texto por estarem em (0, 1).
+    Números inteiros escritos como decimal ('2.0') têm a codificação do
+    inteiro, e infinitos ficam nas pontas.
+    """
+    valor = _converter_decimal(texto)
+    if valor.is_infinite():
+        return b'\xff\xff' if valor > 0 else b'\x00'
+    piso = valor.to_integral_value(rounding=ROUND_FLOOR)
+    if valor == piso:
+        return _codificar_int(int(piso))
+    # Precisão suficiente para que a subtração seja exata
+    contexto = Context(prec=max(valor.adjusted(), 0) - valor.as_tuple().exponent + 2)
+    fracao = contexto.subtract(valor, piso).as_tuple()
+    digitos = ''.join(map(str, fracao.digits)).rstrip('0')
+    # Zeros entre a vírgula e o primeiro dígito significativo (0.05 -> '05')
+    digitos = '0' * (-fracao.exponent - len(fracao.digits)) + digitos
+    return _codificar_int(int(piso))[:-1] + b'\x01' + digitos.encode('ascii') + b'\x00'
+
+
+def _codificar_float(valor: float) -> bytes:
+    """Codifica um float IEEE 754 de modo que a ordem dos bytes siga a numérica."""
+    bits = struct.pack('>d', valor + 0.0)  # normaliza -0.0 para 0.0
+    if bits[0] & 0x80:
+        return bits.translate(_INVERSAO_BYTES)
+    return bytes((bits[0] | 0x80,)) + bits[1:]
+
+
+def _codificar_decimal(valor: Decimal) -> bytes:
+    """Codifica um Decimal como sinal, expoente ajustado e dígitos significativos."""
+    if valor.is_zero():
+        return b'\x80'
+    if valor.is_infinite():
+        return b'\x7e' if valor.is_signed() else b'\x82'
+    
+    digitos = ''.join(map(str, valor.as_tuple().digits)).rstrip('0')
+    corpo = (struct.pack('>I', valor.adjusted() + 2 ** 31)
+             + digitos.encode('ascii') + b'\x00')
+    if valor.is_signed():
+        return b'\x7f' + corpo.translate(_INVERSAO_BYTES)
+    return b'\x81' + corpo
+
+
+def _codificar_data(valor: date) -> bytes:
+    """Codifica uma data pelo seu número ordinal."""
+    return struct.pack('>I', valor.toordinal())
+
+
+# Codificadores do valor tipado em bytes comparáveis de cada tipo de chave
+CODIFICADORES_CHAVE = {
+    'int': _codificar_int,
+    'float': _codificar_float,
+    'decimal': _codificar_decimal,
+    'date': _codificar_data,
+    'str': _codificar_texto,
+}
+
+# Codificação no grupo tipado de valores que o conversor do tipo recusa:
+# números com fração em colunas inteiras continuam na ordem numérica
+_CODIFICADORES_ALTERNATIVOS = {
+    'int': _codificar_int_fracionario,
+}
+
+
+class ColunaChave(NamedTuple):
+    """
+    Especificação de uma coluna da chave de ordenação.
+    
+    Attributes:
+        coluna: Nome da coluna ou índice (0-based)
+        ordem: 'asc' ou 'desc'
+        tipo: 'int', 'float', 'decimal', 'date' ou 'str' (None = detectar)
+        colacao: Para texto, 'binaria', 'sem_caso' ou 'locale'
+    """
+    coluna: Union[str, int]
+    ordem: str = 'asc'
+    tipo: Optional[str] = None
+    colacao: str = 'binaria'
+
+
+def normalizar_colunas_chave(coluna_chave, ordem: str = 'asc',
+                             tipo_chave: Optional[str] = None) -> List[ColunaChave]:
+    """
+    Converte a especificação de chave aceita por `ordenar_arquivo` em uma
+    lista de `ColunaChave`.
+    
+    Aceita uma única coluna (nome ou índice) ou uma lista em que cada item é
+    uma coluna, uma tupla (coluna, ordem[, tipo[, colacao]]), um dicionário
+    com essas chaves ou uma `ColunaChave`. `ordem` e `tipo_chave` são usados
+    nas colunas que não os definem.
+    
+    Args:
+        coluna_chave: Coluna ou lista de colunas da chave
+        ordem: Ordem padrão das colunas
+        tipo_chave: Tipo padrão das colunas (None = detectar)
+        
+    Returns:
+        Lista de colunas da chave composta
+    """
+    itens = coluna_chave if isinstance(coluna_chave, list) else [coluna_chave]
+    if not itens:
+        raise ValueError("A chave de ordenação precisa de pelo menos uma coluna")
+    
+    colunas = []
+    for item in itens:
+        if isinstance(item, ColunaChave):
+            coluna = item
+        elif isinstance(item, dict):
+            coluna = ColunaChave(**{'ordem': ordem, 'tipo': tipo_chave, **item})
+        elif isinstance(item, tuple):
+            padrao = (ordem, tipo_chave)
+            coluna = ColunaChave(*item, *padrao[len(item) - 1:])
+        else:
+            coluna = ColunaChave(item, ordem, tipo_chave)
+        
+        if coluna.ordem not in ('asc', 'desc'):
+            raise ValueError(f"Ordem '{coluna.ordem}' inválida. Use 'asc' ou 'desc'")
+        if coluna.tipo is not None and coluna.tipo not in CONVERSORES_CHAVE:
+            raise ValueError(f"Tipo de chave '{coluna.tipo}' não suportado. "
+                             f"Use um de: {', '.join(CONVERSORES_CHAVE)}")
+        if coluna.colacao not in COLACOES:
+            raise ValueError(f"Colação '{coluna.colacao}' não suportada. "
+                             f"Use um de: {', '.join(COLACOES)}")
+        colunas.append(coluna)
+    return colunas
+
+
+class ExtratorChave:
+    """
+    Decodifica a chave de ordenação de cada registro uma única vez.
+    
+    Cada coluna da chave é convertida para o seu tipo e codificada em bytes
+    cuja ordem lexicográfica é a ordem desejada (colunas decrescentes têm os
+    bytes invertidos). A chave composta é a concatenação dessas codificações,
+    então ordenar e mesclar exige apenas comparações entre objetos `bytes`.
+    Valores que não puderam ser convertidos para o tipo da coluna vêm depois
+    dos convertidos e são comparados como texto, o que dá uma ordenação
+    determinística para colunas mistas. Em colunas 'int', números com fração
+    continuam no grupo numérico (veja `_codificar_int_fracionario`).
     """
     
-    def __init__(self, tamanho_buffer: int = 1000):
+    def __init__(self, colunas: List[ColunaChave]):
         """
-        Inicializa a classe de ordenação externa.
+        Args:
+            colunas: Colunas da chave com índice e tipo já resolvidos
+        """
+        self.colunas = colunas
+        self.indice_maximo = max(coluna.coluna for coluna in colunas)
+        self._codificadores = [self._criar_codificador(coluna) for coluna in colunas]
+    
+    @property
+    def tipo(self) -> str:
+        """Tipos das colunas da chave, separados por vírgula."""
+        return ','.join(coluna.tipo for coluna in self.colunas)
+    
+    def __call__(self, linha: List[str]) -> bytes:
+        return b''.join([codificar(linha) for codificar in self._codificadores])
+    
+    def __getstate__(self):
+        # Os codificadores são closures; o estado serializado (para os
+        # workers) guarda só as colunas e eles são recriados ao restaurar
+        return self.colunas
+    
+    def __setstate__(self, colunas: List[ColunaChave]):
+        self.__init__(colunas)
+    
+    @staticmethod
+    def _criar_codificador(coluna: ColunaChave):
+        indice = coluna.coluna
+        converter = CONVERSORES_CHAVE[coluna.tipo]
+        codificar_valor = CODIFICADORES_CHAVE[coluna.tipo]
+        alternativo = _CODIFICADORES_ALTERNATIVOS.get(coluna.tipo)
+        
+        if coluna.colacao == 'sem_caso':
+            normalizar = str.casefold
+        elif coluna.colacao == 'locale':
+            normalizar = locale.strxfrm
+        else:
+            normalizar = None
+        
+        def codificar(linha: List[str]) -> bytes:
+            texto = linha[indice]
+            try:
+                valor = converter(texto)
+                if normalizar is not None and isinstance(valor, str):
+                    valor = normalizar(valor)
+                codigo = _GRUPO_TIPADO + codificar_valor(valor)
+            except (ValueError, ArithmeticError):
+                codigo = None
+                if alternativo is not None:
+                    try:
+                        codigo = _GRUPO_TIPADO + alternativo(texto)
+                    except (ValueError, ArithmeticError):
+                        pass
+                if codigo is None:
+                    if normalizar is not None:
+                        texto = normalizar(texto)
+                    codigo = _GRUPO_TEXTO + _codificar_texto(texto)
+            return codigo
+        
+        if coluna.ordem == 'asc':
+            return codificar
+        
+        def codificar_decrescente(linha: List[str]) -> bytes:
+            return codificar(linha).translate(_INVERSAO_BYTES)
+        return codificar_decrescente
+    
+    @classmethod
+    def detectar(cls, colunas: List[ColunaChave],
+                 amostra: List[List[str]]) -> 'ExtratorChave':
+        """
+        Completa o tipo das colunas sem tipo a partir de uma amostra de registros.
+        
+        É escolhido o primeiro tipo entre int, float e date que converte todos
+        os valores não vazios da amostra; se nenhum converte todos, usa-se o
+        que converte a maioria. Caso contrário a coluna é tratada como texto.
+        O tipo 'decimal' só é usado quando informado explicitamente.
         
         Args:
-            tamanho_buffer: Número máximo de registros que podem ser carregados
-                          na memória por vez (simula o limite de RAM)
+            colunas: Colunas da chave com índice já resolvido
+            amostra: Registros usados na detecção
+            
+        Returns:
+            Extrator configurado com os tipos detectados
         """
-        self.tamanho_buffer = tamanho_buffer
-        self.arquivos_temporarios = []
-        self.diretorio_temp = None
-        self.coluna_chave_atual = None
+        amostra = amostra[:AMOSTRA_DETECCAO]
+        return cls([coluna if coluna.tipo is not None
+                    else coluna._replace(tipo=cls._detectar_tipo(coluna.coluna, amostra))
+                    for coluna in colunas])
+    
+    @staticmethod
+    def _detectar_tipo(indice_chave: int, amostra: List[List[str]]) -> str:
+        valores = [linha[indice_chave] for linha in amostra if linha[indice_chave].strip()]
+        if not valores:
+            return 'str'
+        
+        convertidos = {}
+        for tipo in ('int', 'float', 'date'):
+            converter = CONVERSORES_CHAVE[tipo]
+            total = 0
+            for valor in valores:
+                try:
+                    converter(valor)
+                    total += 1
+                except (ValueError, ArithmeticError):
+                    pass
+            if total == len(valores):
+                return tipo
+            convertidos[tipo] = total
+        
+        tipo, total = max(convertidos.items(), key=lambda item: item[1])
+        if total * 2 > len(valores):
+            return tipo
+        return 'str'
+
+
+def _ler_contagem(texto: str) -> int:
+    return int(texto) if texto else 0
+
+
+def _ler_soma(texto: str) -> Optional[Decimal]:
+    if not texto.strip():
+        return None
+    try:
+        return _converter_decimal(texto)
+    except (ValueError, ArithmeticError):
+        raise ValueError(f"Valor não numérico na soma: {texto!r}")
+
+
+def _ler_extremo(texto: str) -> Optional[tuple]:
+    # Números são comparados pelo valor e vêm antes dos textos; o texto
+    # original é preservado para a saída
+    if not texto.strip():
+        return None
+    try:
+        return (0, _converter_decimal(texto), texto)
+    except (ValueError, ArithmeticError):
+        return (1, texto, texto)
+
+
+def _combinar_opcionais(combinar):
+    def combinar_valores(a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return combinar(a, b)
+    return combinar_valores
+
+
+# Por função de agregação: (ler o valor parcial, combinar dois parciais,
+# formatar o resultado)
+AGREGADORES = {
+    'contagem': (_ler_contagem, int.__add__, str),
+    'soma': (_ler_soma, _combinar_opcionais(Decimal.__add__),
+             lambda valor: '' if valor is None else str(valor)),
+    'minimo': (_ler_extremo, _combinar_opcionais(min),
+               lambda valor: '' if valor is None else valor[2]),
+    'maximo': (_ler_extremo, _combinar_opcionais(max),
+               lambda valor: '' if valor is None else valor[2]),
+}
+
+
+class ReducaoRegistros:
+    """
+    Combina registros de mesma chave: remoção de duplicatas ou agregação.
+    
+    Aplicada a sequências de pares (chave, registro) já ordenadas, tanto ao
+    gravar cada run quanto em cada merge, de modo que as duplicatas são
+    combinadas o quanto antes e os runs encolhem. Na agregação os registros
+    dos runs já estão no formato de saída (colunas da chave seguidas dos
+    valores parciais), e combinar parciais dá o mesmo resultado que
+    combinar os registros originais.
+    """
     
-    def ordenar_arquivo(self, nome_arquivo: str, coluna_chave: Union[str, int], 
-                       ordem: str = 'asc', arquivo_saida: str = None) -> str:
+    def __init__(self, unicos: Optional[str] = None, agregacoes: Optional[list] = None):
         """
-        Ordena um arquivo CSV usando ordenação externa.
+        Args:
+            unicos: 'chave' mantém só o primeiro registro de cada chave;
+                   'registro' remove registros idênticos
+            agregacoes: Lista de agregações por chave. Cada item é 'contagem'
+                       (registros por chave) ou uma tupla (coluna, funcao)
+                       com funcao em `FUNCOES_AGREGACAO`; 'contagem' com
+                       coluna conta os valores não vazios.
+        """
+        if unicos is not None and unicos not in MODOS_UNICOS:
+            raise ValueError(f"Modo de únicos '{unicos}' inválido. "
+                             f"Use um de: {', '.join(MODOS_UNICOS)}")
+        if unicos is not None and agregacoes:
+            raise ValueError("unicos e agregacoes não podem ser usados juntos")
+        
+        self.unicos = unicos
+        self.agregacoes = []
+        for item in agregacoes or []:
+            coluna, funcao = (None, item) if isinstance(item, str) else item
+            if funcao not in FUNCOES_AGREGACAO:
+                raise ValueError(f"Função de agregação '{funcao}' não suportada. "
+                                 f"Use um de: {', '.join(FUNCOES_AGREGACAO)}")
+            if coluna is None and funcao != 'contagem':
+                raise ValueError(f"A agregação '{funcao}' precisa de uma coluna")
+            self.agregacoes.append((coluna, funcao))
+        self.indices_chave = []
+        self.indices_agregados = []
+    
+    def preparar(self, cabecalho: List[str], indices_chave: List[int], resolver) -> List[str]:
+        """
+        Resolve as colunas agregadas e devolve o cabeçalho dos runs e da saída.
         
         Args:
-            nome_arquivo: Caminho para o arquivo CSV de entrada
-            coluna_chave: Nome da coluna ou índice (0-based) da chave de ordenação
-            ordem: 'asc' para ascendente ou 'desc' para descendente
-            arquivo_saida: Nome do arquivo de saída (opcional)
+            cabecalho: Cabeçalho da entrada
+            indices_chave: Índices das colunas da chave
+            resolver: Função que converte nome ou índice de coluna em índice
             
         Returns:
-            Caminho do arquivo ordenado
+            Cabeçalho da saída (o da entrada, se não houver agregação)
+        """
+        if not self.agregacoes:
+            return cabecalho
+        self.indices_chave = list(indices_chave)
+        self.indices_agregados = [None if coluna is None else resolver(coluna)
+                                  for coluna, _ in self.agregacoes]
+        nomes = [cabecalho[indice] for indice in self.indices_chave]
+        for indice, (_, funcao) in zip(self.indices_agregados, self.agregacoes):
+            nomes.append(funcao if indice is None else f"{funcao}_{cabecalho[indice]}")
+        return nomes
+    
+    def projetar(self, linha: List[str]) -> List[str]:
+        """Converte um registro de entrada para o formato dos runs agregados."""
+        valores = [linha[indice] for indice in self.indices_chave]
+        for indice, (_, funcao) in zip(self.indices_agregados, self.agregacoes):
+            if indice is None:
+                valores.append('1')
+                continue
+            texto = linha[indice] if indice < len(linha) else ''
+            if funcao == 'contagem':
+                texto = '1' if texto.strip() else '0'
+            valores.append(texto)
+        return valores
+    
+    def reduzir(self, pares: Iterable[Tuple[bytes, List[str]]],
+                projetar: bool = False) -> Iterator[Tuple[bytes, List[str]]]:
+        """
+        Combina os pares consecutivos de mesma chave.
+        
+        Args:
+            pares: Pares (chave, registro) ordenados pela chave
+            projetar: Se True, os registros são de entrada e ainda precisam
+                     ser convertidos com `projetar`
+            
+        Yields:
+            Um par por chave
+        """
+        agrupador = _Agrupador(self, projetar)
+        for chave, linha in pares:
+            par = agrupador.adicionar(chave, linha)
+            if par is not None:
+                yield par
+        par = agrupador.finalizar()
+        if par is not None:
+            yield par
+
+
+class _Agrupador:
+    """Acumula um grupo de registros de mesma chave para `ReducaoRegistros`."""
+    
+    def __init__(self, reducao: ReducaoRegistros, projetar: bool = False):
+        self._base = len(reducao.indices_chave)
+        self._funcoes = [AGREGADORES[funcao] for _, funcao in reducao.agregacoes]
+        self._projetar = reducao.projetar if projetar and reducao.agregacoes else None
+        self._ativo = False
+        self._chave = None
+        self._linha = None
+        self._estado = None
+    
+    def adicionar(self, chave: bytes, linha: List[str]) -> Optional[Tuple[bytes, List[str]]]:
+        """
+        Acrescenta um par ao grupo atual.
+        
+        Returns:
+            O par do grupo anterior, se este par iniciou um novo grupo
+        """
+        if self._ativo and chave == self._chave:
+            if self._funcoes:
+                if self._projetar is not None:
+                    linha = self._projetar(linha)
+                self._estado = [combinar(parcial, ler(texto)) for (ler, combinar, _), parcial, texto
+                                in zip(self._funcoes, self._estado, linha[self._base:])]
+            return None
+        
+        concluido = self.finalizar()
+        if self._projetar is not None:
+            linha = self._projetar(linha)
+        self._ativo = True
+        self._chave = chave
+        self._linha = linha
+        if self._funcoes:
+            self._estado = [ler(texto) for (ler, _, _), texto
+                            in zip(self._funcoes, linha[self._base:])]
+        return concluido
+    
+    def finalizar(self) -> Optional[Tuple[bytes, List[str]]]:
+        """Encerra o grupo atual e devolve o seu par (None se não houver)."""
+        if not self._ativo:
+            return None
+        self._ativo = False
+        linha = self._linha
+        if self._funcoes:
+            linha = linha[:self._base] + [formatar(parcial) for (_, _, formatar), parcial
+                                          in zip(self._funcoes, self._estado)]
+        return self._chave, linha
+
+
+class _IteradorAntecipado:
+    """
+    Consome um iterável em uma thread de fundo (leitura antecipada).
+    
+    Até `profundidade` itens ficam prontos em uma fila enquanto o consumidor
+    processa o atual; com profundidade 2 o efeito é de buffer duplo. Erros
+    da thread são relançados no consumidor.
+    """
+    
+    _FIM = object()
+    
+    def __init__(self, iteravel: Iterable, profundidade: int = 2):
+        self._fila = queue.Queue(maxsize=max(1, profundidade))
+        self._parar = threading.Event()
+        self._terminado = False
+        self._thread = threading.Thread(target=self._produzir, args=(iter(iteravel),),
+                                        daemon=True)
+        self._thread.start()
+    
+    def _produzir(self, iterador: Iterator):
+        try:
+            for item in iterador:
+                if not self._colocar(item):
+                    return
+            self._colocar(self._FIM)
+        except BaseException as erro:
+            self._colocar(_ErroThread(erro))
+    
+    def _colocar(self, item: Any) -> bool:
+        while not self._parar.is_set():
+            try:
+                self._fila.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if self._terminado:
+            raise StopIteration
+        item = self._fila.get()
+        if item is self._FIM or isinstance(item, _ErroThread):
+            self._terminado = True
+            self._thread.join()
+            if isinstance(item, _ErroThread):
+                raise item.erro
+            raise StopIteration
+        return item
+    
+    def fechar(self):
+        """Interrompe a thread de leitura (mesmo que o iterável não tenha acabado)."""
+        self._parar.set()
+        self._thread.join()
+
+
+class _GravacaoAssincrona:
+    """
+    Executa gravações em uma thread de fundo (escrita atrasada).
+    
+    Cada item enviado é uma função sem argumentos que faz a gravação; até
+    `profundidade` itens aguardam na fila enquanto o chamador prepara os
+    próximos. Erros da thread são relançados no próximo envio ou no fechamento.
+    """
+    
+    def __init__(self, profundidade: int = 2):
+        self._fila = queue.Queue(maxsize=max(1, profundidade))
+        self._erro = None
+        self._thread = threading.Thread(target=self._consumir, daemon=True)
+        self._thread.start()
+    
+    def _consumir(self):
+        while True:
+            tarefa = self._fila.get()
+            if tarefa is None:
+                return
+            if self._erro is None:
+                try:
+                    tarefa()
+                except BaseException as erro:
+                    self._erro = erro
+    
+    def enviar(self, tarefa):
+        """Agenda uma gravação."""
+        if self._erro is not None:
+            raise self._erro
+        self._fila.put(tarefa)
+    
+    def fechar(self):
+        """Aguarda as gravações pendentes."""
+        self._fila.put(None)
+        self._thread.join()
+        if self._erro is not None:
+            raise self._erro
+
+
+class _ErroThread:
+    """Transporta uma exceção de uma thread de fundo para o consumidor."""
+    
+    __slots__ = ('erro',)
+    
+    def __init__(self, erro: BaseException):
+        self.erro = erro
+
+
+class _LinhasComPosicao:
+    """
+    Itera as linhas de um arquivo binário, decodificadas, contando os bytes
+    consumidos. Alimenta um `csv.reader`, que só pede as linhas do registro
+    atual; assim `posicao` é sempre o fim do último registro lido.
+    """
+    
+    def __init__(self, arquivo, encoding: str = 'utf-8'):
+        self._arquivo = arquivo
+        self._encoding = encoding
+        self.posicao = arquivo.tell()
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> str:
+        linha = self._arquivo.readline()
+        if not linha:
+            raise StopIteration
+        self.posicao += len(linha)
+        return linha.decode(self._encoding)
+
+
+class _IntervaloArquivo(io.RawIOBase):
+    """Expõe como arquivo apenas os bytes de um arquivo até a posição `fim`."""
+    
+    def __init__(self, arquivo, fim: int):
+        """
+        Args:
+            arquivo: Arquivo binário já posicionado no início do intervalo
+            fim: Posição em que o intervalo termina
+        """
+        self._arquivo = arquivo
+        self._restante = fim - arquivo.tell()
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, destino) -> int:
+        tamanho = min(len(destino), self._restante)
+        if tamanho <= 0:
+            return 0
+        lidos = self._arquivo.readinto(memoryview(destino)[:tamanho])
+        self._restante -= lidos
+        return lidos
+
+
+def _limites_registros(nome_arquivo: str, inicio: int, partes: int) -> List[int]:
+    """
+    Divide o arquivo a partir de `inicio` em até `partes` intervalos de
+    tamanhos próximos, cada um começando no início de um registro.
+    
+    Uma quebra de linha só encerra um registro se o número de aspas desde o
+    início do intervalo for par, ou seja, se ela não estiver dentro de um
+    campo entre aspas (aspas escapadas como "" não alteram a paridade). A
+    contagem é feita em blocos com `bytes.count`, sem decodificar o texto.
+    
+    Args:
+        nome_arquivo: Arquivo CSV
+        inicio: Posição do primeiro registro de dados (após o cabeçalho)
+        partes: Número desejado de intervalos
+        
+    Returns:
+        Posições crescentes [inicio, ..., tamanho do arquivo]; o intervalo i
+        vai de limites[i] (inclusive) a limites[i + 1] (exclusive)
+    """
+    tamanho = os.path.getsize(nome_arquivo)
+    limites = [inicio]
+    with open(nome_arquivo, 'rb') as arquivo:
+        for parte in range(1, partes):
+            alvo = inicio + (tamanho - inicio) * parte // partes
+            if alvo <= limites[-1]:
+                continue
+            
+            # Paridade das aspas entre o último limite e o alvo
+            arquivo.seek(limites[-1])
+            aspas = 0
+            posicao = limites[-1]
+            while posicao < alvo:
+                bloco = arquivo.read(min(TAMANHO_BLOCO_CSV, alvo - posicao))
+                aspas += bloco.count(b'"')
+                posicao += len(bloco)
+            
+            # Primeira quebra de linha após o alvo fora de aspas
+            limite = None
+            while limite is None:
+                bloco = arquivo.read(TAMANHO_BLOCO_CSV)
+                if not bloco:
+                    break
+                anterior = 0
+                quebra = bloco.find(b'\n')
+                while quebra >= 0:
+                    aspas += bloco.count(b'"', anterior, quebra)
+                    if aspas % 2 == 0:
+                        limite = posicao + quebra + 1
+                        break
+                    anterior = quebra
+                    quebra = bloco.find(b'\n', quebra + 1)
+                else:
+                    aspas += bloco.count(b'"', anterior)
+                    posicao += len(bloco)
+            
+            if limite is None or limite >= tamanho:
+                break
+            limites.append(limite)
+    limites.append(tamanho)
+    return limites
+
+
+class _VarreduraMapeada:
+    """
+    Percorre os registros de um CSV mapeado em memória (mmap) sem convertê-los
+    em objetos Python.
+    
+    Cada item é a tupla (início, fim, com_aspas) das posições em bytes do
+    registro, incluindo a quebra de linha; `posicao` é sempre o fim do último
+    registro produzido. Um registro só termina em uma quebra de linha fora de
+    aspas, então campos entre aspas com quebras de linha são respeitados.
+    """
+    
+    def __init__(self, mapa: mmap.mmap, posicao: int = 0):
+        """
+        Args:
+            mapa: Arquivo CSV mapeado em memória
+            posicao: Posição do primeiro registro a percorrer
+        """
+        self.mapa = mapa
+        self.posicao = posicao
+        self._tamanho = len(mapa)
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> Tuple[int, int, bool]:
+        mapa = self.mapa
+        inicio = self.posicao
+        if inicio >= self._tamanho:
+            raise StopIteration
+        fim = mapa.find(b'\n', inicio) + 1 or self._tamanho
+        
+        com_aspas = mapa.find(b'"', inicio, fim) >= 0
+        if com_aspas:
+            # Número ímpar de aspas: a quebra de linha está dentro de um campo
+            aspas = mapa[inicio:fim].count(b'"')
+            while aspas % 2 and fim < self._tamanho:
+                proximo = mapa.find(b'\n', fim) + 1 or self._tamanho
+                aspas += mapa[fim:proximo].count(b'"')
+                fim = proximo
+        
+        self.posicao = fim
+        return inicio, fim, com_aspas
+    
+    def campos(self, inicio: int, fim: int, com_aspas: bool,
+               quantidade: Optional[int] = None) -> List[str]:
+        """
+        Decodifica os campos de um registro.
+        
+        Sem aspas, só os `quantidade` primeiros campos são decodificados (o
+        restante da linha nunca vira texto); com aspas o registro inteiro é
+        interpretado pelo módulo csv.
+        
+        Args:
+            inicio: Posição do início do registro
+            fim: Posição do fim do registro
+            com_aspas: Se o registro contém aspas
+            quantidade: Número de campos necessários (None = todos)
+            
+        Returns:
+            Lista com os campos (ou os primeiros campos) do registro
+        """
+        mapa = self.mapa
+        if com_aspas:
+            return next(csv.reader([mapa[inicio:fim].decode('utf-8')]), [])
+        
+        corte = fim
+        if quantidade is not None:
+            corte = inicio - 1
+            for _ in range(quantidade):
+                corte = mapa.find(b',', corte + 1, fim)
+                if corte < 0:
+                    corte = fim
+                    break
+        texto = mapa[inicio:corte].decode('utf-8').rstrip('\r\n')
+        # Linhas em branco são ignoradas, como no csv.reader
+        return texto.split(',') if texto else []
+
+
+class _IndiceRegistros:
+    """
+    Buffer compacto do modo de entrada mapeada: a chave codificada, o início e
+    o tamanho em bytes de cada registro, em vez dos campos.
+    """
+    
+    def __init__(self):
+        self.chaves = []
+        self.inicios = array('q')
+        self.tamanhos = array('q')
+    
+    def __len__(self) -> int:
+        return len(self.chaves)
+    
+    def acrescentar(self, chave: bytes, inicio: int, tamanho: int):
+        """Acrescenta um registro ao buffer."""
+        self.chaves.append(chave)
+        self.inicios.append(inicio)
+        self.tamanhos.append(tamanho)
+
+
+def _sincronizar_arquivo(caminho: str):
+    """Garante que o conteúdo do arquivo chegou ao disco (fsync)."""
+    with open(caminho, 'rb') as arquivo:
+        os.fsync(arquivo.fileno())
+
+
+class EscritorRun:
+    """
+    Grava um run intermediário no formato binário.
+    
+    Os registros são gravados com a chave já decodificada à frente, para que
+    o merge compare as chaves sem reprocessar o CSV. Os registros são
+    agrupados em blocos, opcionalmente comprimidos com zlib ou LZ4, e o run
+    termina com o índice dos blocos, usado para ler só uma faixa de chaves
+    (`LeitorRun`, merge particionado).
+    """
+    
+    def __init__(self, caminho: str, cabecalho: List[str],
+                 compressao: Optional[str] = None, buffering: int = -1,
+                 profundidade_assincrona: int = 0):
+        """
+        Args:
+            caminho: Caminho do arquivo de run
+            cabecalho: Cabeçalho do CSV de origem
+            compressao: None, 'zlib' ou 'lz4'
+            buffering: Tamanho do buffer de escrita (-1 = padrão)
+            profundidade_assincrona: Se maior que zero, a compressão e a
+                                    gravação dos blocos são feitas em uma
+                                    thread de fundo com essa quantidade de
+                                    blocos em espera
+        """
+        self.caminho = caminho
+        self.registros = 0  # Registros já enviados para blocos gravados
+        self.limites = None  # (primeira chave, última chave) gravadas
+        self._codec = CODECS_COMPRESSAO[compressao]
+        self._indice = []  # (posição, primeira chave) de cada bloco gravado
+        self._chaves = []
+        self._registros = []
+        self._arquivo = open(caminho, 'wb', buffering=buffering)
+        self._gravacao = (_GravacaoAssincrona(profundidade_assincrona)
+                          if profundidade_assincrona > 0 else None)
+        
+        dados_cabecalho = pickle.dumps(cabecalho, pickle.HIGHEST_PROTOCOL)
+        self._arquivo.write(ASSINATURA_RUN)
+        self._arquivo.write(PREFIXO_CABECALHO.pack(len(dados_cabecalho)))
+        self._arquivo.write(dados_cabecalho)
+    
+    def escrever(self, chave: Any, linha: List[str]):
+        """Acrescenta um registro ao run."""
+        self._chaves.append(chave)
+        self._registros.append(linha)
+        if len(self._chaves) >= REGISTROS_POR_BLOCO:
+            self._gravar_bloco()
+    
+    def escrever_varios(self, pares):
+        """Acrescenta vários pares (chave, registro) ao run."""
+        for chave, linha in pares:
+            self.escrever(chave, linha)
+    
+    def fechar(self) -> int:
+        """
+        Grava o último bloco e o índice de blocos e fecha o arquivo.
+        
+        Returns:
+            Tamanho do run em bytes
+        """
+        if self._arquivo.closed:
+            return os.path.getsize(self.caminho)
+        try:
+            if self._chaves:
+                self._gravar_bloco()
+            if self._gravacao is not None:
+                self._gravacao.fechar()
+            dados = pickle.dumps(self._indice, pickle.HIGHEST_PROTOCOL)
+            self._arquivo.write(PREFIXO_BLOCO.pack(CODEC_INDICE, len(dados)))
+            self._arquivo.write(dados)
+            self._arquivo.write(SUFIXO_INDICE.pack(len(dados)))
+        finally:
+            self._arquivo.close()
+        return os.path.getsize(self.caminho)
+    
+    def _gravar_bloco(self):
+        registros = self._registros
+        try:
+            texto = SEPARADOR_REGISTRO.join([SEPARADOR_CAMPO.join(linha) for linha in registros])
+        except TypeError:
+            texto = registros  # Registros que não são texto (posições na entrada mapeada)
+        else:
+            total_campos = sum(map(len, registros))
+            # Se algum campo contém um separador, grava a lista de registros
+            if (texto.count(SEPARADOR_CAMPO) != total_campos - len(registros)
+                    or texto.count(SEPARADOR_REGISTRO) != len(registros) - 1):
+                texto = registros
+        
+        dados = pickle.dumps((self._chaves, texto), pickle.HIGHEST_PROTOCOL)
+        primeira = self._chaves[0]
+        self.registros += len(registros)
+        self.limites = (self._chaves[0] if self.limites is None else self.limites[0],
+                        self._chaves[-1])
+        self._chaves = []
+        self._registros = []
+        
+        if self._gravacao is None:
+            self._comprimir_e_gravar(dados, primeira)
+        else:
+            self._gravacao.enviar(lambda: self._comprimir_e_gravar(dados, primeira))
+    
+    def _comprimir_e_gravar(self, dados: bytes, primeira: Any):
+        self._indice.append((self._arquivo.tell(), primeira))
+        if self._codec == 1:
+            dados = zlib.compress(dados, 1)
+        elif self._codec == 2:
+            dados = lz4_frame.compress(dados)
+        self._arquivo.write(PREFIXO_BLOCO.pack(self._codec, len(dados)))
+        self._arquivo.write(dados)
+
+
+class LeitorRun:
+    """Lê sequencialmente os pares (chave, registro) de um run binário."""
+    
+    def __init__(self, caminho: str, buffering: int = -1, profundidade_assincrona: int = 0,
+                 inicio: Optional[bytes] = None, fim: Optional[bytes] = None):
+        """
+        Args:
+            caminho: Caminho do arquivo de run
+            buffering: Tamanho do buffer de leitura (-1 = padrão)
+            profundidade_assincrona: Se maior que zero, os blocos são lidos e
+                                    descomprimidos antecipadamente em uma
+                                    thread de fundo, com essa quantidade de
+                                    blocos prontos em espera
+            inicio: Se informado, lê só as chaves maiores ou iguais a ela,
+                   começando pelo bloco que pode contê-la (índice de blocos)
+            fim: Se informado, para na primeira chave maior ou igual a ela
+        """
+        self.caminho = caminho
+        self._inicio = inicio
+        self._fim = fim
+        self._profundidade = profundidade_assincrona
+        self._antecipado = None
+        self._arquivo = open(caminho, 'rb', buffering=buffering)
+        
+        if self._arquivo.read(len(ASSINATURA_RUN)) != ASSINATURA_RUN:
+            self._arquivo.close()
+            raise ValueError(f"Arquivo {caminho} não é um run válido")
+        tamanho, = PREFIXO_CABECALHO.unpack(self._arquivo.read(PREFIXO_CABECALHO.size))
+        self.cabecalho = pickle.loads(self._arquivo.read(tamanho))
+        
+        if inicio is not None:
+            primeiro_bloco = self._arquivo.tell()
+            indice = _ler_indice_run(self._arquivo)
+            if indice:
+                # Último bloco que começa antes de `inicio`: chaves iguais a
+                # ela podem estar no fim desse bloco
+                posicao = bisect.bisect_left([chave for _, chave in indice], inicio)
+                self._arquivo.seek(indice[max(posicao - 1, 0)][0])
+            else:
+                self._arquivo.seek(primeiro_bloco)
+    
+    def __iter__(self):
+        pares = self._pares()
+        if self._inicio is None and self._fim is None:
+            return pares
+        return _filtrar_intervalo(pares, self._inicio, self._fim)
+    
+    def _pares(self) -> Iterator[Tuple[Any, Any]]:
+        blocos = self._ler_blocos()
+        if self._profundidade > 0:
+            blocos = self._antecipado = _IteradorAntecipado(blocos, self._profundidade)
+        
+        for dados in blocos:
+            chaves, registros = pickle.loads(dados)
+            if isinstance(registros, str):
+                registros = [texto.split(SEPARADOR_CAMPO)
+                             for texto in registros.split(SEPARADOR_REGISTRO)]
+            yield from zip(chaves, registros)
+    
+    def _ler_blocos(self) -> Iterator[bytes]:
+        """Lê e descomprime os blocos do run, em sequência."""
+        ler = self._arquivo.read
+        while True:
+            prefixo = ler(PREFIXO_BLOCO.size)
+            if not prefixo:
+                return
+            codec, tamanho = PREFIXO_BLOCO.unpack(prefixo)
+            if codec == CODEC_INDICE:
+                return
+            dados = ler(tamanho)
+            if codec == 1:
+                dados = zlib.decompress(dados)
+            elif codec == 2:
+                dados = lz4_frame.decompress(dados)
+            yield dados
+    
+    def fechar(self):
+        if self._antecipado is not None:
+            self._antecipado.fechar()
+        self._arquivo.close()
+
+
+def _gravar_csv_indexado(escrever: Callable[[bytes], Any], pares: Iterable[Tuple[bytes, List[str]]],
+                         intervalo: int, posicao: int = 0,
+                         cabecalho: Optional[List[str]] = None) -> Tuple[List[Tuple[bytes, int]], int]:
+    """
+    Grava pares em CSV (UTF-8) em lotes de `intervalo` registros, anotando a
+    chave e a posição em bytes do primeiro registro de cada lote.
+    
+    Args:
+        escrever: Função que grava os bytes de cada lote
+        pares: Pares (chave, registro) na ordem de gravação
+        intervalo: Registros por lote
+        posicao: Posição em bytes em que a gravação começa
+        cabecalho: Cabeçalho gravado antes dos registros (opcional)
+        
+    Returns:
+        Tupla (lista de (chave, posição) de cada lote, posição final)
+    """
+    entradas = []
+    bloco = io.StringIO()
+    writer = csv.writer(bloco)
+    if cabecalho is not None:
+        writer.writerow(cabecalho)
+        dados = bloco.getvalue().encode('utf-8')
+        escrever(dados)
+        posicao += len(dados)
+    pares = iter(pares)
+    while True:
+        lote = list(itertools.islice(pares, intervalo))
+        if not lote:
+            return entradas, posicao
+        bloco.seek(0)
+        bloco.truncate()
+        writer.writerows([linha for _, linha in lote])
+        dados = bloco.getvalue().encode('utf-8')
+        escrever(dados)
+        entradas.append((lote[0][0], posicao))
+        posicao += len(dados)
+
+
+def _ler_indice_run(arquivo) -> Optional[List[Tuple[int, Any]]]:
+    """
+    Lê o índice de blocos gravado ao final de um run por `EscritorRun`.
+    
+    Args:
+        arquivo: Run aberto em modo binário (a posição de leitura é alterada)
+        
+    Returns:
+        Lista de (posição, primeira chave) de cada bloco, ou None se o run
+        não tiver índice
+    """
+    fim = arquivo.seek(0, os.SEEK_END)
+    if fim < PREFIXO_BLOCO.size + SUFIXO_INDICE.size:
+        return None
+    arquivo.seek(fim - SUFIXO_INDICE.size)
+    tamanho, = SUFIXO_INDICE.unpack(arquivo.read(SUFIXO_INDICE.size))
+    posicao = fim - SUFIXO_INDICE.size - tamanho - PREFIXO_BLOCO.size
+    if posicao < len(ASSINATURA_RUN):
+        return None
+    arquivo.seek(posicao)
+    if PREFIXO_BLOCO.unpack(arquivo.read(PREFIXO_BLOCO.size)) != (CODEC_INDICE, tamanho):
+        return None
+    return pickle.loads(arquivo.read(tamanho))
+
+
+def _filtrar_intervalo(pares: Iterator[Tuple[bytes, Any]], inicio: Optional[bytes],
+                       fim: Optional[bytes]) -> Iterator[Tuple[bytes, Any]]:
+    """Restringe pares em ordem de chave à faixa [inicio, fim)."""
+    if inicio is not None:
+        pares = itertools.dropwhile(lambda par: par[0] < inicio, pares)
+    if fim is not None:
+        pares = itertools.takewhile(lambda par: par[0] < fim, pares)
+    return pares
+
+
+class _LeitorRunCsv:
+    """
+    Lê como run um CSV já ordenado (o da passagem direta ou uma entrada de
+    `mesclar_arquivos`), produzindo os pares (chave, registro) com o
+    extrator da ordenação.
+    """
+    
+    def __init__(self, caminho: str, extrator: ExtratorChave, buffering: int = -1,
+                 cabecalho: Optional[List[str]] = None, verificar: bool = False,
+                 contagens: Optional[Dict[str, int]] = None,
+                 inicio: Optional[bytes] = None, fim: Optional[bytes] = None):
+        """
+        Args:
+            caminho: Caminho do CSV
+            extrator: Extrator da chave de ordenação
+            buffering: Tamanho do buffer de leitura (-1 = padrão)
+            cabecalho: Cabeçalho de destino; se o do arquivo for diferente,
+                      os campos são reordenados por nome e as colunas
+                      ausentes ficam vazias
+            verificar: Se True, falha com ValueError se uma chave vier antes
+                      da anterior (arquivo fora de ordem); registros com
+                      campos insuficientes para a chave são ignorados
+            contagens: Dicionário em que o número de registros lidos é
+                      gravado (por caminho) quando o arquivo termina
+            inicio: Se informado, produz só as chaves maiores ou iguais a ela
+            fim: Se informado, para na primeira chave maior ou igual a ela
+        """
+        self.caminho = caminho
+        self._extrator = extrator
+        self._inicio = inicio
+        self._fim = fim
+        self._verificar = verificar
+        self._contagens = contagens
+        self._arquivo = open(caminho, 'r', encoding='utf-8', newline='', buffering=buffering)
+        self._reader = csv.reader(self._arquivo)
+        self.cabecalho = next(self._reader, [])
+        self._indices = None
+        if cabecalho is not None and cabecalho != self.cabecalho:
+            self._indices = [self.cabecalho.index(coluna) if coluna in self.cabecalho else None
+                             for coluna in cabecalho]
+            self.cabecalho = cabecalho
+    
+    def __iter__(self):
+        pares = self._pares()
+        if self._inicio is None and self._fim is None:
+            return pares
+        return _filtrar_intervalo(pares, self._inicio, self._fim)
+    
+    def _pares(self) -> Iterator[Tuple[bytes, List[str]]]:
+        extrator = self._extrator
+        if not self._verificar and self._indices is None and self._contagens is None:
+            for linha in self._reader:
+                yield extrator(linha), linha
+            return
+        
+        indices = self._indices
+        indice_maximo = extrator.indice_maximo
+        anterior = None
+        registros = 0
+        for linha in self._reader:
+            if indices is not None:
+                linha = [linha[i] if i is not None and i < len(linha) else '' for i in indices]
+            if len(linha) <= indice_maximo:
+                continue
+            chave = extrator(linha)
+            if self._verificar:
+                if anterior is not None and chave < anterior:
+                    raise ValueError(f"Arquivo {self.caminho} não está ordenado pela chave "
+                                     f"(registro na linha {self._reader.line_num})")
+                anterior = chave
+            registros += 1
+            yield chave, linha
+        if self._contagens is not None:
+            self._contagens[self.caminho] = registros
+    
+    def fechar(self):
+        self._arquivo.close()
+
+
+class _LeitorEncadeado:
+    """
+    Lê em sequência uma cadeia de runs em que cada um começa em uma chave
+    não menor que a última do anterior; no merge a cadeia é uma única
+    entrada. Cada run só é aberto quando o anterior termina.
+    """
+    
+    def __init__(self, runs: List[str], abrir: Callable[[str], Any],
+                 ao_concluir: Optional[Callable[[str], Any]] = None):
+        """
+        Args:
+            runs: Caminhos dos runs da cadeia, em ordem
+            abrir: Função que abre o leitor de um run
+            ao_concluir: Chamada com cada run que terminou de ser lido,
+                        exceto o último (por exemplo, para removê-lo)
+        """
+        self._runs = runs
+        self._abrir = abrir
+        self._ao_concluir = ao_concluir
+        self._atual = abrir(runs[0])
+        self.cabecalho = self._atual.cabecalho
+    
+    def __iter__(self):
+        yield from self._atual
+        for anterior, run in zip(self._runs, self._runs[1:]):
+            self._atual.fechar()
+            if self._ao_concluir is not None:
+                self._ao_concluir(anterior)
+            self._atual = self._abrir(run)
+            yield from self._atual
+    
+    def fechar(self):
+        self._atual.fechar()
+
+
+class _PassagemDireta:
+    """
+    Grava em CSV, sem ordenar, os buffers de uma entrada que continua em ordem.
+    
+    Cada buffer é aceito se suas chaves estão em ordem e a primeira não é
+    menor que a última já gravada. O arquivo tem o formato da saída final:
+    se a entrada terminar ainda em ordem ele é a própria saída, senão é o
+    primeiro run da ordenação. O arquivo só é criado no primeiro buffer aceito.
+    Com `intervalo`, anota em `indice` a chave e a posição de um registro a
+    cada `intervalo` (o índice esparso da saída, se o arquivo virar a saída).
+    """
+    
+    def __init__(self, caminho: str, cabecalho: List[str], intervalo: Optional[int] = None):
+        self.caminho = caminho
+        self.registros = 0
+        self.comparacoes = 0
+        self.limites = None  # (primeira chave, última chave) gravadas
+        self.indice = []  # (chave, posição) a cada `intervalo` registros
+        self.inicio = time.perf_counter()
+        self._cabecalho = cabecalho
+        self._intervalo = intervalo
+        self._arquivo = None
+        self._posicao = 0
+    
+    def acrescentar(self, chaves: List[bytes], buffer: List[List[str]]) -> bool:
+        """
+        Grava o buffer se ele continua a ordem da entrada.
+        
+        Args:
+            chaves: Chaves codificadas dos registros do buffer
+            buffer: Registros do buffer
+            
+        Returns:
+            True se o buffer foi gravado; False se a entrada saiu de ordem
+        """
+        if self.limites is not None and chaves[0] < self.limites[1]:
+            return False
+        if not all(map(operator.le, chaves, itertools.islice(chaves, 1, None))):
+            return False
+        
+        cabecalho = None
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, 'wb')
+            cabecalho = self._cabecalho
+        entradas, self._posicao = _gravar_csv_indexado(
+            self._arquivo.write, zip(chaves, buffer), self._intervalo or REGISTROS_POR_BLOCO,
+            self._posicao, cabecalho)
+        if self._intervalo is not None:
+            self.indice.extend(entradas)
+        self.registros += len(buffer)
+        self.comparacoes += len(chaves)
+        self.limites = (chaves[0] if self.limites is None else self.limites[0], chaves[-1])
+        return True
+    
+    def fechar(self) -> int:
+        """
+        Fecha o arquivo.
+        
+        Returns:
+            Tamanho do arquivo em bytes (0 se nenhum buffer foi aceito)
+        """
+        if self._arquivo is None:
+            return 0
+        self._arquivo.close()
+        return os.path.getsize(self.caminho)
+
+
+def _abrir_comprimido(caminho: str, modo: str, compressao: Optional[str]):
+    """
+    Abre um arquivo binário, (des)comprimindo em fluxo.
+    
+    Args:
+        caminho: Caminho do arquivo
+        modo: 'rb' ou 'wb'
+        compressao: None, 'gzip', 'bz2', 'xz' ou 'zstd'
+        
+    Returns:
+        Arquivo binário aberto
+    """
+    if compressao is None:
+        return open(caminho, modo, buffering=TAMANHO_BLOCO_CSV)
+    if compressao == 'gzip':
+        # Nível 6: bem mais rápido que o padrão (9) com tamanho quase igual
+        return gzip.open(caminho, modo, compresslevel=6)
+    if compressao == 'bz2':
+        return bz2.open(caminho, modo)
+    if compressao == 'xz':
+        return lzma.open(caminho, modo)
+    arquivo = open(caminho, modo)
+    if modo == 'rb':
+        # Um arquivo zstd pode ter vários frames (partes concatenadas)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(
+            arquivo, read_across_frames=True), TAMANHO_BLOCO_CSV)
+    return io.BufferedWriter(zstandard.ZstdCompressor().stream_writer(arquivo),
+                             TAMANHO_BLOCO_CSV)
+
+
+class Formato:
+    """
+    Formato dos arquivos de entrada e de saída de `ordenar_arquivo`.
+    
+    Na ordenação os registros são listas de strings com o cabeçalho à
+    frente, como no CSV. Um formato converte o arquivo nessa sequência
+    (`ler`) e grava a sequência ordenada (`gravar`), sempre sobre um
+    arquivo binário já aberto com a compressão do formato (veja `abrir`).
+    Outros formatos podem ser criados como subclasses.
+    
+    Attributes:
+        nome: Nome do formato (usado em `descricao` e nas estatísticas)
+        extensao: Extensão dos arquivos do formato, sem a da compressão
+        compressao: None, 'gzip', 'bz2', 'xz' ou 'zstd'
+    """
+    nome = ''
+    extensao = ''
+    
+    def __init__(self, compressao: Optional[str] = None):
+        if compressao is not None and compressao not in COMPRESSOES_ARQUIVO.values():
+            raise ValueError(f"Compressão '{compressao}' não suportada. Use None ou um de: "
+                             f"{', '.join(COMPRESSOES_ARQUIVO.values())}")
+        if compressao == 'zstd' and zstandard is None:
+            raise ValueError("Compressão 'zstd' requer o pacote zstandard "
+                             "(pip install zstandard)")
+        self.compressao = compressao
+    
+    @property
+    def descricao(self) -> str:
+        """Nome do formato com a compressão, por exemplo 'jsonl+gzip'."""
+        return self.nome if self.compressao is None else f"{self.nome}+{self.compressao}"
+    
+    def abrir(self, caminho: str, modo: str = 'rb'):
+        """Abre o arquivo em modo binário com a compressão do formato."""
+        return _abrir_comprimido(caminho, modo, self.compressao)
+    
+    def ler(self, arquivo) -> Iterator[List[str]]:
+        """
+        Lê os registros de um arquivo binário aberto.
+        
+        Yields:
+            Cabeçalho e, em seguida, os registros
+        """
+        raise NotImplementedError
+    
+    def gravar(self, arquivo, cabecalho: List[str], registros: Iterable[List[str]],
+               gravar_cabecalho: bool = True):
+        """
+        Grava registros em um arquivo binário aberto.
+        
+        Args:
+            arquivo: Arquivo de destino
+            cabecalho: Cabeçalho dos registros
+            registros: Registros a gravar
+            gravar_cabecalho: False ao gravar a continuação de uma saída,
+                             como as faixas do merge particionado
+        """
+        raise NotImplementedError
+
+
+class FormatoCsv(Formato):
+    """CSV em UTF-8 com cabeçalho, opcionalmente comprimido."""
+    nome = 'csv'
+    extensao = '.csv'
+    
+    def ler(self, arquivo) -> Iterator[List[str]]:
+        yield from csv.reader(io.TextIOWrapper(arquivo, encoding='utf-8', newline=''))
+    
+    def gravar(self, arquivo, cabecalho: List[str], registros: Iterable[List[str]],
+               gravar_cabecalho: bool = True):
+        texto = io.TextIOWrapper(arquivo, encoding='utf-8', newline='')
+        writer = csv.writer(texto)
+        if gravar_cabecalho:
+            writer.writerow(cabecalho)
+        writer.writerows(registros)
+        texto.flush()
+        texto.detach()
+
+
+class FormatoJsonl(Formato):
+    """
+    Um objeto JSON por linha (JSON Lines), opcionalmente comprimido.
+    
+    O cabeçalho são as chaves do primeiro objeto; nos demais, chaves
+    ausentes ficam vazias e chaves fora do cabeçalho são um erro. Um
+    arquivo sem objetos tem cabeçalho vazio e nenhum registro. Textos
+    viram campos como estão, null vira campo vazio e os demais valores
+    (números, booleanos, listas e objetos) viram o seu JSON, então chaves
+    numéricas são detectadas e ordenadas como números. Na gravação, as
+    colunas que tinham valores que não eram texto na leitura com este
+    mesmo formato voltam a ser gravadas como JSON (campo vazio como null);
+    as demais são gravadas como texto.
+    """
+    nome = 'jsonl'
+    extensao = '.jsonl'
+    
+    def __init__(self, compressao: Optional[str] = None):
+        super().__init__(compressao)
+        self.colunas_json = set()  # Colunas com valores que não eram texto
+    
+    def ler(self, arquivo) -> Iterator[List[str]]:
+        cabecalho = None
+        chaves = set()
+        for numero, linha in enumerate(arquivo, 1):
+            if not linha.strip():
+                continue
+            objeto = json.loads(linha)
+            if not isinstance(objeto, dict):
+                raise ValueError(f"Linha {numero} do JSONL não é um objeto")
+            if cabecalho is None:
+                cabecalho = list(objeto)
+                chaves = set(cabecalho)
+                yield cabecalho
+            elif not objeto.keys() <= chaves:
+                extras = [chave for chave in objeto if chave not in cabecalho]
+                raise ValueError(f"Linha {numero} do JSONL tem campos fora do cabeçalho: {extras}")
+            registro = []
+            for coluna in cabecalho:
+                valor = objeto.get(coluna)
+                if isinstance(valor, str):
+                    registro.append(valor)
+                elif valor is None:
+                    registro.append('')
+                else:
+                    self.colunas_json.add(coluna)
+                    registro.append(json.dumps(valor, ensure_ascii=False))
+            yield registro
+        if cabecalho is None:
+            yield []
+    
+    def gravar(self, arquivo, cabecalho: List[str], registros: Iterable[List[str]],
+               gravar_cabecalho: bool = True):
+        literais = [coluna in self.colunas_json for coluna in cabecalho]
+        
+        def valor(texto: str, literal: bool):
+            if not literal:
+                return texto
+            if not texto:
+                return None
+            try:
+                return json.loads(texto)
+            except ValueError:
+                return texto
+        
+        codificar = json.JSONEncoder(ensure_ascii=False).encode
+        bloco = []
+        for registro in registros:
+            bloco.append(codificar({coluna: valor(texto, literal) for coluna, texto, literal
+                                    in zip(cabecalho, registro, literais)}))
+            if len(bloco) >= REGISTROS_POR_BLOCO:
+                arquivo.write(('\n'.join(bloco) + '\n').encode('utf-8'))
+                bloco = []
+        if bloco:
+            arquivo.write(('\n'.join(bloco) + '\n').encode('utf-8'))
+
+
+class FormatoBinario(Formato):
+    """
+    Registros binários de largura fixa, sem cabeçalho no arquivo.
+    
+    O layout é uma lista de campos (nome, código do `struct`), por exemplo
+    [('id', 'q'), ('valor', 'd'), ('nome', '20s')], em little-endian e sem
+    alinhamento. Inteiros e números de ponto flutuante viram o seu texto
+    ('1.5'); campos de bytes ('Ns') são UTF-8 completado com bytes nulos,
+    que são removidos na leitura. Na gravação um texto maior que o campo é
+    um erro.
+    """
+    nome = 'binario'
+    extensao = '.bin'
+    
+    def __init__(self, campos: List[Tuple[str, str]], compressao: Optional[str] = None):
+        """
+        Args:
+            campos: Lista de (nome, código do struct) na ordem do registro
+            compressao: None, 'gzip', 'bz2', 'xz' ou 'zstd'
+        """
+        super().__init__(compressao)
+        if not campos:
+            raise ValueError("Informe pelo menos um campo no layout binário")
+        self.campos = [tuple(campo) for campo in campos]
+        self._struct = struct.Struct('<' + ''.join(codigo for _, codigo in self.campos))
+        self._tipos = []
+        for nome, codigo in self.campos:
+            tipo = codigo.lstrip('0123456789')
+            if tipo == 's':
+                self._tipos.append((bytes, struct.calcsize(codigo)))
+            elif tipo in 'efd':
+                self._tipos.append((float, None))
+            elif tipo in 'bBhHiIlLqQ':
+                self._tipos.append((int, None))
+            else:
+                raise ValueError(f"Código '{codigo}' do campo '{nome}' não suportado no "
+                                 f"layout binário")
+    
+    def __getstate__(self):
+        # struct.Struct não é serializável (merge particionado em processos)
+        estado = self.__dict__.copy()
+        del estado['_struct']
+        return estado
+    
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._struct = struct.Struct('<' + ''.join(codigo for _, codigo in self.campos))
+    
+    def ler(self, arquivo) -> Iterator[List[str]]:
+        yield [nome for nome, _ in self.campos]
+        tamanho = self._struct.size
+        por_leitura = max(1, TAMANHO_BLOCO_CSV // tamanho) * tamanho
+        tipos = [tipo for tipo, _ in self._tipos]
+        while True:
+            bloco = arquivo.read(por_leitura)
+            # Leituras comprimidas podem devolver menos bytes que o pedido
+            while bloco and len(bloco) % tamanho:
+                resto = arquivo.read(tamanho - len(bloco) % tamanho)
+                if not resto:
+                    raise ValueError(f"Arquivo binário termina no meio de um registro "
+                                     f"({len(bloco) % tamanho} de {tamanho} bytes)")
+                bloco += resto
+            if not bloco:
+                return
+            for valores in self._struct.iter_unpack(bloco):
+                yield [valor.rstrip(b'\0').decode('utf-8') if tipo is bytes else str(valor)
+                       for valor, tipo in zip(valores, tipos)]
+    
+    def gravar(self, arquivo, cabecalho: List[str], registros: Iterable[List[str]],
+               gravar_cabecalho: bool = True):
+        # Cabeçalho vazio só vem de uma entrada sem registros (JSONL vazio)
+        if cabecalho and list(cabecalho) != [nome for nome, _ in self.campos]:
+            raise ValueError(f"Cabeçalho {cabecalho} não corresponde ao layout binário "
+                             f"{[nome for nome, _ in self.campos]}")
+        empacotar = self._struct.pack
+        campos = list(zip(self.campos, self._tipos))
+        bloco = bytearray()
+        for registro in registros:
+            valores = []
+            for texto, ((nome, _), (tipo, largura)) in zip(registro, campos):
+                if tipo is bytes:
+                    valor = texto.encode('utf-8')
+                    if len(valor) > largura:
+                        raise ValueError(f"Campo '{nome}' com {len(valor)} bytes não cabe em "
+                                         f"{largura} bytes: {texto!r}")
+                else:
+                    valor = tipo(texto)
+                valores.append(valor)
+            try:
+                bloco += empacotar(*valores)
+            except struct.error as erro:
+                raise ValueError(f"Registro {registro} não cabe no layout binário: {erro}")
+            if len(bloco) >= TAMANHO_BLOCO_CSV:
+                arquivo.write(bloco)
+                bloco = bytearray()
+        arquivo.write(bloco)
+
+
+FORMATOS = {'csv': FormatoCsv, 'jsonl': FormatoJsonl}
+
+
+def resolver_formato(formato: Union[None, str, Formato] = None,
+                     caminho: Optional[str] = None,
+                     padrao: Optional[Formato] = None) -> Formato:
+    """
+    Converte a especificação de formato aceita por `ordenar_arquivo` em um `Formato`.
+    
+    Args:
+        formato: Instância de `Formato`, nome ('csv', 'jsonl') com a
+                compressão opcional como extensão ('csv.gz', 'jsonl.zst'),
+                ou None para usar a extensão de `caminho`
+        caminho: Arquivo do qual o formato é deduzido quando omitido
+        padrao: Formato usado quando a extensão de `caminho` não é
+               reconhecida (padrão: CSV sem compressão)
+        
+    Returns:
+        Formato resolvido
+    """
+    if isinstance(formato, Formato):
+        return formato
+    if formato is not None:
+        nome, _, extensao = formato.partition('.')
+        if nome not in FORMATOS:
+            raise ValueError(f"Formato '{formato}' não suportado. Use um de: "
+                             f"{', '.join(FORMATOS)} (com .gz, .bz2, .xz ou .zst), "
+                             f"ou uma instância de Formato")
+        compressao = None
+        if extensao:
+            compressao = COMPRESSOES_ARQUIVO.get('.' + extensao)
+            if compressao is None:
+                raise ValueError(f"Compressão '.{extensao}' não suportada")
+        return FORMATOS[nome](compressao)
+    
+    raiz, extensao = os.path.splitext(caminho or '')
+    compressao = COMPRESSOES_ARQUIVO.get(extensao.lower())
+    if compressao is not None:
+        raiz, extensao = os.path.splitext(raiz)
+    nome = EXTENSOES_FORMATO.get(extensao.lower())
+    if nome is None:
+        if padrao is not None and compressao is None:
+            return padrao
+        nome = 'csv'
+    return FORMATOS[nome](compressao)
+
+
+def _formato_especial(formato: Optional[Formato]) -> Optional[Formato]:
+    """O formato, ou None se for CSV sem compressão (lido e gravado diretamente)."""
+    if formato is None or (type(formato) is FormatoCsv and formato.compressao is None):
+        return None
+    return formato
+
+
+class Evento(NamedTuple):
+    """
+    Evento de instrumentação emitido por `OrdenacaoExterna`.
+    
+    Os eventos são emitidos nas fronteiras de fase, de run e de merge, nunca
+    por registro. Nomes e principais dados:
+    
+    - 'inicio': entrada
+    - 'cabecalho': cabecalho, indices
+    - 'tipo_detectado': tipo
+    - 'run_gravado': run, registros, bytes, segundos, comparacoes, disco_temporario
+    - 'merge_concluido': runs, registros, bytes_lidos, bytes_escritos,
+      segundos, comparacoes, disco_temporario (e faixas, bytes_faixas no
+      merge particionado)
+    - 'passada_concluida': passada, runs_restantes
+    - 'fase_concluida': fase ('runs' ou 'merge'), segundos, registros,
+      bytes_lidos, bytes_escritos, comparacoes
+    - 'concluido': saida, segundos
+    - 'indice_gravado': indice, entradas
+    - 'cota_disco': fan_in, livre, segmento (fan-in reduzido pela cota de disco)
+    - 'limpeza': diretorio
+    - 'retomada': fase, runs, posicao, passes (ordenação retomada de um manifesto)
+    - 'manifesto_descartado': diretorio
+    
+    As comparações do merge sort em memória são exatas; as dos heaps
+    (merge k-way e seleção por substituição) são estimadas em
+    registros * ceil(log2(k)) e as da ordenação vetorizada em
+    n * ceil(log2(n)).
+    """
+    nome: str
+    instante: float  # time.perf_counter() no momento da emissão
+    dados: Dict[str, Any]
+
+
+class OrdenacaoExterna:
+    """
+    Classe para implementar ordenação externa usando Merge-Sort
+    para arquivos CSV grandes que não cabem na memória RAM.
+    """
+    
+    def __init__(self, tamanho_buffer: int = 1000, fan_in: int = 64,
+                 workers: int = 1, estrategia_runs: str = 'buffer',
+                 memoria_max: Optional[Union[int, str]] = None,
+                 compressao_runs: Optional[str] = None,
+                 io_assincrono: bool = False, blocos_antecipados: int = 2,
+                 tamanho_bloco_io: Optional[Union[int, str]] = None,
+                 mapear_entrada: bool = False,
+                 ordenacao_vetorizada: Optional[bool] = None,
+                 particoes_merge: int = 1,
+                 diretorios_temp: Optional[List[str]] = None,
+                 cota_disco: Optional[Union[int, str]] = None,
+                 silencioso: bool = False,
+                 ao_evento: Optional[Callable[[Evento], None]] = None):
+        """
+        Inicializa a classe de ordenação externa.
+        
+        Args:
+            tamanho_buffer: Número máximo de registros que podem ser carregados
+                          na memória por vez (simula o limite de RAM)
+            fan_in: Número máximo de runs mesclados simultaneamente em cada
+                   passada do merge externo (mínimo 2)
+            workers: Número de processos que ordenam e gravam runs em paralelo
+                    durante a divisão em runs (1 = sem paralelismo). Cada
+                    processo mantém um buffer, então o pico de memória é de
+                    até `workers + 1` buffers.
+            estrategia_runs: 'buffer' ordena blocos de `tamanho_buffer`
+                            registros; 'selecao_substituicao' usa um heap de
+                            torneio que gera runs de ~2x o buffer em dados
+                            aleatórios e um único run em dados quase ordenados
+            memoria_max: Orçamento de memória em bytes ou com unidade
+                        ('512MB', '2GiB'). Quando informado, substitui
+                        `tamanho_buffer`: os runs são gravados quando a
+                        memória estimada dos registros carregados atinge o
+                        limite, e no merge o orçamento é dividido entre os
+                        buffers de leitura dos runs e o de escrita.
+            compressao_runs: Compressão por bloco dos runs intermediários
+                            (None, 'zlib' ou 'lz4'; LZ4 requer o pacote lz4)
+            io_assincrono: Se True, no merge cada run é lido antecipadamente
+                          por uma thread de fundo e a saída é gravada por
+                          outra thread, sobrepondo CPU e disco
+            blocos_antecipados: Blocos mantidos em espera por arquivo no modo
+                               assíncrono (2 = buffer duplo)
+            tamanho_bloco_io: Tamanho dos buffers de leitura/escrita de cada
+                             arquivo no merge e dos blocos de CSV entregues à
+                             thread de escrita (ex.: '1MiB'). Com `memoria_max`
+                             o tamanho é derivado do orçamento.
+            mapear_entrada: Se True, `ordenar_arquivo` mapeia a entrada em
+                           memória (mmap) e guarda nos runs apenas a chave,
+                           a posição e o tamanho de cada registro; a saída é
+                           gravada copiando os bytes originais dos registros
+                           na ordem final. Em registros largos evita criar
+                           os campos como objetos Python. Não é compatível
+                           com `unicos`/`agregacoes` nem com a seleção por
+                           substituição.
+            ordenacao_vetorizada: Ordena cada run com `argsort` estável do
+                                 NumPy sobre as chaves codificadas quando
+                                 todas têm até `LARGURA_MAXIMA_VETORIZADA`
+                                 bytes (chaves numéricas, datas e
+                                 compostas curtas). None usa o NumPy se
+                                 estiver instalado; True exige o NumPy;
+                                 False usa sempre o merge sort interno.
+            particoes_merge: Número de faixas de chave do merge final, cada
+                            uma mesclada por um processo (1 = merge
+                            sequencial). Os separadores das faixas são
+                            amostrados dos índices de blocos dos runs e as
+                            partes são concatenadas na saída.
+            diretorios_temp: Diretórios onde os arquivos temporários são
+                            gravados (padrão: o diretório temporário do
+                            sistema). Cada ordenação cria um subdiretório em
+                            cada um e distribui os runs entre eles em rodízio,
+                            para somar a banda de vários discos no merge.
+            cota_disco: Limite de bytes em arquivos temporários (ex.: '50GiB').
+                       Os runs consumidos por um merge são removidos assim
+                       que terminam de ser lidos, os merges intermediários
+                       gravam a saída em segmentos do tamanho do maior run
+                       (removidos da mesma forma no merge seguinte) e o
+                       fan-in é reduzido para que cada merge caiba no espaço
+                       livre. A cota é conferida a cada arquivo gravado e,
+                       se excedida, a ordenação é interrompida com ValueError.
+            silencioso: Se True, não imprime mensagens de progresso
+            ao_evento: Função chamada com cada `Evento` de instrumentação
+                      (tempos por fase, por run e por merge, registros e
+                      bytes lidos/gravados, comparações, passadas e uso de
+                      disco temporário). Os totais também ficam em
+                      `estatisticas`.
+        """
+        if fan_in < 2:
+            raise ValueError("fan_in deve ser no mínimo 2")
+        if workers < 1:
+            raise ValueError("workers deve ser no mínimo 1")
+        if estrategia_runs not in ESTRATEGIAS_RUNS:
+            raise ValueError(f"Estratégia de runs '{estrategia_runs}' não suportada. "
+                             f"Use um de: {', '.join(ESTRATEGIAS_RUNS)}")
+        if estrategia_runs == 'selecao_substituicao' and workers > 1:
+            raise ValueError("A seleção por substituição não suporta workers > 1")
+        if estrategia_runs == 'selecao_substituicao' and mapear_entrada:
+            raise ValueError("A seleção por substituição não suporta mapear_entrada")
+        if compressao_runs not in CODECS_COMPRESSAO:
+            raise ValueError(f"Compressão '{compressao_runs}' não suportada. "
+                             f"Use None, 'zlib' ou 'lz4'")
+        if compressao_runs == 'lz4' and lz4_frame is None:
+            raise ValueError("Compressão 'lz4' requer o pacote lz4 (pip install lz4)")
+        if ordenacao_vetorizada and np is None:
+            raise ValueError("ordenacao_vetorizada requer o pacote numpy (pip install numpy)")
+        if blocos_antecipados < 1:
+            raise ValueError("blocos_antecipados deve ser no mínimo 1")
+        if particoes_merge < 1:
+            raise ValueError("particoes_merge deve ser no mínimo 1")
+        if diretorios_temp is not None and not diretorios_temp:
+            raise ValueError("Informe pelo menos um diretório em diretorios_temp")
+        
+        self.tamanho_buffer = tamanho_buffer
+        self.fan_in = fan_in
+        self.workers = workers
+        self.estrategia_runs = estrategia_runs
+        self.compressao_runs = compressao_runs
+        self.io_assincrono = io_assincrono
+        self.blocos_antecipados = blocos_antecipados
+        self.mapear_entrada = mapear_entrada
+        self.particoes_merge = particoes_merge
+        self.diretorios_temp = None if diretorios_temp is None else list(diretorios_temp)
+        self.ordenacao_vetorizada = (np is not None if ordenacao_vetorizada is None
+                                     else ordenacao_vetorizada)
+        self.silencioso = silencioso
+        self.ao_evento = ao_evento
+        self.tamanho_bloco_io = (None if tamanho_bloco_io is None
+                                 else converter_tamanho_memoria(tamanho_bloco_io))
+        self.memoria_max = None if memoria_max is None else converter_tamanho_memoria(memoria_max)
+        if self.memoria_max is not None and self.memoria_max <= 0:
+            raise ValueError("memoria_max deve ser positivo")
+        self.cota_disco = None if cota_disco is None else converter_tamanho_memoria(cota_disco)
+        if self.cota_disco is not None and self.cota_disco <= 0:
+            raise ValueError("cota_disco deve ser positiva")
+        self.arquivos_temporarios = []
+        self.diretorio_temp = None
+        self.diretorios_spill = []
+        self.coluna_chave_atual = None
+        self.limite_atual = None
+        self.intervalo_indice_atual = None
+        self.reducao_atual = None
+        self.manifesto = None
+        self.extrator_chave = None
+        self.estatisticas = {}
+        self._registros_runs = {}
+        self._limites_runs = {}
+        self._runs_retomados = []
+        self._posicao_entrada = None
+        self._posicoes_runs = {}
+        self._entrada_intervalos = None
+        self._varredura = None
+        self._arquivo_mapeado = None
+        self._entradas_csv = {}
+        self._indice_saida = None
+        self._indices_csv = {}
+        self._tamanhos_temporarios = {}
+        self._uso_disco = {'atual': 0, 'pico': 0}
+        self._proximo_spill = 0
+        self._proximo_merge = 0
+        self._registros_segmento = None
+        self.formato_entrada_atual = None
+        self.formato_saida_atual = None
+    
+    def ordenar_arquivo(self, nome_arquivo: str, coluna_chave, 
+                       ordem: str = 'asc', arquivo_saida: str = None,
+                       tipo_chave: Optional[str] = None,
+                       limite: Optional[int] = None,
+                       unicos: Optional[str] = None,
+                       agregacoes: Optional[list] = None,
+                       diretorio_trabalho: Optional[str] = None,
+                       intervalo_indice: Optional[int] = None,
+                       formato_entrada: Union[None, str, Formato] = None,
+                       formato_saida: Union[None, str, Formato] = None) -> str:
+        """
+        Ordena um arquivo CSV usando ordenação externa.
+        
+        Args:
+            nome_arquivo: Caminho para o arquivo CSV de entrada
+            coluna_chave: Nome da coluna ou índice (0-based) da chave de ordenação,
+                         ou uma lista de colunas para uma chave composta, por
+                         exemplo [('conta', 'asc'), ('data', 'desc', 'date'),
+                         ('nome', 'asc', 'str', 'sem_caso')] (veja `ColunaChave`)
+            ordem: 'asc' para ascendente ou 'desc' para descendente (padrão
+                  das colunas que não definem a própria ordem)
+            arquivo_saida: Nome do arquivo de saída (opcional)
+            tipo_chave: Tipo da coluna chave ('int', 'float', 'decimal', 'date'
+                       ou 'str'). Se omitido, é detectado por amostragem; valores
+                       posteriores que não convertem para o tipo vêm depois dos
+                       convertidos, como texto (em colunas 'int', números com
+                       fração continuam na ordem numérica).
+            limite: Se informado, grava apenas os `limite` primeiros registros
+                   da ordenação (top-K). Quando cabem na memória, são
+                   selecionados com um heap limitado em uma única leitura;
+                   senão cada run é truncado em `limite` registros e o merge
+                   para assim que eles são produzidos.
+            unicos: 'chave' mantém só o primeiro registro de cada chave;
+                   'registro' remove registros idênticos (registros de mesma
+                   chave ficam ordenados pelo texto dos campos)
+            agregacoes: Agrega os registros de cada chave; a saída tem as
+                       colunas da chave seguidas de uma coluna por agregação,
+                       por exemplo ['contagem', ('salario', 'soma'),
+                       ('idade', 'maximo')] (veja `ReducaoRegistros`)
+            diretorio_trabalho: Diretório persistente para os arquivos
+                               temporários (ordenação retomável). Um
+                               manifesto registra os runs concluídos com a
+                               posição da entrada em que terminam e cada
+                               passada de merge; se o processo for
+                               interrompido, chamar `ordenar_arquivo` de novo
+                               com os mesmos argumentos retoma do último run
+                               ou passada concluídos. O diretório só é
+                               removido quando a ordenação termina.
+            intervalo_indice: Se informado, grava ao lado da saída um índice
+                             esparso (`<saida>.idx`) com a chave e a posição
+                             em bytes de um registro a cada
+                             `intervalo_indice`, anotadas durante a gravação
+                             da saída; veja `ArquivoIndexado`.
+            formato_entrada: Formato da entrada: 'csv' ou 'jsonl', com a
+                            compressão como extensão ('csv.gz', 'jsonl.zst'),
+                            ou uma instância de `Formato` (por exemplo
+                            `FormatoBinario`). Se omitido, é deduzido da
+                            extensão do arquivo ('.jsonl.gz', '.csv.bz2'...),
+                            com CSV como padrão. A descompressão é feita em
+                            fluxo, sem arquivo intermediário.
+            formato_saida: Formato da saída (como `formato_entrada`). Se
+                          omitido, é deduzido da extensão de `arquivo_saida`
+                          ou, sem ela, é o mesmo da entrada.
+            
+        Returns:
+            Caminho do arquivo ordenado
+        """
+        colunas = normalizar_colunas_chave(coluna_chave, ordem, tipo_chave)
+        if self.mapear_entrada and (unicos is not None or agregacoes):
+            raise ValueError("mapear_entrada não suporta unicos nem agregacoes")
+        formato_entrada = resolver_formato(formato_entrada, nome_arquivo)
+        formato_saida = (formato_entrada if formato_saida is None and arquivo_saida is None
+                         else resolver_formato(formato_saida, arquivo_saida, formato_entrada))
+        if _formato_especial(formato_entrada) is not None:
+            if self.mapear_entrada or diretorio_trabalho is not None:
+                raise ValueError(f"A entrada em {formato_entrada.descricao} não suporta "
+                                 f"mapear_entrada nem diretorio_trabalho")
+        if _formato_especial(formato_saida) is not None:
+            if self.mapear_entrada or intervalo_indice is not None:
+                raise ValueError(f"A saída em {formato_saida.descricao} não suporta "
+                                 f"mapear_entrada nem intervalo_indice")
+        if isinstance(formato_entrada, FormatoJsonl) and isinstance(formato_saida, FormatoJsonl):
+            # As colunas com valores JSON descobertas na leitura valem na gravação
+            formato_saida.colunas_json = formato_entrada.colunas_json
+        
+        self._preparar_ordenacao(coluna_chave, limite, unicos, agregacoes, diretorio_trabalho,
+                                 intervalo_indice, formato_entrada, formato_saida)
+        inicio = time.perf_counter()
+        self._emitir('inicio', f"Iniciando ordenação externa do arquivo: {nome_arquivo}\n"
+                               f"Coluna chave: {coluna_chave}, Ordem: {ordem}",
+                     entrada=nome_arquivo, formato_entrada=formato_entrada.descricao,
+                     formato_saida=formato_saida.descricao)
+        
+        concluida = False
+        try:
+            # Fase 1: Dividir o arquivo em runs ordenados
+            if diretorio_trabalho is not None:
+                self._abrir_manifesto(nome_arquivo, colunas, limite, unicos, agregacoes)
+            if self.manifesto is not None and self.manifesto['fase'] == 'merge':
+                runs = self._retomar_merge(colunas)
+            else:
+                runs = self._dividir_em_runs(nome_arquivo, colunas)
+                self._registrar_passada(runs)
+            
+            # Fase 2: Merge externo dos runs
+            arquivo_final = self._merge_externo(runs)
+            
+            # Definir arquivo de saída
+            if arquivo_saida is None:
+                base_name = os.path.splitext(nome_arquivo)[0]
+                if formato_entrada.compressao is not None:
+                    base_name = os.path.splitext(base_name)[0]
+                compressao = {nome: extensao for extensao, nome in COMPRESSOES_ARQUIVO.items()}
+                arquivo_saida = (f"{base_name}_ordenado{formato_saida.extensao or '.csv'}"
+                                 f"{compressao.get(formato_saida.compressao, '')}")
+            
+            # Mover arquivo final para destino
+            shutil.move(arquivo_final, arquivo_saida)
+            if intervalo_indice is not None:
+                self._gravar_indice_esparso(arquivo_saida)
+            
+            self._emitir('concluido', f"Ordenação concluída. Arquivo salvo em: {arquivo_saida}",
+                         saida=arquivo_saida, segundos=time.perf_counter() - inicio)
+            concluida = True
+            return arquivo_saida
+            
+        finally:
+            # Limpar arquivos temporários (com diretório de trabalho, só ao
+            # concluir, para que uma nova chamada possa retomar)
+            if concluida or diretorio_trabalho is None:
+                self._limpar_arquivos_temporarios()
+    
+    def ordenar_registros(self, registros: Iterable[List[str]], coluna_chave,
+                          ordem: str = 'asc',
+                          tipo_chave: Optional[str] = None,
+                          limite: Optional[int] = None,
+                          unicos: Optional[str] = None,
+                          agregacoes: Optional[list] = None) -> Iterator[List[str]]:
+        """
+        Ordena registros vindos de um iterador e devolve o resultado sob demanda.
+        
+        O primeiro item de `registros` é o cabeçalho, como em um `csv.reader`
+        (por exemplo `csv.reader(sys.stdin)` ou a saída de outra etapa). O
+        gerador devolvido produz o cabeçalho e depois os registros ordenados
+        conforme são mesclados, sem gravar nem mover um CSV final. A divisão em
+        runs começa na primeira iteração e os arquivos temporários são
+        removidos quando o gerador termina ou é fechado. A instância não deve
+        ser usada em outra ordenação enquanto o gerador estiver ativo.
+        
+        Args:
+            registros: Iterável de registros (listas de campos), cabeçalho primeiro
+            coluna_chave: Coluna ou colunas da chave (como em `ordenar_arquivo`)
+            ordem: 'asc' para ascendente ou 'desc' para descendente
+            tipo_chave: Tipo da coluna chave (opcional)
+            limite: Número máximo de registros produzidos (top-K, como em
+                   `ordenar_arquivo`)
+            unicos: Remoção de duplicatas (como em `ordenar_arquivo`)
+            agregacoes: Agregações por chave (como em `ordenar_arquivo`)
+            
+        Yields:
+            Cabeçalho e, em seguida, os registros ordenados
+        """
+        colunas = normalizar_colunas_chave(coluna_chave, ordem, tipo_chave)
+        self._preparar_ordenacao(coluna_chave, limite, unicos, agregacoes)
+        
+        try:
+            runs = self._dividir_registros_em_runs(iter(registros), colunas)
+            yield from self._iterar_merge_final(runs)
+        finally:
+            self._limpar_arquivos_temporarios()
+    
+    def ordenar_multiplas(self, nome_arquivo: str, ordenacoes: List[dict]) -> List[str]:
+        """
+        Gera várias ordenações do mesmo arquivo CSV com uma única leitura.
+        
+        Cada buffer lido é ordenado e gravado como run uma vez para cada
+        ordenação, então a entrada é lida e interpretada uma só vez em vez
+        de uma vez por ordenação. Os merges são feitos um de cada vez, cada
+        um com todo o orçamento de memória (`memoria_max`), e os runs de uma
+        ordenação são removidos assim que sua saída fica pronta. A
+        `cota_disco` vale para os runs de todas as ordenações juntos.
+        
+        Args:
+            nome_arquivo: Caminho para o arquivo CSV de entrada
+            ordenacoes: Uma especificação por ordenação, com os argumentos
+                       de `ordenar_arquivo`: 'coluna_chave' (obrigatório),
+                       'ordem', 'arquivo_saida', 'tipo_chave', 'limite',
+                       'unicos', 'agregacoes' e 'intervalo_indice'. Sem
+                       'arquivo_saida', a saída é o nome da entrada com
+                       o sufixo '_ordenado_<n>' (n a partir de 1).
+            
+        Returns:
+            Caminhos dos arquivos ordenados, na ordem das especificações
+        """
+        if not ordenacoes:
+            raise ValueError("Informe pelo menos uma ordenação")
+        if self.mapear_entrada:
+            raise ValueError("ordenar_multiplas não suporta mapear_entrada")
+        
+        # Cada ordenação tem o próprio estado (extrator, runs, estatísticas
+        # e diretório temporário) em uma cópia deste ordenador; só a
+        # contabilização do disco, que está sujeita a `cota_disco`, é comum
+        ordenadores = []
+        saidas = []
+        uso_disco = {'atual': 0, 'pico': 0}
+        inicio = time.perf_counter()
+        self._emitir('inicio', f"Iniciando {len(ordenacoes)} ordenações do arquivo: "
+                               f"{nome_arquivo}", entrada=nome_arquivo)
+        try:
+            for numero, especificacao in enumerate(ordenacoes, 1):
+                desconhecidos = set(especificacao) - ARGUMENTOS_ORDENACAO
+                if 'coluna_chave' not in especificacao or desconhecidos:
+                    raise ValueError(f"Especificação de ordenação inválida: {especificacao}")
+                colunas = normalizar_colunas_chave(especificacao['coluna_chave'],
+                                                   especificacao.get('ordem', 'asc'),
+                                                   especificacao.get('tipo_chave'))
+                ordenador = copy.copy(self)
+                ordenador.estrategia_runs = 'buffer'
+                ordenador._preparar_ordenacao(especificacao['coluna_chave'],
+                                              especificacao.get('limite'),
+                                              especificacao.get('unicos'),
+                                              especificacao.get('agregacoes'),
+                                              intervalo_indice=especificacao.get(
+                                                  'intervalo_indice'))
+                ordenador._uso_disco = uso_disco
+                ordenadores.append((ordenador, colunas))
+                saidas.append(especificacao.get('arquivo_saida') or
+                              f"{os.path.splitext(nome_arquivo)[0]}_ordenado_{numero}.csv")
+            
+            with open(nome_arquivo, 'r', encoding='utf-8', newline='') as arquivo:
+                runs = self._dividir_em_buffers_multiplos(csv.reader(arquivo), ordenadores)
+            
+            estatisticas = {'ordenacoes': [], 'registros_lidos': 0,
+                            'bytes_lidos': os.path.getsize(nome_arquivo), 'bytes_escritos': 0,
+                            'tempo_runs': time.perf_counter() - inicio, 'tempo_merge': 0.0}
+            for (ordenador, _), runs_ordenacao, arquivo_saida in zip(ordenadores, runs, saidas):
+                shutil.move(ordenador._merge_externo(runs_ordenacao), arquivo_saida)
+                if ordenador.intervalo_indice_atual is not None:
+                    ordenador._gravar_indice_esparso(arquivo_saida)
+                ordenador._limpar_arquivos_temporarios()
+                estatisticas['ordenacoes'].append(ordenador.estatisticas)
+                estatisticas['registros_lidos'] = max(estatisticas['registros_lidos'],
+                                                      ordenador.estatisticas['registros_lidos'])
+                for nome in ('bytes_lidos', 'bytes_escritos', 'tempo_merge'):
+                    estatisticas[nome] += ordenador.estatisticas[nome]
+            estatisticas['pico_disco_temporario'] = uso_disco['pico']
+            self.estatisticas = estatisticas
+            
+            self._emitir('concluido', f"Ordenações concluídas. Arquivos salvos em: "
+                                      f"{', '.join(saidas)}",
+                         saida=saidas, segundos=time.perf_counter() - inicio)
+            return saidas
+        finally:
+            for ordenador, _ in ordenadores:
+                ordenador._limpar_arquivos_temporarios()
+    
+    def ordenar_incremental(self, arquivo_anterior: str, arquivo_delta: str, coluna_chave,
+                            ordem: str = 'asc', arquivo_saida: Optional[str] = None,
+                            tipo_chave: Optional[str] = None,
+                            intervalo_indice: Optional[int] = None) -> str:
+        """
+        Incorpora registros novos a uma saída já ordenada.
+        
+        Só o delta passa pela ordenação externa (divisão em runs e, se
+        preciso, passadas intermediárias entre os runs dele); a saída
+        anterior entra inteira no merge final, que é uma única leitura
+        sequencial dela e uma gravação da nova saída. Durante esse merge
+        a saída anterior é verificada: um registro fora da ordem da chave
+        interrompe a operação com ValueError e nada é gravado. Em chaves
+        iguais os registros anteriores vêm antes dos novos.
+        
+        Args:
+            arquivo_anterior: CSV ordenado pela mesma chave e ordem
+            arquivo_delta: CSV com os registros novos (mesmo cabeçalho)
+            coluna_chave: Coluna ou colunas da chave (como em `ordenar_arquivo`)
+            ordem: 'asc' para ascendente ou 'desc' para descendente
+            arquivo_saida: Nome do arquivo de saída (padrão: substitui
+                          `arquivo_anterior` ao final)
+            tipo_chave: Tipo da coluna chave. Se omitido, vem do índice
+                       esparso da saída anterior, se houver, ou é detectado
+                       em uma amostra dela, para que as chaves do delta
+                       sejam codificadas da mesma forma.
+            intervalo_indice: Intervalo do índice esparso da nova saída
+                             (padrão: o do índice da saída anterior, se
+                             houver; veja `ordenar_arquivo`)
+            
+        Returns:
+            Caminho do arquivo ordenado
+        """
+        if self.mapear_entrada:
+            raise ValueError("ordenar_incremental não suporta mapear_entrada")
+        colunas = normalizar_colunas_chave(coluna_chave, ordem, tipo_chave)
+        if arquivo_saida is None:
+            arquivo_saida = arquivo_anterior
+        
+        with open(arquivo_anterior, 'r', encoding='utf-8', newline='') as entrada:
+            reader = csv.reader(entrada)
+            cabecalho = next(reader, None)
+            amostra = list(itertools.islice(reader, AMOSTRA_DETECCAO))
+        if cabecalho is None:
+            raise ValueError(f"Arquivo {arquivo_anterior} está vazio")
+        with open(arquivo_delta, 'r', encoding='utf-8', newline='') as entrada:
+            cabecalho_delta = next(csv.reader(entrada), None)
+        if cabecalho_delta != cabecalho:
+            raise ValueError(f"Cabeçalho de {arquivo_delta} ({cabecalho_delta}) difere do de "
+                             f"{arquivo_anterior} ({cabecalho})")
+        
+        # Os tipos da chave precisam ser os da saída anterior
+        resolvidas = [coluna._replace(coluna=self._resolver_indice_chave(cabecalho, coluna.coluna))
+                      for coluna in colunas]
+        indice = None
+        if os.path.exists(arquivo_anterior + EXTENSAO_INDICE):
+            indice = _carregar_indice_esparso(arquivo_anterior)
+            colunas_indice = [ColunaChave(*coluna) for coluna in indice['colunas']]
+            if [coluna._replace(tipo=None) for coluna in colunas_indice] != \
+                    [coluna._replace(tipo=None) for coluna in resolvidas]:
+                raise ValueError(f"O índice de {arquivo_anterior} é de outra chave "
+                                 f"({colunas_indice})")
+            colunas = [coluna._replace(tipo=tipo if coluna.tipo is None else coluna.tipo)
+                       for coluna, (_, _, tipo, _) in zip(colunas, colunas_indice)]
+            if intervalo_indice is None:
+                intervalo_indice = indice['intervalo']
+        elif amostra:
+            detectadas = ExtratorChave.detectar(
+                resolvidas, [linha for linha in amostra
+                             if len(linha) > max(coluna.coluna for coluna in resolvidas)]).colunas
+            colunas = [coluna._replace(tipo=detectada.tipo)
+                       for coluna, detectada in zip(colunas, detectadas)]
+        
+        self._preparar_ordenacao(coluna_chave, intervalo_indice=intervalo_indice)
+        inicio = time.perf_counter()
+        self._emitir('inicio', f"Incorporando {arquivo_delta} a {arquivo_anterior}\n"
+                               f"Coluna chave: {coluna_chave}, Ordem: {ordem}",
+                     entrada=arquivo_delta, anterior=arquivo_anterior)
+        try:
+            runs = self._dividir_em_runs(arquivo_delta, colunas)
+            
+            inicio_merge = time.perf_counter()
+            # O delta é reduzido a menos de `fan_in` entradas, para que a saída
+            # anterior só seja lida no merge final
+            fan_in = self._fan_in_efetivo()
+            entradas = self._reduzir_runs(self._encadear_runs(runs), max(2, fan_in - 1))
+            if len(entradas) >= fan_in:
+                entradas = [self._merge_k_runs(entradas)]
+            self._entradas_csv = {arquivo_anterior: cabecalho}
+            arquivo_final = self._merge_k_runs([[arquivo_anterior]] + entradas, final=True)[0]
+            self.estatisticas['registros_lidos'] += self._registros_runs.get(arquivo_anterior, 0)
+            self._concluir_passada(1)
+            self._concluir_fase_merge(inicio_merge)
+            
+            shutil.move(arquivo_final, arquivo_saida)
+            if intervalo_indice is not None:
+                self._gravar_indice_esparso(arquivo_saida)
+            
+            self._emitir('concluido', f"Ordenação incremental concluída. Arquivo salvo em: "
+                                      f"{arquivo_saida}",
+                         saida=arquivo_saida, segundos=time.perf_counter() - inicio)
+            return arquivo_saida
+        finally:
+            self._entradas_csv = {}
+            self._limpar_arquivos_temporarios()
+    
+    def _dividir_em_buffers_multiplos(self, reader: Iterator[List[str]],
+                                      ordenadores: List[Tuple['OrdenacaoExterna',
+                                                              List[ColunaChave]]]
+                                      ) -> List[List[str]]:
+        """
+        Divide uma única leitura da entrada em runs de várias ordenações.
+        
+        Cada buffer cheio é entregue a `_salvar_run` de cada ordenador (com
+        `workers > 1`, ordenado e gravado no pool compartilhado); registros
+        com campos insuficientes para a chave de uma ordenação são
+        ignorados só por ela. O limite de `workers - 1` runs em trânsito no
+        pool vale para todas as ordenações juntas, como em uma ordenação
+        só, para que `_capacidade_buffer` continue valendo.
+        
+        Args:
+            reader: Iterador de registros, com o cabeçalho como primeiro item
+            ordenadores: Pares (ordenador preparado, colunas da chave)
+            
+        Returns:
+            Lista de runs de cada ordenador
+        """
+        inicio = time.perf_counter()
+        try:
+            cabecalho = next(reader)
+        except StopIteration:
+            raise ValueError("Arquivo CSV está vazio")
+        
+        preparados = [ordenador._preparar_colunas(cabecalho, colunas)
+                      for ordenador, colunas in ordenadores]
+        runs = [[] for _ in ordenadores]
+        pendentes = [deque() for _ in ordenadores]
+        # Ordenação de cada run enviado ao pool, na ordem de envio
+        em_transito = deque()
+        capacidade = self._capacidade_buffer()
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        
+        def salvar(buffer: List[List[str]]):
+            minimo = min(map(len, buffer), default=0)
+            for numero, ((ordenador, _), (cabecalho_run, colunas, indice_chave),
+                         runs_ordenador, fila) in enumerate(zip(ordenadores, preparados,
+                                                                runs, pendentes)):
+                registros = (buffer if minimo > indice_chave
+                             else [linha for linha in buffer if len(linha) > indice_chave])
+                if registros or not runs_ordenador:
+                    if executor is not None:
+                        # Aguarda o run mais antigo, de qualquer ordenação
+                        while len(em_transito) >= self.workers - 1:
+                            anterior = em_transito.popleft()
+                            ordenadores[anterior][0]._aguardar_runs(
+                                pendentes[anterior], len(pendentes[anterior]) - 1)
+                        em_transito.append(numero)
+                    runs_ordenador.append(ordenador._salvar_run(
+                        registros, cabecalho_run, colunas, len(runs_ordenador), executor, fila))
+        
+        try:
+            buffer = []
+            ocupado = 0
+            for linha in reader:
+                buffer.append(linha)
+                ocupado += self._custo_registro(linha)
+                if ocupado >= capacidade:
+                    salvar(buffer)
+                    buffer = []
+                    ocupado = 0
+            # O último buffer (vazio, só cria um run para ordenações sem nenhum)
+            salvar(buffer)
+            
+            for (ordenador, _), fila in zip(ordenadores, pendentes):
+                ordenador._aguardar_runs(fila, 0)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        for (ordenador, _), runs_ordenador in zip(ordenadores, runs):
+            ordenador._concluir_fase_runs(runs_ordenador, inicio)
+        return runs
+    
+    def mesclar_arquivos(self, arquivos: List[str], coluna_chave, ordem: str = 'asc',
+                         arquivo_saida: Optional[str] = None,
+                         tipo_chave: Optional[str] = None,
+                         unir_cabecalhos: bool = False) -> str:
+        """
+        Mescla arquivos CSV que já estão ordenados pela mesma chave.
+        
+        Não há divisão em runs: os arquivos são as entradas do merge k-way
+        (com passadas intermediárias se forem mais de `fan_in`). A ordem de
+        cada arquivo é verificada durante a leitura e um arquivo fora de
+        ordem interrompe o merge com ValueError. Registros de mesma chave
+        saem na ordem dos arquivos na lista.
+        
+        Args:
+            arquivos: Arquivos CSV ordenados, cada um com cabeçalho
+            coluna_chave: Coluna ou colunas da chave (como em `ordenar_arquivo`)
+            ordem: 'asc' para ascendente ou 'desc' para descendente
+            arquivo_saida: Nome do arquivo de saída (padrão: o nome do
+                          primeiro arquivo com o sufixo '_mesclado')
+            tipo_chave: Tipo da coluna chave (opcional; detectado em uma
+                       amostra do início de cada arquivo)
+            unir_cabecalhos: Se False, todos os cabeçalhos devem ser iguais.
+                            Se True, a saída tem a união das colunas (na
+                            ordem em que aparecem) e os campos de cada
+                            arquivo são reordenados por nome, com as colunas
+                            ausentes vazias.
+            
+        Returns:
+            Caminho do arquivo mesclado
+        """
+        if not arquivos:
+            raise ValueError("Informe pelo menos um arquivo para mesclar")
+        colunas = normalizar_colunas_chave(coluna_chave, ordem, tipo_chave)
+        
+        self._preparar_ordenacao(coluna_chave)
+        inicio = time.perf_counter()
+        self._emitir('inicio', f"Mesclando {len(arquivos)} arquivo(s) ordenado(s)\n"
+                               f"Coluna chave: {coluna_chave}, Ordem: {ordem}",
+                     entrada=list(arquivos))
+        try:
+            cabecalho, amostra = self._ler_cabecalhos(arquivos, unir_cabecalhos)
+            colunas = [coluna._replace(coluna=self._resolver_indice_chave(cabecalho, coluna.coluna))
+                       for coluna in colunas]
+            indices = [coluna.coluna for coluna in colunas]
+            self._emitir('cabecalho', f"Cabeçalho da saída: {cabecalho}\n"
+                                      f"Usando coluna(s) índice {', '.join(map(str, indices))} "
+                                      f"como chave de ordenação",
+                         cabecalho=cabecalho, indices=indices)
+            
+            indice_chave = max(indices)
+            self.extrator_chave = ExtratorChave.detectar(
+                colunas, [linha for linha in amostra if len(linha) > indice_chave])
+            self._emitir('tipo_detectado', f"Tipo da chave detectado: {self.extrator_chave.tipo}",
+                         tipo=self.extrator_chave.tipo)
+            
+            self._entradas_csv = {arquivo: cabecalho for arquivo in arquivos}
+            entradas = self._reduzir_runs([[arquivo] for arquivo in arquivos])
+            arquivo_final = self._merge_k_runs(entradas, final=True)[0]
+            if len(entradas) > 1:
+                self._concluir_passada(1)
+            self.estatisticas['registros_lidos'] = sum(self._registros_runs.get(arquivo, 0)
+                                                       for arquivo in arquivos)
+            self._concluir_fase_merge(inicio)
+            
+            if arquivo_saida is None:
+                arquivo_saida = f"{os.path.splitext(arquivos[0])[0]}_mesclado.csv"
+            shutil.move(arquivo_final, arquivo_saida)
+            
+            self._emitir('concluido', f"Mesclagem concluída. Arquivo salvo em: {arquivo_saida}",
+                         saida=arquivo_saida, segundos=time.perf_counter() - inicio)
+            return arquivo_saida
+        finally:
+            self._entradas_csv = {}
+            self._limpar_arquivos_temporarios()
+    
+    def _ler_cabecalhos(self, arquivos: List[str], unir: bool):
+        """
+        Lê o cabeçalho e uma amostra do início de cada arquivo a mesclar.
+        
+        Args:
+            arquivos: Arquivos CSV
+            unir: Se True une cabeçalhos diferentes; senão exige que sejam iguais
+            
+        Returns:
+            Tupla (cabeçalho da saída, amostra de registros já no formato
+            desse cabeçalho)
+        """
+        cabecalhos = []
+        amostras = []
+        por_arquivo = max(1, AMOSTRA_DETECCAO // len(arquivos))
+        for arquivo in arquivos:
+            with open(arquivo, 'r', encoding='utf-8', newline='') as entrada:
+                reader = csv.reader(entrada)
+                cabecalhos.append(next(reader, []))
+                amostras.append(list(itertools.islice(reader, por_arquivo)))
+        
+        cabecalho = cabecalhos[0]
+        if not unir:
+            for arquivo, outro in zip(arquivos, cabecalhos):
+                if outro != cabecalho:
+                    raise ValueError(f"Cabeçalho de {arquivo} ({outro}) difere do de "
+                                     f"{arquivos[0]} ({cabecalho}); use unir_cabecalhos=True")
+            return cabecalho, [linha for amostra in amostras for linha in amostra]
+        
+        cabecalho = list(dict.fromkeys(coluna for outro in cabecalhos for coluna in outro))
+        amostra = []
+        for outro, linhas in zip(cabecalhos, amostras):
+            indices = [outro.index(coluna) if coluna in outro else None for coluna in cabecalho]
+            amostra.extend([linha[i] if i is not None and i < len(linha) else '' for i in indices]
+                           for linha in linhas)
+        return cabecalho, amostra
+    
+    def _preparar_ordenacao(self, coluna_chave, limite: Optional[int] = None,
+                            unicos: Optional[str] = None, agregacoes: Optional[list] = None,
+                            diretorio_trabalho: Optional[str] = None,
+                            intervalo_indice: Optional[int] = None,
+                            formato_entrada: Optional[Formato] = None,
+                            formato_saida: Optional[Formato] = None):
+        """Cria o diretório temporário e reinicia o estado de uma nova ordenação."""
+        if limite is not None and limite < 1:
+            raise ValueError("limite deve ser no mínimo 1")
+        if intervalo_indice is not None and intervalo_indice < 1:
+            raise ValueError("intervalo_indice deve ser no mínimo 1")
+        if diretorio_trabalho is not None and self.diretorios_temp is not None \
+                and len(self.diretorios_temp) > 1:
+            raise ValueError("A ordenação retomável (diretorio_trabalho) não suporta "
+                             "vários diretorios_temp")
+        self.reducao_atual = (ReducaoRegistros(unicos, agregacoes)
+                              if unicos is not None or agregacoes else None)
+        if diretorio_trabalho is None:
+            self.diretorios_spill = []
+            for diretorio in self.diretorios_temp or [None]:
+                if diretorio is not None:
+                    os.makedirs(diretorio, exist_ok=True)
+                self.diretorios_spill.append(tempfile.mkdtemp(prefix="mergesort_", dir=diretorio))
+        else:
+            os.makedirs(diretorio_trabalho, exist_ok=True)
+            self.diretorios_spill = [diretorio_trabalho]
+        # O manifesto, os CSVs e as faixas do merge particionado ficam no primeiro
+        self.diretorio_temp = self.diretorios_spill[0]
+        self._proximo_spill = 0
+        self._proximo_merge = 0
+        self._registros_segmento = None
+        self._tamanhos_temporarios = {}
+        # Compartilhado entre as ordenações de `ordenar_multiplas`, que
+        # dividem a mesma cota de disco
+        self._uso_disco = {'atual': 0, 'pico': 0}
+        self.manifesto = None
+        self._runs_retomados = []
+        self._posicao_entrada = None
+        self._posicoes_runs = {}
+        self._entrada_intervalos = None
+        self._varredura = None
+        self._arquivo_mapeado = None
+        self._entradas_csv = {}
+        self.arquivos_temporarios = []
+        self.coluna_chave_atual = coluna_chave
+        self.limite_atual = limite
+        self.intervalo_indice_atual = intervalo_indice
+        self.formato_entrada_atual = _formato_especial(formato_entrada)
+        self.formato_saida_atual = _formato_especial(formato_saida)
+        self._indice_saida = None
+        self._indices_csv = {}
+        self.extrator_chave = None
+        self.estatisticas = {'runs': 0, 'tamanhos_runs': [], 'passes_merge': 0,
+                             'bytes_escritos': 0, 'bytes_lidos': 0, 'registros_lidos': 0,
+                             'comparacoes': 0, 'tempo_runs': 0.0, 'tempo_merge': 0.0,
+                             'disco_temporario': 0, 'pico_disco_temporario': 0,
+                             'formato_entrada': (formato_entrada or FormatoCsv()).descricao,
+                             'formato_saida': (formato_saida or FormatoCsv()).descricao}
+        self._registros_runs = {}
+        self._limites_runs = {}
+    
+    def _gravar_indice_esparso(self, arquivo_saida: str):
+        """
+        Grava o índice esparso anotado durante a gravação da saída.
+        
+        O índice guarda as colunas da chave com os índices que elas têm na
+        saída (na agregação, as primeiras colunas), o tamanho da saída para
+        detectar um índice desatualizado e as chaves em hexadecimal.
+        
+        Args:
+            arquivo_saida: Caminho final do CSV ordenado
+        """
+        # Só as colunas pedidas: na remoção de registros idênticos o extrator
+        # também inclui todos os campos como desempate
+        colunas = self.extrator_chave.colunas[:len(normalizar_colunas_chave(
+            self.coluna_chave_atual))]
+        if self.reducao_atual is not None and self.reducao_atual.agregacoes:
+            colunas = [coluna._replace(coluna=i) for i, coluna in enumerate(colunas)]
+        entradas = self._indice_saida or []
+        indice = {
+            'versao': VERSAO_INDICE,
+            'tamanho': os.path.getsize(arquivo_saida),
+            'intervalo': self.intervalo_indice_atual,
+            'colunas': [list(coluna) for coluna in colunas],
+            'chaves': [chave.hex() for chave, _ in entradas],
+            'posicoes': [posicao for _, posicao in entradas],
+        }
+        with open(arquivo_saida + EXTENSAO_INDICE, 'w', encoding='utf-8') as arquivo:
+            json.dump(indice, arquivo)
+        self._emitir('indice_gravado', f"Índice esparso salvo em: {arquivo_saida}{EXTENSAO_INDICE} "
+                                       f"({len(entradas)} entradas)",
+                     indice=arquivo_saida + EXTENSAO_INDICE, entradas=len(entradas))
+    
+    def _emitir(self, nome: str, mensagem: Optional[str] = None, **dados):
+        """
+        Publica um evento de instrumentação.
+        
+        A mensagem (se houver) é impressa fora do modo silencioso e o evento é
+        entregue a `ao_evento`, quando configurado.
+        
+        Args:
+            nome: Nome do evento (veja `Evento`)
+            mensagem: Texto de progresso para o usuário
+            **dados: Dados do evento
+        """
+        if mensagem is not None and not self.silencioso:
+            print(mensagem)
+        if self.ao_evento is not None:
+            self.ao_evento(Evento(nome, time.perf_counter(), dados))
+    
+    def _proximo_diretorio(self) -> str:
+        """Próximo diretório temporário do rodízio em que os runs são distribuídos."""
+        if self.diretorio_temp is None:
+            raise ValueError("Diretório temporário não foi criado")
+        diretorio = self.diretorios_spill[self._proximo_spill % len(self.diretorios_spill)]
+        self._proximo_spill += 1
+        return diretorio
+    
+    def _caminho_temporario(self, nome: str) -> str:
+        """Caminho de um novo run, no próximo diretório temporário do rodízio."""
+        return os.path.join(self._proximo_diretorio(), nome)
+    
+    def _registrar_disco(self, tamanho: int, caminho: Optional[str] = None):
+        """
+        Contabiliza bytes gravados no diretório temporário e confere a cota.
+        
+        Args:
+            tamanho: Bytes gravados
+            caminho: Arquivo temporário gravado; os arquivos registrados
+                    podem ser removidos por `_descartar_run`
+        """
+        self.estatisticas['bytes_escritos'] += tamanho
+        self.estatisticas['disco_temporario'] += tamanho
+        self.estatisticas['pico_disco_temporario'] = max(
+            self.estatisticas['pico_disco_temporario'], self.estatisticas['disco_temporario'])
+        self._uso_disco['atual'] += tamanho
+        self._uso_disco['pico'] = max(self._uso_disco['pico'], self._uso_disco['atual'])
+        if caminho is not None:
+            self._tamanhos_temporarios[caminho] = tamanho
+        if self.cota_disco is not None and self._uso_disco['atual'] > self.cota_disco:
+            raise ValueError(f"Cota de disco temporário excedida: "
+                             f"{self._uso_disco['atual']} bytes em uso, "
+                             f"cota de {self.cota_disco} bytes")
+    
+    def _descartar_run(self, run: str):
+        """
+        Remove um arquivo temporário já consumido e libera seu espaço na
+        contabilização. Arquivos que não são temporários (como as entradas
+        de `mesclar_arquivos`) são ignorados.
+        """
+        tamanho = self._tamanhos_temporarios.pop(run, None)
+        if tamanho is None:
+            return
+        os.remove(run)
+        self.estatisticas['disco_temporario'] -= tamanho
+        self._uso_disco['atual'] -= tamanho
+    
+    def _abrir_manifesto(self, nome_arquivo: str, colunas: List[ColunaChave],
+                         limite: Optional[int], unicos: Optional[str],
+                         agregacoes: Optional[list]):
+        """
+        Carrega o manifesto do diretório de trabalho ou inicia um novo.
+        
+        O manifesto só é aproveitado se foi gravado para a mesma entrada
+        (caminho, tamanho e data de modificação) e a mesma configuração de
+        chave, e se todos os runs que lista estão íntegros; caso contrário os
+        arquivos do diretório são descartados. Um diretório não vazio e sem
+        manifesto é recusado, para não apagar arquivos que não são nossos.
+        
+        Args:
+            nome_arquivo: Arquivo CSV de entrada
+            colunas: Colunas da chave de ordenação
+            limite: Limite de registros (top-K)
+            unicos: Modo de remoção de duplicatas
+            agregacoes: Agregações por chave
+        """
+        diretorio = self.diretorio_temp
+        caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+        info = os.stat(nome_arquivo)
+        # Ida e volta por JSON para comparar com o que foi lido do disco
+        assinatura = json.loads(json.dumps({
+            'entrada': os.path.abspath(nome_arquivo), 'tamanho': info.st_size,
+            'modificacao': info.st_mtime_ns, 'colunas': [list(coluna) for coluna in colunas],
+            'limite': limite, 'unicos': unicos, 'agregacoes': agregacoes,
+            'compressao': self.compressao_runs, 'mapeada': self.mapear_entrada,
+        }))
+        
+        manifesto = None
+        if os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as arquivo:
+                manifesto = json.load(arquivo)
+            if (manifesto.get('versao') != VERSAO_MANIFESTO
+                    or manifesto.get('assinatura') != assinatura
+                    or not all(self._run_integro(run) for run in manifesto['runs'])):
+                self._emitir('manifesto_descartado',
+                             "Manifesto incompatível com esta ordenação; recomeçando do início",
+                             diretorio=diretorio)
+                manifesto = None
+                for nome in os.listdir(diretorio):
+                    os.remove(os.path.join(diretorio, nome))
+        elif os.listdir(diretorio):
+            raise ValueError(f"Diretório de trabalho {diretorio} não está vazio e não tem manifesto")
+        
+        if manifesto is None:
+            manifesto = {'versao': VERSAO_MANIFESTO, 'assinatura': assinatura, 'fase': 'runs',
+                         'posicao': 0, 'cabecalho': None, 'tipos': None,
+                         'registros_lidos': 0, 'passes_merge': 0, 'runs': []}
+        elif manifesto['runs']:
+            self._emitir('retomada', f"Retomando ordenação: {len(manifesto['runs'])} run(s) "
+                                     f"concluído(s), fase '{manifesto['fase']}', "
+                                     f"{manifesto['passes_merge']} passada(s) de merge",
+                         fase=manifesto['fase'], runs=len(manifesto['runs']),
+                         posicao=manifesto['posicao'], passes=manifesto['passes_merge'])
+        
+        self.manifesto = manifesto
+        self.arquivos_temporarios = [os.path.join(diretorio, nome)
+                                     for nome in sorted(os.listdir(diretorio))
+                                     if nome != ARQUIVO_MANIFESTO]
+        # Os nomes de arquivos novos não colidem com os que já existem
+        self._proximo_merge = 1 + max((int(nome[len('merged_'):].split('_')[0].split('.')[0])
+                                       for nome in os.listdir(diretorio)
+                                       if nome.startswith('merged_')), default=-1)
+        runs = [os.path.join(diretorio, run['arquivo']) for run in manifesto['runs']]
+        self._registros_runs.update(zip(runs, (run['registros'] for run in manifesto['runs'])))
+        self._limites_runs.update((caminho, tuple(map(bytes.fromhex, run['limites'])))
+                                  for caminho, run in zip(runs, manifesto['runs'])
+                                  if run.get('limites'))
+        self.estatisticas['registros_lidos'] = manifesto['registros_lidos']
+        self._tamanhos_temporarios.update(zip(runs, (run['bytes'] for run in manifesto['runs'])))
+        self.estatisticas['disco_temporario'] = sum(run['bytes'] for run in manifesto['runs'])
+        self.estatisticas['pico_disco_temporario'] = self.estatisticas['disco_temporario']
+        self._uso_disco = {'atual': self.estatisticas['disco_temporario'],
+                           'pico': self.estatisticas['disco_temporario']}
+        if manifesto['fase'] == 'runs':
+            self._runs_retomados = runs
+            self.estatisticas['tamanhos_runs'] = [run['registros'] for run in manifesto['runs']]
+        self._salvar_manifesto()
+    
+    def _run_integro(self, run: dict) -> bool:
+        """Verifica se um run do manifesto existe com o tamanho registrado."""
+        caminho = os.path.join(self.diretorio_temp, run['arquivo'])
+        return os.path.isfile(caminho) and os.path.getsize(caminho) == run['bytes']
+    
+    def _salvar_manifesto(self):
+        """Grava o manifesto de forma atômica (arquivo temporário + rename)."""
+        caminho = os.path.join(self.diretorio_temp, ARQUIVO_MANIFESTO)
+        temporario = caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.manifesto, arquivo, ensure_ascii=False)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+    
+    def _registrar_run_manifesto(self, run_arquivo: str, registros: int, tamanho: int):
+        """
+        Acrescenta ao manifesto um run da divisão concluído.
+        
+        Os runs chegam na ordem em que foram formados, então a posição
+        registrada cobre este run e todos os anteriores.
+        """
+        posicao, registros_lidos = self._posicoes_runs.pop(run_arquivo)
+        _sincronizar_arquivo(run_arquivo)
+        manifesto = self.manifesto
+        manifesto['runs'].append({'arquivo': os.path.basename(run_arquivo),
+                                  'registros': registros, 'bytes': tamanho,
+                                  'limites': self._limites_manifesto(run_arquivo)})
+        manifesto['posicao'] = posicao
+        manifesto['registros_lidos'] = registros_lidos
+        if manifesto['tipos'] is None:
+            manifesto['tipos'] = [coluna.tipo for coluna in self.extrator_chave.colunas]
+        self._salvar_manifesto()
+    
+    def _registrar_passada(self, runs: List[str]):
+        """
+        Registra no manifesto os runs vigentes após a divisão ou uma passada de
+        merge; uma execução retomada continua o merge a partir deles.
+        """
+        if self.manifesto is None:
+            return
+        for run in runs:
+            _sincronizar_arquivo(run)
+        self.manifesto.update(
+            fase='merge', passes_merge=self.estatisticas['passes_merge'],
+            registros_lidos=self.estatisticas['registros_lidos'],
+            runs=[{'arquivo': os.path.basename(run), 'registros': self._registros_runs.get(run, 0),
+                   'bytes': os.path.getsize(run), 'limites': self._limites_manifesto(run)}
+                  for run in runs])
+        self._salvar_manifesto()
+    
+    def _limites_manifesto(self, run: str) -> Optional[List[str]]:
+        """Primeira e última chaves de um run em hexadecimal, para o manifesto."""
+        limites = self._limites_runs.get(run)
+        return None if limites is None else [chave.hex() for chave in limites]
+    
+    def _retomar_merge(self, colunas: List[ColunaChave]) -> List[str]:
+        """
+        Retoma uma ordenação cuja divisão em runs já foi concluída.
+        
+        As colunas da chave são resolvidas no cabeçalho do manifesto, com os
+        tipos da execução anterior, para recriar o extrator (usado pelo
+        índice esparso e pelas entradas CSV do merge) e preparar a redução.
+        
+        Args:
+            colunas: Colunas da chave de ordenação
+            
+        Returns:
+            Runs registrados no manifesto
+        """
+        manifesto = self.manifesto
+        runs = [os.path.join(self.diretorio_temp, run['arquivo']) for run in manifesto['runs']]
+        self.estatisticas['runs'] = len(runs)
+        self.estatisticas['tamanhos_runs'] = [run['registros'] for run in manifesto['runs']]
+        self.estatisticas['passes_merge'] = manifesto['passes_merge']
+        if self.mapear_entrada:
+            self._arquivo_mapeado = manifesto['assinatura']['entrada']
+        if manifesto['tipos'] is not None:
+            colunas = [coluna._replace(tipo=tipo)
+                       for coluna, tipo in zip(colunas, manifesto['tipos'])]
+        _, colunas, _ = self._preparar_colunas(manifesto['cabecalho'], colunas)
+        if self.extrator_chave is None:
+            # Sem runs registrados não há tipos salvos (entrada sem registros)
+            self.extrator_chave = ExtratorChave.detectar(colunas, [])
+        return runs
+    
+    def _dividir_em_runs(self, nome_arquivo: str, colunas: List[ColunaChave]) -> List[str]:
+        """
+        Divide o arquivo original em runs menores ordenados.
+        
+        Com manifesto (ordenação retomável) o arquivo é lido em modo binário
+        para que cada run registre a posição da entrada em que termina, e a
+        leitura recomeça após o último run concluído. Com `workers > 1` e a
+        estratégia 'buffer', o arquivo é dividido em intervalos de bytes que
+        são lidos e convertidos em runs em paralelo (veja
+        `_dividir_em_intervalos`). Entradas em outro formato
+        (`formato_entrada_atual`) são lidas em sequência pelo formato.
+        
+        Args:
+            nome_arquivo: Arquivo CSV original
+            colunas: Colunas da chave de ordenação
+            
+        Returns:
+            Lista com caminhos dos arquivos de runs
+        """
+        posicao = 0
+        if self.manifesto is not None:
+            posicao = self.manifesto['posicao']
+            if self.manifesto['tipos'] is not None:
+                # Mesmos tipos da execução anterior, para chaves compatíveis
+                colunas = [coluna._replace(tipo=tipo)
+                           for coluna, tipo in zip(colunas, self.manifesto['tipos'])]
+        self.estatisticas['bytes_lidos'] += os.path.getsize(nome_arquivo) - posicao
+        
+        if self.mapear_entrada:
+            return self._dividir_arquivo_mapeado(nome_arquivo, colunas, posicao)
+        
+        if self.formato_entrada_atual is not None:
+            # Lida em fluxo pelo formato; sem intervalos de bytes para os workers
+            formato = self.formato_entrada_atual
+            with formato.abrir(nome_arquivo, 'rb') as arquivo:
+                return self._dividir_registros_em_runs(formato.ler(arquivo), colunas)
+        
+        if self.manifesto is None:
+            if (self.workers > 1 and self.estrategia_runs == 'buffer'
+                    and (self.limite_atual is None or self.reducao_atual is not None)):
+                # Só o cabeçalho (e a amostra de tipos) é lido aqui; a posição
+                # em bytes marca onde começam os intervalos
+                with open(nome_arquivo, 'rb') as arquivo:
+                    self._entrada_intervalos = (nome_arquivo, _LinhasComPosicao(arquivo))
+                    try:
+                        return self._dividir_registros_em_runs(
+                            csv.reader(self._entrada_intervalos[1]), colunas)
+                    finally:
+                        self._entrada_intervalos = None
+            with open(nome_arquivo, 'r', encoding='utf-8', newline='') as arquivo:
+                return self._dividir_registros_em_runs(csv.reader(arquivo), colunas)
+        
+        with open(nome_arquivo, 'rb') as arquivo:
+            arquivo.seek(posicao)
+            self._posicao_entrada = _LinhasComPosicao(arquivo)
+            reader = csv.reader(self._posicao_entrada)
+            if posicao > 0:
+                # O cabeçalho foi lido na execução anterior
+                reader = itertools.chain([self.manifesto['cabecalho']], reader)
+            try:
+                return self._dividir_registros_em_runs(reader, colunas)
+            finally:
+                self._posicao_entrada = None
+    
+    def _dividir_arquivo_mapeado(self, nome_arquivo: str, colunas: List[ColunaChave],
+                                 posicao: int) -> List[str]:
+        """
+        Divide em runs um arquivo mapeado em memória (`mapear_entrada`).
+        
+        Só o cabeçalho é interpretado aqui; os registros são percorridos por
+        `_dividir_mapeado`. Com manifesto a varredura começa em `posicao` e
+        ela própria informa a posição em que cada run termina.
+        
+        Args:
+            nome_arquivo: Arquivo CSV original
+            colunas: Colunas da chave de ordenação
+            posicao: Posição da entrada em que a leitura começa
+            
+        Returns:
+            Lista com caminhos dos arquivos de runs
+        """
+        self._arquivo_mapeado = nome_arquivo
+        if os.path.getsize(nome_arquivo) == 0:
+            raise ValueError("Arquivo CSV está vazio")
+        
+        with open(nome_arquivo, 'rb') as arquivo, \
+                mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            self._varredura = _VarreduraMapeada(mapa, posicao)
+            if posicao > 0:
+                # O cabeçalho foi lido na execução anterior
+                reader = iter([self.manifesto['cabecalho']])
+            else:
+                reader = (self._varredura.campos(*registro)
+                          for registro in itertools.islice(self._varredura, 1))
+            if self.manifesto is not None:
+                self._posicao_entrada = self._varredura
+            try:
+                return self._dividir_registros_em_runs(reader, colunas)
+            finally:
+                self._varredura = None
+                self._posicao_entrada = None
+    
+    def _dividir_registros_em_runs(self, reader: Iterator[List[str]],
+                                   colunas: List[ColunaChave]) -> List[str]:
+        """
+        Divide uma sequência de registros (cabeçalho primeiro) em runs ordenados.
+        
+        Os tipos das colunas da chave não informados são detectados no
+        primeiro buffer e o extrator resultante fica em `self.extrator_chave`.
+        Com `workers > 1` os buffers cheios são ordenados e gravados por um
+        pool de processos enquanto a leitura do arquivo continua. O número
+        de registros de cada run fica em `estatisticas['tamanhos_runs']`.
+        Uma entrada sem registros gera um único run vazio (só cabeçalho).
+        
+        Args:
+            reader: Iterador de registros, com o cabeçalho como primeiro item
+            colunas: Colunas da chave de ordenação
+            
+        Returns:
+            Lista com caminhos dos arquivos de runs
+        """
+        inicio = time.perf_counter()
+        
+        # Ler cabeçalho
+        try:
+            cabecalho = next(reader)
+        except StopIteration:
+            raise ValueError("Arquivo CSV está vazio")
+        if self.manifesto is not None:
+            self.manifesto['cabecalho'] = cabecalho
+        if not cabecalho and self.formato_entrada_atual is not None:
+            # Formato sem cabeçalho próprio e sem registros (JSONL vazio): não
+            # há colunas a resolver, e a saída é um run vazio
+            colunas = [coluna._replace(coluna=i) for i, coluna in enumerate(colunas)]
+            runs = [self._salvar_run([], cabecalho, colunas, 0)]
+            self._concluir_fase_runs(runs, inicio)
+            return runs
+        
+        cabecalho, colunas, indice_chave = self._preparar_colunas(cabecalho, colunas)
+        
+        runs = None
+        # O heap limitado lê toda a entrada sem pontos de retomada, então
+        # não é usado em ordenações com manifesto
+        if (self.limite_atual is not None and self.reducao_atual is None
+                and self._posicao_entrada is None and self._varredura is None):
+            reader, runs = self._selecionar_primeiros(reader, cabecalho, colunas, indice_chave)
+        
+        if runs is not None:
+            pass  # Top-K resolvido em memória com um único run
+        elif self.estrategia_runs == 'selecao_substituicao':
+            runs = self._selecao_substituicao(reader, cabecalho, colunas)
+        elif self._entrada_intervalos is not None:
+            runs = self._dividir_em_intervalos(reader, cabecalho, colunas, indice_chave)
+        elif self._varredura is not None:
+            runs = self._dividir_mapeado(cabecalho, colunas, indice_chave)
+        else:
+            runs = self._dividir_em_buffers(reader, cabecalho, colunas, indice_chave)
+        runs = self._runs_retomados + runs
+        
+        self._concluir_fase_runs(runs, inicio)
+        return runs
+    
+    def _preparar_colunas(self, cabecalho: List[str],
+                          colunas: List[ColunaChave]) -> Tuple[List[str], List[ColunaChave], int]:
+        """
+        Resolve as colunas da chave no cabeçalho da entrada e prepara a redução.
+        
+        Se todos os tipos são conhecidos, o extrator da chave já é criado.
+        
+        Args:
+            cabecalho: Cabeçalho da entrada
+            colunas: Colunas da chave de ordenação (por nome ou índice)
+            
+        Returns:
+            Tupla (cabeçalho dos runs, colunas com índices resolvidos, maior
+            índice de coluna usado pela chave)
+        """
+        # Determinar índices das colunas chave
+        colunas = [coluna._replace(coluna=self._resolver_indice_chave(cabecalho, coluna.coluna))
+                   for coluna in colunas]
+        indice_chave = max(coluna.coluna for coluna in colunas)
+        
+        indices = [coluna.coluna for coluna in colunas]
+        self._emitir('cabecalho', f"Cabeçalho encontrado: {cabecalho}\n"
+                                  f"Usando coluna(s) índice {', '.join(map(str, indices))} "
+                                  f"como chave de ordenação",
+                     cabecalho=cabecalho, indices=indices)
+        
+        reducao = self.reducao_atual
+        if reducao is not None:
+            if reducao.unicos == 'registro':
+                # Registros idênticos só ficam adjacentes se a chave incluir
+                # todos os campos, como desempate depois das colunas da chave
+                colunas = colunas + [ColunaChave(i, 'asc', 'str') for i in range(len(cabecalho))]
+                indice_chave = max(indice_chave, len(cabecalho) - 1)
+            # Na agregação os runs já são gravados no formato da saída
+            cabecalho = reducao.preparar(cabecalho, indices,
+                                         functools.partial(self._resolver_indice_chave, cabecalho))
+        
+        if all(coluna.tipo is not None for coluna in colunas):
+            self.extrator_chave = ExtratorChave(colunas)
+        return cabecalho, colunas, indice_chave
+    
+    def _concluir_fase_runs(self, runs: List[str], inicio: float):
+        """Registra os runs gerados e emite o fim da fase de divisão."""
+        estatisticas = self.estatisticas
+        tamanhos = estatisticas['tamanhos_runs']
+        estatisticas['runs'] = len(runs)
+        estatisticas['tempo_runs'] = time.perf_counter() - inicio
+        self._registros_runs.update(zip(runs, tamanhos))
+        media = sum(tamanhos) / len(tamanhos) if tamanhos else 0
+        self._emitir('fase_concluida', f"Arquivo dividido em {len(runs)} runs "
+                     f"(estratégia: {self.estrategia_runs}, média de {media:.0f} registros por run)",
+                     fase='runs', segundos=estatisticas['tempo_runs'],
+                     registros=estatisticas['registros_lidos'], runs=len(runs),
+                     bytes_lidos=estatisticas['bytes_lidos'],
+                     bytes_escritos=estatisticas['bytes_escritos'],
+                     comparacoes=estatisticas['comparacoes'])
+    
+    def _dividir_em_buffers(self, reader: Iterator[List[str]], cabecalho: List[str],
+                            colunas: List[ColunaChave], indice_chave: int) -> List[str]:
+        """
+        Forma runs ordenando em memória buffers de capacidade fixa.
+        
+        No modo sequencial (sem workers, limite, redução ou manifesto), os
+        buffers são gravados direto em CSV enquanto a entrada continuar em
+        ordem (`_PassagemDireta`): uma entrada já ordenada gera um único
+        arquivo que é a própria saída, sem ordenação nem merge.
+        
+        Args:
+            reader: Iterador de registros posicionado após o cabeçalho
+            cabecalho: Cabeçalho do CSV
+            colunas: Colunas da chave (usadas na detecção de tipos)
+            indice_chave: Maior índice de coluna usado pela chave
+            
+        Returns:
+            Lista com caminhos dos arquivos de runs
+        """
+        runs = []
+        buffer = []
+        ocupado = 0
+        capacidade = self._capacidade_buffer()
+        # Ao retomar, a numeração continua após os runs já concluídos
+        run_numero = len(self.estatisticas['tamanhos_runs'])
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        pendentes = deque()
+        
+        # Enquanto a entrada estiver em ordem, os buffers vão direto para um
+        # CSV no formato da saída, sem ordenação nem runs binários
+        passagem = None
+        if (executor is None and self.reducao_atual is None and self.limite_atual is None
+                and self._posicao_entrada is None and self.formato_saida_atual is None):
+            passagem = _PassagemDireta(os.path.join(self.diretorio_temp, f"run_{run_numero}.csv"),
+                                       cabecalho, self.intervalo_indice_atual)
+        
+        def encerrar_passagem():
+            nonlocal passagem, run_numero
+            tamanho = passagem.fechar()
+            if passagem.registros:
+                self.arquivos_temporarios.append(passagem.caminho)
+                self.estatisticas['tamanhos_runs'].append(0)
+                self.estatisticas['registros_lidos'] += passagem.registros
+                runs.append(passagem.caminho)
+                self._registrar_run(len(self.estatisticas['tamanhos_runs']) - 1,
+                                    passagem.caminho, tamanho, passagem.registros,
+                                    passagem.comparacoes, time.perf_counter() - passagem.inicio,
+                                    passagem.limites)
+                self._indices_csv[passagem.caminho] = passagem.indice
+                run_numero += 1
+            passagem = None
+        
+        def salvar():
+            nonlocal run_numero
+            if passagem is not None:
+                if self.extrator_chave is None:
+                    self.extrator_chave = ExtratorChave.detectar(colunas, buffer)
+                    self._emitir('tipo_detectado',
+                                 f"Tipo da chave detectado: {self.extrator_chave.tipo}",
+                                 tipo=self.extrator_chave.tipo)
+                if passagem.acrescentar(list(map(self.extrator_chave, buffer)), buffer):
+                    return
+                encerrar_passagem()
+            runs.append(self._salvar_run(buffer, cabecalho, colunas,
+                                         run_numero, executor, pendentes))
+            run_numero += 1
+        
+        try:
+            for linha in reader:
+                if len(linha) <= indice_chave:
+                    continue  # Pular linhas com dados insuficientes
+                
+                buffer.append(linha)
+                ocupado += self._custo_registro(linha)
+                
+                # Quando o buffer está cheio, ordena e salva como run
+                if ocupado >= capacidade:
+                    salvar()
+                    buffer = []
+                    ocupado = 0
+            
+            # Salvar último run se houver dados restantes
+            if buffer:
+                salvar()
+            if passagem is not None:
+                encerrar_passagem()
+            # Entrada sem registros: um run vazio (só cabeçalho)
+            if run_numero == 0:
+                runs.append(self._salvar_run([], cabecalho, colunas, 0))
+            
+            # Aguardar os runs que ainda estão sendo gravados pelos workers
+            self._aguardar_runs(pendentes, 0)
+        finally:
+            if passagem is not None:
+                passagem.fechar()
+            if executor is not None:
+                executor.shutdown()
+        
+        return runs
+    
+    def _dividir_mapeado(self, cabecalho: List[str], colunas: List[ColunaChave],
+                         indice_chave: int) -> List[str]:
+        """
+        Forma runs de índices (chave, posição, tamanho) a partir da entrada
+        mapeada em memória.
+        
+        De cada registro só os campos até a última coluna da chave são
+        decodificados; o buffer guarda a chave codificada e a posição do
+        registro (`_IndiceRegistros`), então a capacidade com `memoria_max`
+        é medida pelo tamanho das chaves e não dos registros. Os tipos da
+        chave não informados são detectados em uma amostra inicial.
+        
+        Args:
+            cabecalho: Cabeçalho do CSV
+            colunas: Colunas da chave com índice já resolvido
+            indice_chave: Maior índice de coluna usado pela chave
+            
+        Returns:
+            Lista com caminhos dos arquivos de runs
+        """
+        varredura = self._varredura
+        quantidade = indice_chave + 1
+        
+        if self.extrator_chave is None:
+            copia = _VarreduraMapeada(varredura.mapa, varredura.posicao)
+            amostra = [campos for campos in (copia.campos(*registro, quantidade)
+                                             for registro in itertools.islice(copia,
+                                                                              AMOSTRA_DETECCAO))
+                       if len(campos) > indice_chave]
+            self.extrator_chave = ExtratorChave.detectar(colunas, amostra)
+            self._emitir('tipo_detectado', f"Tipo da chave detectado: {self.extrator_chave.tipo}",
+                         tipo=self.extrator_chave.tipo)
+        extrator = self.extrator_chave
+        
+        runs = []
+        buffer = _IndiceRegistros()
+        ocupado = 0
+        capacidade = self._capacidade_buffer()
+        por_memoria = self.memoria_max is not None
+        # Ao retomar, a numeração continua após os runs já concluídos
+        run_numero = len(self.estatisticas['tamanhos_runs'])
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        pendentes = deque()
+        
+        try:
+            for inicio, fim, com_aspas in varredura:
+                campos = varredura.campos(inicio, fim, com_aspas, quantidade)
+                if len(campos) <= indice_chave:
+                    continue  # Pular linhas com dados insuficientes
+                
+                chave = extrator(campos)
+                buffer.acrescentar(chave, inicio, fim - inicio)
+                ocupado += len(chave) + SOBRECARGA_INDICE if por_memoria else 1
+                
+                if ocupado >= capacidade:
+                    runs.append(self._salvar_run(buffer, cabecalho, colunas,
+                                                 run_numero, executor, pendentes))
+                    buffer = _IndiceRegistros()
+                    ocupado = 0
+                    run_numero += 1
+            
+            # Salvar último run se houver dados restantes (ou um run vazio)
+            if buffer or run_numero == 0:
+                runs.append(self._salvar_run(buffer, cabecalho, colunas,
+                                             run_numero, executor, pendentes))
+            
+            self._aguardar_runs(pendentes, 0)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        return runs
+    
+    def _selecionar_primeiros(self, reader: Iterator[List[str]], cabecalho: List[str],
+                              colunas: List[ColunaChave], indice_chave: int):
+        """
+        Seleciona os `limite_atual` primeiros registros com um heap limitado.
+        
+        Uma amostra inicial detecta os tipos da chave e estima se os
+        `limite_atual` registros cabem no buffer. Se cabem, toda a entrada é
+        lida uma única vez com `heapq.nsmallest` (estável) e o resultado é
+        gravado como um único run. Senão nada é consumido além da amostra e a
+        ordenação segue com runs truncados.
+        
+        Args:
+            reader: Iterador de registros posicionado após o cabeçalho
+            cabecalho: Cabeçalho do CSV
+            colunas: Colunas da chave com índice já resolvido
+            indice_chave: Maior índice de coluna usado pela chave
+            
+        Returns:
+            Tupla (iterador com os registros restantes, lista de runs ou
+            None se o limite não cabe na memória)
+        """
+        registros = (linha for linha in reader if len(linha) > indice_chave)
+        amostra = list(itertools.islice(registros, AMOSTRA_DETECCAO))
+        restantes = itertools.chain(amostra, registros)
+        
+        custo = (sum(map(self._custo_registro, amostra)) / len(amostra)) if amostra else 1
+        if not amostra or self.limite_atual * custo > self._capacidade_buffer():
+            return restantes, None
+        
+        if self.extrator_chave is None:
+            self.extrator_chave = ExtratorChave.detectar(colunas, amostra)
+            self._emitir('tipo_detectado', f"Tipo da chave detectado: {self.extrator_chave.tipo}",
+                         tipo=self.extrator_chave.tipo)
+        extrator = self.extrator_chave
+        
+        inicio = time.perf_counter()
+        lidos = [0]
+        
+        def contar(linhas):
+            for linha in linhas:
+                lidos[0] += 1
+                yield linha
+        
+        primeiros = heapq.nsmallest(self.limite_atual, contar(restantes), key=extrator)
+        
+        run_arquivo = self._caminho_temporario("run_0.run")
+        self.arquivos_temporarios.append(run_arquivo)
+        self.estatisticas['tamanhos_runs'].append(0)
+        self.estatisticas['registros_lidos'] += lidos[0]
+        
+        escritor = EscritorRun(run_arquivo, cabecalho, self.compressao_runs)
+        try:
+            escritor.escrever_varios((extrator(linha), linha) for linha in primeiros)
+        finally:
+            tamanho = escritor.fechar()
+        self._registrar_run(0, run_arquivo, tamanho, len(primeiros),
+                            lidos[0] * self._comparacoes_heap(len(primeiros)),
+                            time.perf_counter() - inicio)
+        return iter(()), [run_arquivo]
+    
+    def _dividir_em_intervalos(self, reader: Iterator[List[str]], cabecalho: List[str],
+                               colunas: List[ColunaChave], indice_chave: int) -> List[str]:
+        """
+        Forma runs lendo intervalos de bytes do arquivo em paralelo.
+        
+        O arquivo após o cabeçalho é dividido em `workers` intervalos que
+        começam em início de registro (`_limites_registros`, que respeita
+        quebras de linha dentro de aspas). Cada processo do pool lê e
+        interpreta o seu intervalo e o divide em runs como `_dividir_em_buffers`,
+        então a leitura do CSV, e não só a ordenação, escala com os núcleos.
+        Os tipos da chave são detectados antes, em uma amostra, para que
+        todos os processos codifiquem as chaves da mesma forma. Os runs são
+        listados na ordem dos intervalos, o que mantém o merge estável.
+        
+        Args:
+            reader: Iterador de registros posicionado após o cabeçalho
+            cabecalho: Cabeçalho dos runs
+            colunas: Colunas da chave (usadas na detecção de tipos)
+            indice_chave: Maior índice de coluna usado pela chave
+            
+        Returns:
+            Lista com caminhos dos arquivos de runs
+        """
+        nome_arquivo, linhas = self._entrada_intervalos
+        inicio_dados = linhas.posicao
+        
+        if self.extrator_chave is None:
+            amostra = [linha for linha in itertools.islice(reader, AMOSTRA_DETECCAO)
+                       if len(linha) > indice_chave]
+            self.extrator_chave = ExtratorChave.detectar(colunas, amostra)
+            self._emitir('tipo_detectado', f"Tipo da chave detectado: {self.extrator_chave.tipo}",
+                         tipo=self.extrator_chave.tipo)
+        
+        limites = _limites_registros(nome_arquivo, inicio_dados, self.workers)
+        tamanhos = self.estatisticas['tamanhos_runs']
+        runs = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futuros = [executor.submit(_dividir_intervalo, nome_arquivo, inicio, fim, numero,
+                                       cabecalho, self.extrator_chave, indice_chave,
+                                       self._capacidade_buffer(), self.memoria_max is not None,
+                                       self.diretorios_spill, self.compressao_runs,
+                                       self.limite_atual, self.reducao_atual,
+                                       self.ordenacao_vetorizada)
+                       for numero, (inicio, fim) in enumerate(zip(limites, limites[1:]))]
+            for futuro in futuros:
+                lidos, resultados = futuro.result()
+                self.estatisticas['registros_lidos'] += lidos
+                for run_arquivo, *resultado in resultados:
+                    self.arquivos_temporarios.append(run_arquivo)
+                    tamanhos.append(0)
+                    self._registrar_run(len(tamanhos) - 1, run_arquivo, *resultado)
+                    runs.append(run_arquivo)
+        
+        if not runs:
+            runs.append(self._salvar_run([], cabecalho, colunas, 0))
+        return runs
+    
+    def _capacidade_buffer(self) -> int:
+        """
+        Capacidade de um buffer de runs, na unidade de `_custo_registro`.
+        
+        Sem `memoria_max` é o número de registros (`tamanho_buffer`). Com
+        `memoria_max` é o orçamento em bytes dividido entre o buffer em
+        leitura e os buffers que os workers podem estar ordenando.
+        """
+        if self.memoria_max is None:
+            return self.tamanho_buffer
+        buffers = self.workers + 1 if self.workers > 1 else 1
+        return max(1, self.memoria_max // buffers)
+    
+    def _custo_registro(self, linha: List[str]) -> int:
+        """Quanto um registro ocupa do buffer: 1 registro ou sua memória estimada."""
+        if self.memoria_max is None:
+            return 1
+        return _tamanho_registro(linha)
+    
+    def _resolver_indice_chave(self, cabecalho: List[str],
+                               coluna_chave: Union[str, int]) -> int:
+        """
+        Converte o nome ou índice da coluna chave no índice dentro do cabeçalho.
+        
+        Args:
+            cabecalho: Cabeçalho do CSV
+            coluna_chave: Nome da coluna ou índice (0-based)
+            
+        Returns:
+            Índice da coluna chave
+        """
+        if isinstance(coluna_chave, str):
+            try:
+                return cabecalho.index(coluna_chave)
+            except ValueError:
+                raise ValueError(f"Coluna '{coluna_chave}' não encontrada no cabeçalho")
+        
+        if coluna_chave >= len(cabecalho):
+            raise ValueError(f"Índice da coluna {coluna_chave} está fora do intervalo")
+        return coluna_chave
+    
+    def _salvar_run(self, buffer: List[List[str]], cabecalho: List[str], 
+                   colunas: List[ColunaChave], run_numero: int,
+                   executor: Optional[ProcessPoolExecutor] = None,
+                   pendentes: Optional[deque] = None) -> str:
+        """
+        Ordena um buffer de dados e salva como arquivo de run.
+        
+        Args:
+            buffer: Lista de registros a serem ordenados (ou `_IndiceRegistros`
+                   no modo de entrada mapeada)
+            cabecalho: Cabeçalho do CSV
+            colunas: Colunas da chave (usadas na detecção de tipos)
+            run_numero: Número do run para nomenclatura
+            executor: Pool de processos (opcional). Quando informado, a
+                     ordenação e a gravação são feitas em um worker.
+            pendentes: Fila com os runs ainda em processamento no pool
+            
+        Returns:
+            Caminho do arquivo de run (no modo paralelo, pode ainda estar
+            sendo gravado; veja `_aguardar_runs`)
+        """
+        if self.extrator_chave is None:
+            self.extrator_chave = ExtratorChave.detectar(colunas, buffer)
+            self._emitir('tipo_detectado', f"Tipo da chave detectado: {self.extrator_chave.tipo}",
+                         tipo=self.extrator_chave.tipo)
+        
+        run_arquivo = self._caminho_temporario(f"run_{run_numero}.run")
+        self.arquivos_temporarios.append(run_arquivo)
+        # O número de registros gravados (após limite e redução) é
+        # preenchido quando o run termina de ser gravado
+        indice = len(self.estatisticas['tamanhos_runs'])
+        self.estatisticas['tamanhos_runs'].append(0)
+        self.estatisticas['registros_lidos'] += len(buffer)
+        if self._posicao_entrada is not None:
+            # Tudo até aqui na entrada está coberto por este run e os anteriores
+            self._posicoes_runs[run_arquivo] = (self._posicao_entrada.posicao,
+                                                self.estatisticas['registros_lidos'])
+        argumentos = (buffer, cabecalho, self.extrator_chave, run_arquivo,
+                      self.compressao_runs, self.limite_atual, self.reducao_atual,
+                      self.ordenacao_vetorizada)
+        ordenar_e_gravar = (_ordenar_e_gravar_indice if isinstance(buffer, _IndiceRegistros)
+                            else _ordenar_e_gravar_run)
+        
+        if executor is None:
+            self._registrar_run(indice, run_arquivo, *ordenar_e_gravar(*argumentos))
+        else:
+            # Limitar os buffers em trânsito para não estourar a memória
+            self._aguardar_runs(pendentes, self.workers - 1)
+            pendentes.append((executor.submit(ordenar_e_gravar, *argumentos),
+                              indice, run_arquivo))
+        return run_arquivo
+    
+    def _registrar_run(self, indice: int, run_arquivo: str, tamanho: int, registros: int,
+                       comparacoes: int, segundos: float,
+                       limites: Optional[Tuple[bytes, bytes]] = None):
+        """
+        Contabiliza um run gravado e emite o evento 'run_gravado'.
+        
+        Args:
+            indice: Posição do run em `estatisticas['tamanhos_runs']`
+            run_arquivo: Caminho do run
+            tamanho: Tamanho do run em bytes
+            registros: Número de registros gravados no run
+            comparacoes: Comparações de chave feitas para ordená-lo
+            segundos: Tempo gasto ordenando e gravando o run
+            limites: Primeira e última chaves do run (None se vazio ou
+                    desconhecidas); permitem encadear runs no merge
+        """
+        self.estatisticas['tamanhos_runs'][indice] = registros
+        if limites is not None:
+            self._limites_runs[run_arquivo] = limites
+        self._registrar_disco(tamanho, run_arquivo)
+        if run_arquivo in self._posicoes_runs:
+            self._registrar_run_manifesto(run_arquivo, registros, tamanho)
+        self.estatisticas['comparacoes'] += comparacoes
+        self._emitir('run_gravado', run=run_arquivo, registros=registros, bytes=tamanho,
+                     segundos=segundos, comparacoes=comparacoes,
+                     disco_temporario=self.estatisticas['disco_temporario'])
+    
+    def _aguardar_runs(self, pendentes: deque, maximo: int):
+        """
+        Aguarda runs gravados pelo pool até restarem no máximo `maximo` pendentes.
+        
+        Args:
+            pendentes: Fila de (Future, índice do run, caminho do run) dos
+                      runs enviados ao pool de processos
+            maximo: Número de runs que podem continuar em processamento
+        """
+        while len(pendentes) > maximo:
+            futuro: Future
+            futuro, indice, run_arquivo = pendentes.popleft()
+            self._registrar_run(indice, run_arquivo, *futuro.result())
+    
+    def _selecao_substituicao(self, reader, cabecalho: List[str],
+                              colunas: List[ColunaChave]) -> List[str]:
+        """
+        Forma runs por seleção por substituição (heap de torneio).
+        
+        O heap ocupa toda a capacidade do buffer (`tamanho_buffer` registros ou
+        `memoria_max` bytes). O menor é gravado no run atual e substituído
+        pelos próximos registros da entrada que couberem; se a chave do
+        novo registro vier antes da última gravada, ele é marcado para o
+        próximo run. Em dados aleatórios os runs ficam com ~2x o tamanho do
+        buffer, e entradas já ordenadas geram um único run.
+        
+        Args:
+            reader: Iterador de registros posicionado após o cabeçalho
+            cabecalho: Cabeçalho do CSV
+            colunas: Colunas da chave (usadas na detecção de tipos)
+            
+        Returns:
+            Lista com caminhos dos arquivos de runs
+        """
+        if self.diretorio_temp is None:
+            raise ValueError("Diretório temporário não foi criado")
+        
+        # Registros válidos da entrada (pulando linhas com dados insuficientes)
+        indice_chave = max(coluna.coluna for coluna in colunas)
+        registros = (linha for linha in reader if len(linha) > indice_chave)
+        capacidade = self._capacidade_buffer()
+        
+        # Preencher a memória disponível com os primeiros registros
+        iniciais = []
+        ocupado = 0
+        for linha in registros:
+            iniciais.append(linha)
+            ocupado += self._custo_registro(linha)
+            if ocupado >= capacidade:
+                break
+        
+        if not iniciais:
+            return [self._salvar_run([], cabecalho, colunas, 0)]
+        if self.extrator_chave is None:
+            self.extrator_chave = ExtratorChave.detectar(colunas, iniciais)
+            self._emitir('tipo_detectado', f"Tipo da chave detectado: {self.extrator_chave.tipo}",
+                         tipo=self.extrator_chave.tipo)
+        
+        extrator = self.extrator_chave
+        
+        # Entradas: (número do run, chave, sequência de leitura, registro).
+        # A sequência desempata chaves iguais e mantém a ordenação estável.
+        heap = [(0, extrator(linha), seq, linha) for seq, linha in enumerate(iniciais)]
+        heapq.heapify(heap)
+        seq = len(heap)
+        
+        runs = []
+        run_atual = -1
+        escritor = None
+        limite = self.limite_atual
+        escritos = 0
+        agrupador = None if self.reducao_atual is None else _Agrupador(self.reducao_atual, True)
+        # Comparações estimadas por registro no heap de torneio
+        comparacoes_heap = math.ceil(math.log2(max(2, len(heap))))
+        
+        def gravar(par):
+            # Com limite, o excedente de cada run é descartado
+            nonlocal escritos
+            if par is not None and (limite is None or escritos < limite):
+                escritor.escrever(*par)
+                escritos += 1
+        
+        def fechar_run():
+            if agrupador is not None:
+                gravar(agrupador.finalizar())
+            tamanho = escritor.fechar()
+            self._registrar_run(len(runs) - 1, escritor.caminho, tamanho, escritos,
+                                escritos * comparacoes_heap, time.perf_counter() - inicio_run,
+                                escritor.limites)
+        
+        try:
+            while heap:
+                numero_run, chave, _, linha = heap[0]
+                
+                if numero_run != run_atual:
+                    # Fechar o run anterior e abrir o próximo
+                    if escritor is not None:
+                        fechar_run()
+                        escritor = None
+                    inicio_run = time.perf_counter()
+                    escritos = 0
+                    run_atual = numero_run
+                    run_arquivo = self._caminho_temporario(f"run_{run_atual}.run")
+                    self.arquivos_temporarios.append(run_arquivo)
+                    self.estatisticas['tamanhos_runs'].append(0)
+                    runs.append(run_arquivo)
+                    escritor = EscritorRun(run_arquivo, cabecalho, self.compressao_runs)
+                
+                gravar((chave, linha) if agrupador is None else agrupador.adicionar(chave, linha))
+                heapq.heappop(heap)
+                ocupado -= self._custo_registro(linha)
+                
+                # Substituir o registro gravado pelos próximos da entrada
+                # enquanto houver espaço no buffer
+                while ocupado < capacidade or not heap:
+                    proxima = next(registros, None)
+                    if proxima is None:
+                        break
+                    chave_nova = extrator(proxima)
+                    run_nova = run_atual + 1 if chave_nova < chave else run_atual
+                    heapq.heappush(heap, (run_nova, chave_nova, seq, proxima))
+                    ocupado += self._custo_registro(proxima)
+                    seq += 1
+        finally:
+            if escritor is not None:
+                fechar_run()
+        
+        self.estatisticas['registros_lidos'] += seq
+        return runs
+    
+    @staticmethod
+    def _merge_sort_interno(dados: List[Tuple[bytes, List[str]]],
+                            contador: Optional[List[int]] = None) -> List[Tuple[bytes, List[str]]]:
+        """
+        Implementa merge sort para dados em memória.
+        
+        Args:
+            dados: Lista de pares (chave codificada, registro)
+            contador: Lista de um elemento que acumula o número de comparações
+            
+        Returns:
+            Lista ordenada de pares
+        """
+        if len(dados) <= 1:
+            return dados
+        
+        meio = len(dados) // 2
+        esquerda = OrdenacaoExterna._merge_sort_interno(dados[:meio], contador)
+        direita = OrdenacaoExterna._merge_sort_interno(dados[meio:], contador)
+        
+        return OrdenacaoExterna._merge_interno(esquerda, direita, contador)
+    
+    @staticmethod
+    def _merge_interno(esquerda: List[Tuple[bytes, List[str]]],
+                      direita: List[Tuple[bytes, List[str]]],
+                      contador: Optional[List[int]] = None) -> List[Tuple[bytes, List[str]]]:
+        """
+        Faz o merge estável de duas listas ordenadas.
+        
+        Args:
+            esquerda: Lista ordenada da esquerda
+            direita: Lista ordenada da direita
+            contador: Lista de um elemento que acumula o número de comparações
+            
+        Returns:
+            Lista mesclada e ordenada
+        """
+        resultado = []
+        i = j = 0
+        
+        while i < len(esquerda) and j < len(direita):
+            if esquerda[i][0] <= direita[j][0]:
+                resultado.append(esquerda[i])
+                i += 1
+            else:
+                resultado.append(direita[j])
+                j += 1
+        
+        # Cada iteração do laço fez uma comparação
+        if contador is not None:
+            contador[0] += i + j
+        
+        # Adicionar elementos restantes
+        resultado.extend(esquerda[i:])
+        resultado.extend(direita[j:])
+        
+        return resultado
+    
+    def _merge_externo(self, runs: List[str]) -> str:
+        """
+        Realiza o merge externo dos runs ordenados.
+        
+        Os runs são agrupados em cadeias já ordenadas entre si
+        (`_encadear_runs`) e reduzidos por `_reduzir_runs` até caberem em um
+        único merge, que grava o CSV final (em paralelo por faixas de chave
+        com `particoes_merge > 1`).
+        
+        Args:
+            runs: Lista de arquivos de runs
+            
+        Returns:
+            Caminho do arquivo CSV final ordenado
+        """
+        inicio = time.perf_counter()
+        entradas = self._reduzir_runs(self._encadear_runs(runs))
+        if len(entradas) == 1 and len(entradas[0]) == 1 and entradas[0][0].endswith('.csv'):
+            # Entrada já ordenada: o CSV da passagem direta é a saída. Se
+            # outros runs foram encadeados a ele, a cadeia passa pelo merge
+            arquivo_final = entradas[0][0]
+            self._indice_saida = self._indices_csv.get(arquivo_final)
+        elif (self.particoes_merge > 1 and len(entradas) > 1 and self.limite_atual is None
+              and (self.formato_saida_atual is None
+                   or self.formato_saida_atual.compressao is None)):
+            arquivo_final = self._merge_particionado(entradas)
+        else:
+            arquivo_final = self._merge_k_runs(entradas, final=True)[0]
+        
+        # Com uma única entrada há apenas a conversão para CSV, não uma passada
+        if len(entradas) > 1:
+            self._concluir_passada(1)
+        self._concluir_fase_merge(inicio)
+        return arquivo_final
+    
+    def _merge_particionado(self, entradas: List[List[str]]) -> str:
+        """
+        Faz o merge final em paralelo por faixas de chave (sample sort).
+        
+        As primeiras chaves dos blocos de todos os runs (o índice gravado
+        ao final de cada run) são uma amostra regular das chaves, de onde
+        saem até `particoes_merge - 1` separadores. Cada faixa é mesclada
+        por um processo, que lê de cada run só os blocos da faixa, e as
+        partes são concatenadas na ordem das faixas. Chaves iguais caem
+        sempre na mesma faixa, então a saída é idêntica à do merge
+        sequencial.
+        
+        Args:
+            entradas: Cadeias de runs do merge final
+            
+        Returns:
+            Caminho do arquivo CSV final ordenado
+        """
+        runs = [run for entrada in entradas for run in entrada]
+        separadores = self._separadores_faixas(runs)
+        if not separadores:
+            return self._merge_k_runs(entradas, final=True)[0]
+        faixas = list(zip([None] + separadores, separadores + [None]))
+        
+        inicio = time.perf_counter()
+        numero = self._proximo_merge
+        self._proximo_merge += 1
+        partes = [os.path.join(self.diretorio_temp, f"merged_{numero}_faixa{i}.csv")
+                  for i in range(len(faixas))]
+        # Cada processo mantém os buffers de todas as entradas
+        buffer_io = self._buffer_merge(len(entradas))
+        if self.memoria_max is not None:
+            buffer_io = max(io.DEFAULT_BUFFER_SIZE, buffer_io // len(faixas))
+        
+        with ProcessPoolExecutor(max_workers=len(faixas)) as executor:
+            futuros = [executor.submit(_mesclar_faixa, self._entradas_da_faixa(entradas, *faixa),
+                                       *faixa, parte, i == 0, self.extrator_chave,
+                                       self.reducao_atual, self._arquivo_mapeado,
+                                       buffer_io, self._profundidade_io(),
+                                       self.intervalo_indice_atual, self.formato_saida_atual)
+                       for i, (faixa, parte) in enumerate(zip(faixas, partes))]
+            resultados = [futuro.result() for futuro in futuros]
+        self.arquivos_temporarios.extend(partes)
+        
+        # Posições do índice de cada parte deslocadas para a saída concatenada
+        tamanhos = [tamanho for tamanho, _ in resultados]
+        deslocamentos = itertools.accumulate([0] + tamanhos)
+        self._indice_saida = [(chave, deslocamento + posicao)
+                              for (_, entradas), deslocamento in zip(resultados, deslocamentos)
+                              for chave, posicao in entradas]
+        
+        # As partes são concatenadas na primeira
+        arquivo_mesclado = partes[0]
+        with open(arquivo_mesclado, 'ab') as saida:
+            for parte in partes[1:]:
+                with open(parte, 'rb') as entrada:
+                    shutil.copyfileobj(entrada, saida, TAMANHO_BLOCO_CSV)
+                os.remove(parte)
+        
+        bytes_lidos = sum(map(os.path.getsize, runs))
+        bytes_escritos = sum(tamanhos)
+        registros = sum(self._registros_runs.get(run, 0) for run in runs)
+        comparacoes = registros * self._comparacoes_heap(len(entradas))
+        self._registrar_disco(bytes_escritos, arquivo_mesclado)
+        self.estatisticas['bytes_escritos'] += bytes_escritos - tamanhos[0]
+        self.estatisticas['bytes_lidos'] += bytes_lidos
+        self.estatisticas['comparacoes'] += comparacoes
+        if self.manifesto is None:
+            for run in runs:
+                self._descartar_run(run)
+        self._emitir('merge_concluido', runs=len(runs), registros=registros,
+                     bytes_lidos=bytes_lidos, bytes_escritos=bytes_escritos,
+                     segundos=time.perf_counter() - inicio, comparacoes=comparacoes,
+                     disco_temporario=self.estatisticas['disco_temporario'],
+                     faixas=len(faixas), bytes_faixas=tamanhos)
+        return arquivo_mesclado
+    
+    def _separadores_faixas(self, runs: List[str]) -> List[bytes]:
+        """
+        Escolhe os separadores das faixas do merge particionado.
+        
+        A amostra são as primeiras chaves dos blocos de cada run (uma a cada
+        `REGISTROS_POR_BLOCO` registros); para runs sem índice, como o CSV
+        da passagem direta, a primeira e a última chave.
+        
+        Args:
+            runs: Runs do merge final
+            
+        Returns:
+            Separadores distintos em ordem (vazio se não há chaves)
+        """
+        amostra = []
+        for run in runs:
+            indice = None
+            if not run.endswith('.csv'):
+                with open(run, 'rb') as arquivo:
+                    indice = _ler_indice_run(arquivo)
+            if indice:
+                amostra.extend(chave for _, chave in indice)
+            elif run in self._limites_runs:
+                amostra.extend(self._limites_runs[run])
+        if not amostra:
+            return []
+        amostra.sort()
+        
+        particoes = self.particoes_merge
+        separadores = {amostra[len(amostra) * i // particoes] for i in range(1, particoes)}
+        # A menor chave não separa nada: a primeira faixa ficaria vazia
+        separadores.discard(amostra[0])
+        return sorted(separadores)
+    
+    def _entradas_da_faixa(self, entradas: List[List[str]], inicio: Optional[bytes],
+                           fim: Optional[bytes]) -> List[List[str]]:
+        """
+        Restringe as cadeias aos runs que podem ter chaves em [inicio, fim),
+        segundo a primeira e a última chave de cada run.
+        """
+        def na_faixa(run: str) -> bool:
+            limites = self._limites_runs.get(run)
+            if limites is None:
+                return True
+            return (fim is None or limites[0] < fim) and (inicio is None or limites[1] >= inicio)
+        
+        restritas = ([run for run in entrada if na_faixa(run)] for entrada in entradas)
+        return [entrada for entrada in restritas if entrada]
+    
+    def _iterar_merge_final(self, runs: List[str]) -> Iterator[List[str]]:
+        """
+        Faz o último merge sob demanda, produzindo cabeçalho e registros.
+        
+        Args:
+            runs: Lista de arquivos de runs
+            
+        Yields:
+            Cabeçalho e, em seguida, os registros ordenados
+        """
+        inicio = time.perf_counter()
+        entradas = self._reduzir_runs(self._encadear_runs(runs))
+        runs = [run for entrada in entradas for run in entrada]
+        
+        leitores = self._abrir_runs(entradas)
+        try:
+            yield leitores[0].cabecalho
+            for _, linha in self._mesclar(leitores):
+                yield linha
+        finally:
+            for leitor in leitores:
+                leitor.fechar()
+        
+        # Só contabilizado quando o gerador é consumido até o fim
+        registros = sum(self._registros_runs.get(run, 0) for run in runs)
+        if self.limite_atual is not None:
+            registros = min(registros, self.limite_atual)
+        self.estatisticas['bytes_lidos'] += sum(map(os.path.getsize, runs))
+        self.estatisticas['comparacoes'] += registros * self._comparacoes_heap(len(entradas))
+        if len(entradas) > 1:
+            self._concluir_passada(1)
+        self._concluir_fase_merge(inicio)
+    
+    def _concluir_passada(self, runs_restantes: int):
+        """Contabiliza uma passada de merge e emite 'passada_concluida'."""
+        self.estatisticas['passes_merge'] += 1
+        self._emitir('passada_concluida', f"Merge externo: {runs_restantes} runs restantes",
+                     passada=self.estatisticas['passes_merge'], runs_restantes=runs_restantes)
+    
+    def _concluir_fase_merge(self, inicio: float):
+        """Registra o tempo do merge externo e emite o fim da fase."""
+        estatisticas = self.estatisticas
+        estatisticas['tempo_merge'] = time.perf_counter() - inicio
+        self._emitir('fase_concluida', f"Merge externo concluído em {estatisticas['passes_merge']} "
+                     f"passada(s), {estatisticas['bytes_escritos']} bytes escritos",
+                     fase='merge', segundos=estatisticas['tempo_merge'],
+                     registros=estatisticas['registros_lidos'],
+                     passes=estatisticas['passes_merge'],
+                     bytes_lidos=estatisticas['bytes_lidos'],
+                     bytes_escritos=estatisticas['bytes_escritos'],
+                     comparacoes=estatisticas['comparacoes'])
+    
+    @staticmethod
+    def _comparacoes_heap(num_runs: int) -> int:
+        """Comparações estimadas por registro em um heap de `num_runs` entradas."""
+        return math.ceil(math.log2(num_runs)) if num_runs > 1 else 0
+    
+    def _encadear_runs(self, runs: List[str]) -> List[List[str]]:
         """
-        print(f"Iniciando ordenação externa do arquivo: {nome_arquivo}")
-        print(f"Coluna chave: {coluna_chave}, Ordem: {ordem}")
+        Agrupa runs consecutivos que já estão em ordem entre si.
         
-        # Criar diretório temporário
-        self.diretorio_temp = tempfile.mkdtemp(prefix="mergesort_")
+        Um run entra no fim da cadeia anterior se sua primeira chave não é
+        menor que a última chave da cadeia, ou no início se sua última chave é
+        menor que a primeira da cadeia (trechos em ordem decrescente, cujos
+        runs saem invertidos). Os limites vêm de `_registrar_run`. Em entradas
+        formadas por trechos ordenados (como arquivos diários concatenados)
+        cada trecho vira uma cadeia, e o merge mescla cadeias em vez de runs.
+        Como cada cadeia cobre runs consecutivos, o merge continua estável.
         
-        try:
-            # Fase 1: Dividir o arquivo em runs ordenados
-            runs = self._dividir_em_runs(nome_arquivo, coluna_chave, ordem)
-            print(f"Arquivo dividido em {len(runs)} runs")
-            
-            # Fase 2: Merge externo dos runs
-            arquivo_final = self._merge_externo(runs, coluna_chave, ordem)
-            
-            # Definir arquivo de saída
-            if arquivo_saida is None:
-                base_name = os.path.splitext(nome_arquivo)[0]
-                arquivo_saida = f"{base_name}_ordenado.csv"
-            
-            # Mover arquivo final para destino
-            shutil.move(arquivo_final, arquivo_saida)
-            
-            print(f"Ordenação concluída. Arquivo salvo em: {arquivo_saida}")
-            return arquivo_saida
+        Args:
+            runs: Lista de arquivos de runs, na ordem da entrada
             
-        finally:
-            # Limpar arquivos temporários
-            self._limpar_arquivos_temporarios()
+        Returns:
+            Lista de cadeias (listas de runs), na ordem da entrada
+        """
+        entradas = []
+        primeira = ultima = None
+        for run in runs:
+            limites = self._limites_runs.get(run)
+            if ultima is not None and limites is not None:
+                if limites[0] >= ultima:
+                    entradas[-1].append(run)
+                    ultima = limites[1]
+                    continue
+                if limites[1] < primeira:
+                    entradas[-1].insert(0, run)
+                    primeira = limites[0]
+                    continue
+            entradas.append([run])
+            primeira, ultima = limites if limites is not None else (None, None)
+        return entradas
     
-    def _dividir_em_runs(self, nome_arquivo: str, coluna_chave: Union[str, int], 
-                        ordem: str) -> List[str]:
+    def _reduzir_runs(self, entradas: List[List[str]],
+                      fan_in: Optional[int] = None) -> List[List[str]]:
         """
-        Divide o arquivo original em runs menores ordenados.
+        Executa as passadas de merge intermediárias até restarem no máximo
+        `fan_in` entradas, que podem ser mescladas de uma vez no merge final.
+        
+        Cada entrada é um run ou uma cadeia de runs já em ordem entre si
+        (`_encadear_runs`), lida como um único run. Cada passada mescla até
+        `fan_in` entradas de uma vez (merge k-way). Na primeira passada só
+        são mescladas as entradas necessárias para que as passadas seguintes
+        sejam completas, o que minimiza o número de passadas e a quantidade
+        de dados reescritos em disco. As passadas intermediárias gravam runs
+        binários.
+        
+        Com `cota_disco` o fan-in pode ser reduzido para que os merges
+        caibam no espaço livre (veja `_planejar_cota`).
         
         Args:
-            nome_arquivo: Arquivo CSV original
-            coluna_chave: Coluna de ordenação
-            ordem: Ordem de classificação
+            entradas: Lista de cadeias de runs
+            fan_in: Máximo de entradas que podem restar (padrão: o fan-in
+                   efetivo)
             
         Returns:
-            Lista com caminhos dos arquivos de runs
+            Entradas restantes para o merge final
         """
-        runs = []
+        if fan_in is None:
+            fan_in = self._fan_in_efetivo()
+        if self.cota_disco is not None and self.manifesto is None:
+            fan_in = self._planejar_cota(entradas, fan_in)
+        passes_restantes = self._calcular_passes(len(entradas), fan_in)
         
-        with open(nome_arquivo, 'r', encoding='utf-8', newline='') as arquivo:
-            reader = csv.reader(arquivo)
-            
-            # Ler cabeçalho
-            try:
-                cabecalho = next(reader)
-                print(f"Cabeçalho encontrado: {cabecalho}")
-            except StopIteration:
-                raise ValueError("Arquivo CSV está vazio")
-            
-            # Determinar índice da coluna chave
-            if isinstance(coluna_chave, str):
-                try:
-                    indice_chave = cabecalho.index(coluna_chave)
-                except ValueError:
-                    raise ValueError(f"Coluna '{coluna_chave}' não encontrada no cabeçalho")
-            else:
-                indice_chave = coluna_chave
-                if indice_chave >= len(cabecalho):
-                    raise ValueError(f"Índice da coluna {indice_chave} está fora do intervalo")
-            
-            print(f"Usando coluna índice {indice_chave} como chave de ordenação")
+        while passes_restantes > 1:
+            # Quantas entradas podem restar ao fim desta passada
+            limite = fan_in ** (passes_restantes - 1)
+            excesso = len(entradas) - limite
             
-            buffer = []
-            run_numero = 0
-            
-            for linha in reader:
-                if len(linha) <= indice_chave:
-                    continue  # Pular linhas com dados insuficientes
-                
-                buffer.append(linha)
-                
-                # Quando o buffer está cheio, ordena e salva como run
-                if len(buffer) >= self.tamanho_buffer:
-                    run_arquivo = self._salvar_run(buffer, cabecalho, indice_chave, 
-                                                 ordem, run_numero)
-                    runs.append(run_arquivo)
-                    buffer = []
-                    run_numero += 1
+            novas_entradas = []
+            i = 0
+            while excesso > 0:
+                # Cada merge de k entradas reduz a contagem em k - 1
+                k = min(fan_in, excesso + 1)
+                novas_entradas.append(self._merge_k_runs(entradas[i:i + k]))
+                excesso -= k - 1
+                i += k
             
-            # Salvar último run se houver dados restantes
-            if buffer:
-                run_arquivo = self._salvar_run(buffer, cabecalho, indice_chave, 
-                                             ordem, run_numero)
-                runs.append(run_arquivo)
+            # Entradas não mescladas seguem para a próxima passada sem reescrita
+            consumidas = entradas[:i]
+            entradas = novas_entradas + entradas[i:]
+            passes_restantes -= 1
+            self._concluir_passada(len(entradas))
+            self._registrar_passada([run for entrada in entradas for run in entrada])
+            if self.manifesto is not None:
+                # Só depois que o manifesto deixa de listá-los
+                for run in itertools.chain.from_iterable(consumidas):
+                    self._descartar_run(run)
         
-        return runs
+        return entradas
     
-    def _salvar_run(self, buffer: List[List[str]], cabecalho: List[str], 
-                   indice_chave: int, ordem: str, run_numero: int) -> str:
+    def _planejar_cota(self, entradas: List[List[str]], fan_in: int) -> int:
         """
-        Ordena um buffer de dados e salva como arquivo de run.
+        Escolhe o fan-in e o tamanho dos segmentos para que os merges caibam
+        em `cota_disco`.
+        
+        Como os runs consumidos são removidos durante o merge, um merge de k
+        entradas ocupa além do já usado (em `ordenar_multiplas`, inclusive
+        pelos runs das outras ordenações) no máximo o maior arquivo de cada
+        entrada (que pode estar sendo lido) e o segmento em gravação. Os
+        merges intermediários gravam segmentos de no máximo o tamanho do
+        maior run atual, então o limite calculado vale para todas as
+        passadas. Arquivos que não são temporários (entradas de
+        `mesclar_arquivos`) não são removidos e contam por inteiro.
         
         Args:
-            buffer: Lista de registros a serem ordenados
-            cabecalho: Cabeçalho do CSV
-            indice_chave: Índice da coluna chave
-            ordem: Ordem de classificação
-            run_numero: Número do run para nomenclatura
+            entradas: Cadeias de runs a reduzir
+            fan_in: Fan-in pretendido
             
         Returns:
-            Caminho do arquivo de run salvo
+            Fan-in que cabe na cota
         """
-        # Ordenar buffer usando merge sort interno
-        buffer_ordenado = self._merge_sort_interno(buffer, indice_chave, ordem)
+        def ocupacao(entrada):
+            temporarios = [self._tamanhos_temporarios[run] for run in entrada
+                           if run in self._tamanhos_temporarios]
+            externos = sum(os.path.getsize(run) for run in entrada
+                           if run not in self._tamanhos_temporarios)
+            return max(temporarios, default=0) + externos
         
-        # Salvar run ordenado
-        if self.diretorio_temp is None:
-            raise ValueError("Diretório temporário não foi criado")
-        run_arquivo = os.path.join(self.diretorio_temp, f"run_{run_numero}.csv")
-        
-        with open(run_arquivo, 'w', encoding='utf-8', newline='') as arquivo:
-            writer = csv.writer(arquivo)
-            writer.writerow(cabecalho)
-            writer.writerows(buffer_ordenado)
+        ocupacoes = sorted(map(ocupacao, entradas), reverse=True)
+        segmento = max(self._tamanhos_temporarios.values(), default=0)
+        livre = self.cota_disco - self._uso_disco['atual']
+        k = min(fan_in, len(entradas))
+        while k > 2 and sum(ocupacoes[:k]) + segmento > livre:
+            k -= 1
+        if len(entradas) > 1 and sum(ocupacoes[:k]) + segmento > livre:
+            raise ValueError(f"Cota de disco temporário insuficiente para o merge: "
+                             f"{livre} bytes livres, {sum(ocupacoes[:k]) + segmento} necessários "
+                             f"(reduza o tamanho dos runs ou aumente cota_disco)")
         
-        self.arquivos_temporarios.append(run_arquivo)
-        return run_arquivo
+        # Segmentos com o número de registros que ocupa `segmento` bytes
+        registros = sum(self._registros_runs.get(run, 0) for entrada in entradas for run in entrada)
+        tamanho = sum(map(os.path.getsize, itertools.chain.from_iterable(entradas)))
+        if registros and tamanho:
+            self._registros_segmento = max(REGISTROS_POR_BLOCO, segmento * registros // tamanho)
+        if k < fan_in and k < len(entradas):
+            self._emitir('cota_disco', f"Fan-in reduzido para {k} para caber na cota de disco",
+                         fan_in=k, livre=livre, segmento=segmento)
+        return max(k, 2)
     
-    def _merge_sort_interno(self, dados: List[List[str]], indice_chave: int, 
-                           ordem: str) -> List[List[str]]:
+    def _calcular_passes(self, num_runs: int, fan_in: int) -> int:
         """
-        Implementa merge sort para dados em memória.
+        Calcula o número mínimo de passadas de merge para um fan-in.
         
         Args:
-            dados: Lista de registros
-            indice_chave: Índice da coluna chave
-            ordem: Ordem de classificação
+            num_runs: Quantidade de runs a mesclar
+            fan_in: Número máximo de runs por merge
             
         Returns:
-            Lista ordenada de registros
+            Número de passadas necessárias
         """
-        if len(dados) <= 1:
-            return dados
-        
-        meio = len(dados) // 2
-        esquerda = self._merge_sort_interno(dados[:meio], indice_chave, ordem)
-        direita = self._merge_sort_interno(dados[meio:], indice_chave, ordem)
+        passes = 0
+        while num_runs > 1:
+            num_runs = -(-num_runs // fan_in)
+            passes += 1
+        return passes
+    
+    def _fan_in_efetivo(self) -> int:
+        """
+        Fan-in usado no merge, limitado para que cada run e a saída recebam
+        pelo menos `BUFFER_MINIMO_MERGE` bytes do orçamento de memória.
+        """
+        if self.memoria_max is None:
+            return self.fan_in
+        return max(2, min(self.fan_in, self.memoria_max // BUFFER_MINIMO_MERGE - 1))
+    
+    def _buffer_merge(self, num_runs: int) -> int:
+        """
+        Tamanho do buffer de E/S de cada arquivo em um merge de `num_runs` runs.
         
-        return self._merge_interno(esquerda, direita, indice_chave, ordem)
+        O orçamento de memória é dividido igualmente entre os buffers de
+        leitura dos runs e o buffer de escrita da saída (no modo assíncrono,
+        também entre os blocos em espera de cada arquivo). Sem `memoria_max`
+        usa `tamanho_bloco_io` ou o buffer padrão do Python (-1).
+        """
+        if self.memoria_max is None:
+            return -1 if self.tamanho_bloco_io is None else self.tamanho_bloco_io
+        fatias = (num_runs + 1) * (self.blocos_antecipados + 1 if self.io_assincrono else 1)
+        return max(io.DEFAULT_BUFFER_SIZE, self.memoria_max // fatias)
+    
+    def _profundidade_io(self) -> int:
+        """Blocos em espera por arquivo nas threads de E/S (0 = síncrono)."""
+        return self.blocos_antecipados if self.io_assincrono else 0
     
-    def _merge_interno(self, esquerda: List[List[str]], direita: List[List[str]], 
-                      indice_chave: int, ordem: str) -> List[List[str]]:
+    def _merge_k_runs(self, entradas: List[List[str]], final: bool = False) -> List[str]:
         """
-        Faz o merge de duas listas ordenadas.
+        Faz o merge k-way de vários arquivos de runs em um novo arquivo.
+        
+        Fora da ordenação retomável os runs temporários consumidos são
+        removidos ao final do merge (os de uma cadeia, assim que terminam de
+        ser lidos). Com `_registros_segmento` definido (cota de disco), o
+        run mesclado é gravado em segmentos com esse número de registros,
+        que formam uma cadeia.
         
         Args:
-            esquerda: Lista ordenada da esquerda
-            direita: Lista ordenada da direita
-            indice_chave: Índice da coluna chave
-            ordem: Ordem de classificação
+            entradas: Runs a serem mesclados; cada entrada é uma cadeia de
+                     runs lida em sequência (veja `_encadear_runs`)
+            final: Se True grava o resultado em CSV; senão, em um novo run
             
         Returns:
-            Lista mesclada e ordenada
+            Arquivos gravados: o CSV final ou a cadeia do run mesclado
         """
-        resultado = []
-        i = j = 0
+        if self.diretorio_temp is None:
+            raise ValueError("Diretório temporário não foi criado")
+        numero = self._proximo_merge
+        self._proximo_merge += 1
+        arquivo_mesclado = (os.path.join(self.diretorio_temp, f"merged_{numero}.csv") if final
+                            else self._caminho_temporario(f"merged_{numero}.run"))
+        gravados = [arquivo_mesclado]
         
-        while i < len(esquerda) and j < len(direita):
-            if self._comparar_registros(esquerda[i], direita[j], indice_chave, ordem):
-                resultado.append(esquerda[i])
-                i += 1
+        inicio = time.perf_counter()
+        runs = [run for entrada in entradas for run in entrada]
+        # Medido antes, pois os runs podem ser removidos durante o merge
+        bytes_lidos = sum(map(os.path.getsize, runs))
+        descartar = self.manifesto is None
+        buffer_io = self._buffer_merge(len(entradas))
+        leitores = self._abrir_runs(entradas, descartar)
+        try:
+            # Cabeçalhos assumidos iguais em todos os runs
+            cabecalho = leitores[0].cabecalho
+            
+            if final and self.formato_saida_atual is not None:
+                formato = self.formato_saida_atual
+                with formato.abrir(arquivo_mesclado, 'wb') as saida:
+                    formato.gravar(saida, cabecalho, (linha for _, linha in self._mesclar(leitores)))
+            elif final and self._arquivo_mapeado is not None:
+                self._indice_saida = _copiar_registros(
+                    self._arquivo_mapeado, arquivo_mesclado, self._mesclar(leitores), buffer_io,
+                    intervalo=self.intervalo_indice_atual)
+            elif final and self.intervalo_indice_atual is not None:
+                self._indice_saida = self._gravar_csv_indexado(
+                    arquivo_mesclado, cabecalho, self._mesclar(leitores), buffer_io)
+            elif final:
+                with open(arquivo_mesclado, 'w', encoding='utf-8', newline='',
+                          buffering=buffer_io) as saida:
+                    registros = (linha for _, linha in self._mesclar(leitores))
+                    if self.io_assincrono:
+                        self._gravar_csv_assincrono(saida, cabecalho, registros, buffer_io)
+                    else:
+                        writer = csv.writer(saida)
+                        writer.writerow(cabecalho)
+                        writer.writerows(registros)
             else:
-                resultado.append(direita[j])
-                j += 1
+                pares = self._mesclar(leitores)
+                while True:
+                    escritor = EscritorRun(gravados[-1], cabecalho, self.compressao_runs,
+                                           buffering=buffer_io,
+                                           profundidade_assincrona=self._profundidade_io())
+                    try:
+                        if self._registros_segmento is None:
+                            escritor.escrever_varios(pares)
+                        else:
+                            escritor.escrever_varios(
+                                itertools.islice(pares, self._registros_segmento))
+                    finally:
+                        tamanho = escritor.fechar()
+                    if escritor.registros == 0 and len(gravados) > 1:
+                        os.remove(gravados.pop())
+                        break
+                    self._registros_runs[escritor.caminho] = escritor.registros
+                    if escritor.limites is not None:
+                        self._limites_runs[escritor.caminho] = escritor.limites
+                    self._registrar_disco(tamanho, escritor.caminho)
+                    if (self._registros_segmento is None
+                            or escritor.registros < self._registros_segmento):
+                        break
+                    self.arquivos_temporarios.append(escritor.caminho)
+                    gravados.append(self._caminho_temporario(
+                        f"merged_{numero}_{len(gravados)}.run"))
+        finally:
+            for leitor in leitores:
+                leitor.fechar()
         
-        # Adicionar elementos restantes
-        resultado.extend(esquerda[i:])
-        resultado.extend(direita[j:])
+        self.arquivos_temporarios.append(gravados[-1])
         
-        return resultado
+        if final:
+            bytes_escritos = os.path.getsize(arquivo_mesclado)
+            self._registrar_disco(bytes_escritos, arquivo_mesclado)
+        else:
+            bytes_escritos = sum(self._tamanhos_temporarios[arquivo] for arquivo in gravados)
+        registros = sum(self._registros_runs.get(run, 0) for run in runs)
+        if self.limite_atual is not None:
+            registros = min(registros, self.limite_atual)
+        comparacoes = registros * self._comparacoes_heap(len(entradas))
+        self.estatisticas['bytes_lidos'] += bytes_lidos
+        self.estatisticas['comparacoes'] += comparacoes
+        if descartar:
+            for run in runs:
+                self._descartar_run(run)
+        self._emitir('merge_concluido', runs=len(runs), registros=registros,
+                     bytes_lidos=bytes_lidos, bytes_escritos=bytes_escritos,
+                     segundos=time.perf_counter() - inicio, comparacoes=comparacoes,
+                     disco_temporario=self.estatisticas['disco_temporario'])
+        return gravados
     
-    def _merge_externo(self, runs: List[str], coluna_chave: Union[str, int], 
-                      ordem: str) -> str:
+    def _gravar_csv_indexado(self, arquivo_saida: str, cabecalho: List[str],
+                             pares: Iterator[Tuple[bytes, List[str]]],
+                             tamanho_buffer: int) -> List[Tuple[bytes, int]]:
         """
-        Realiza o merge externo dos runs ordenados.
+        Grava a saída CSV anotando o índice esparso (`intervalo_indice_atual`).
+        
+        No modo assíncrono os lotes formatados são gravados por uma thread
+        de fundo; as posições são contadas pelo tamanho de cada lote.
         
         Args:
-            runs: Lista de arquivos de runs
-            coluna_chave: Coluna de ordenação
-            ordem: Ordem de classificação
+            arquivo_saida: Caminho do CSV de saída
+            cabecalho: Cabeçalho do CSV
+            pares: Pares (chave, registro) em ordem
+            tamanho_buffer: Buffer de escrita da saída
             
         Returns:
-            Caminho do arquivo final ordenado
+            Lista de (chave, posição) do índice
         """
-        while len(runs) > 1:
-            novos_runs = []
-            
-            # Processar runs em pares
-            for i in range(0, len(runs), 2):
-                if i + 1 < len(runs):
-                    # Merge de dois runs
-                    run_mesclado = self._merge_dois_runs(runs[i], runs[i + 1], ordem)
-                    novos_runs.append(run_mesclado)
-                else:
-                    # Run ímpar - apenas renomear
-                    novos_runs.append(runs[i])
-            
-            runs = novos_runs
-            print(f"Merge externo: {len(runs)} runs restantes")
+        with open(arquivo_saida, 'wb', buffering=tamanho_buffer) as saida:
+            if not self.io_assincrono:
+                return _gravar_csv_indexado(saida.write, pares, self.intervalo_indice_atual,
+                                            cabecalho=cabecalho)[0]
+            gravacao = _GravacaoAssincrona(self.blocos_antecipados)
+            try:
+                return _gravar_csv_indexado(
+                    lambda dados: gravacao.enviar(functools.partial(saida.write, dados)),
+                    pares, self.intervalo_indice_atual, cabecalho=cabecalho)[0]
+            finally:
+                gravacao.fechar()
+    
+    def _gravar_csv_assincrono(self, saida, cabecalho: List[str],
+                               registros: Iterator[List[str]], tamanho_bloco: int):
+        """
+        Formata o CSV em blocos na memória e os grava em uma thread de fundo.
         
-        return runs[0]
+        Args:
+            saida: Arquivo de texto de destino
+            cabecalho: Cabeçalho do CSV
+            registros: Registros ordenados
+            tamanho_bloco: Tamanho aproximado (em caracteres) de cada bloco
+        """
+        if tamanho_bloco <= 0:
+            tamanho_bloco = TAMANHO_BLOCO_CSV
+        gravacao = _GravacaoAssincrona(self.blocos_antecipados)
+        try:
+            bloco = io.StringIO()
+            writer = csv.writer(bloco)
+            writer.writerow(cabecalho)
+            for linha in registros:
+                writer.writerow(linha)
+                if bloco.tell() >= tamanho_bloco:
+                    gravacao.enviar(functools.partial(saida.write, bloco.getvalue()))
+                    bloco = io.StringIO()
+                    writer = csv.writer(bloco)
+            gravacao.enviar(functools.partial(saida.write, bloco.getvalue()))
+        finally:
+            gravacao.fechar()
     
-    def _merge_dois_runs(self, run1: str, run2: str, ordem: str) -> str:
+    def _abrir_runs(self, entradas: List[List[str]],
+                    descartar: bool = False) -> List[LeitorRun]:
         """
-        Faz o merge de dois arquivos de runs.
+        Abre as entradas de um merge com o buffer de leitura definido pelo
+        orçamento. Uma cadeia de vários runs é aberta como `_LeitorEncadeado`;
+        o CSV da passagem direta e as entradas de `mesclar_arquivos`, como
+        `_LeitorRunCsv`.
         
         Args:
-            run1: Caminho do primeiro run
-            run2: Caminho do segundo run
-            ordem: Ordem de classificação
+            entradas: Cadeias de runs
+            descartar: Se True, cada run de uma cadeia é removido assim que
+                      termina de ser lido (veja `_descartar_run`)
             
         Returns:
-            Caminho do arquivo mesclado
+            Leitores abertos (o chamador deve fechá-los)
         """
-        if self.diretorio_temp is None:
-            raise ValueError("Diretório temporário não foi criado")
-        arquivo_mesclado = os.path.join(self.diretorio_temp, 
-                                       f"merged_{len(self.arquivos_temporarios)}.csv")
-        
-        with open(run1, 'r', encoding='utf-8', newline='') as f1, \
-             open(run2, 'r', encoding='utf-8', newline='') as f2, \
-             open(arquivo_mesclado, 'w', encoding='utf-8', newline='') as saida:
-            
-            reader1 = csv.reader(f1)
-            reader2 = csv.reader(f2)
-            writer = csv.writer(saida)
-            
-            # Ler cabeçalhos
-            cabecalho1 = next(reader1)
-            cabecalho2 = next(reader2)
-            writer.writerow(cabecalho1)  # Assumindo que são iguais
-            
-            # Determinar índice da coluna chave
-            coluna_chave = self._get_coluna_chave()
-            if isinstance(coluna_chave, str):
-                indice_chave = cabecalho1.index(coluna_chave)
-            else:
-                indice_chave = coluna_chave if coluna_chave is not None else 0
-            
-            # Ler primeira linha de cada arquivo
-            try:
-                linha1 = next(reader1)
-                tem_linha1 = True
-            except StopIteration:
-                tem_linha1 = False
-                linha1 = []
-            
-            try:
-                linha2 = next(reader2)
-                tem_linha2 = True
-            except StopIteration:
-                tem_linha2 = False
-                linha2 = []
-            
-            # Merge das linhas
-            while tem_linha1 and tem_linha2:
-                if self._comparar_registros(linha1, linha2, indice_chave, ordem):
-                    writer.writerow(linha1)
-                    try:
-                        linha1 = next(reader1)
-                    except StopIteration:
-                        tem_linha1 = False
-                else:
-                    writer.writerow(linha2)
-                    try:
-                        linha2 = next(reader2)
-                    except StopIteration:
-                        tem_linha2 = False
-            
-            # Escrever linhas restantes
-            if tem_linha1:
-                writer.writerow(linha1)
-                writer.writerows(reader1)
-            
-            if tem_linha2:
-                writer.writerow(linha2)
-                writer.writerows(reader2)
+        buffer_io = self._buffer_merge(len(entradas))
         
-        self.arquivos_temporarios.append(arquivo_mesclado)
-        return arquivo_mesclado
+        def abrir(run: str):
+            if run in self._entradas_csv:
+                return _LeitorRunCsv(run, self.extrator_chave, buffering=buffer_io,
+                                     cabecalho=self._entradas_csv[run], verificar=True,
+                                     contagens=self._registros_runs)
+            if run.endswith('.csv'):
+                return _LeitorRunCsv(run, self.extrator_chave, buffering=buffer_io)
+            return LeitorRun(run, buffering=buffer_io,
+                             profundidade_assincrona=self._profundidade_io())
+        
+        leitores = []
+        try:
+            for entrada in entradas:
+                leitores.append(abrir(entrada[0]) if len(entrada) == 1
+                                else _LeitorEncadeado(entrada, abrir,
+                                                      self._descartar_run if descartar else None))
+        except BaseException:
+            for leitor in leitores:
+                leitor.fechar()
+            raise
+        return leitores
+    
+    def _mesclar(self, leitores: List[LeitorRun]) -> Iterator[Tuple[bytes, List[str]]]:
+        """
+        Intercala os runs aplicando a redução (se houver) e interrompendo o
+        merge após `limite_atual` registros.
+        """
+        pares = self._intercalar(leitores)
+        if self.reducao_atual is not None:
+            pares = self.reducao_atual.reduzir(pares)
+        if self.limite_atual is not None:
+            pares = itertools.islice(pares, self.limite_atual)
+        return pares
     
-    def _comparar_registros(self, reg1: List[str], reg2: List[str], 
-                           indice_chave: int, ordem: str) -> bool:
+    @staticmethod
+    def _intercalar(leitores: List[LeitorRun]) -> Iterator[Tuple[bytes, List[str]]]:
         """
-        Compara dois registros baseado na chave de ordenação.
+        Intercala runs ordenados usando uma fila de prioridade (merge k-way).
+        
+        A fila compara as chaves já codificadas gravadas nos runs, sem
+        reprocessar os registros.
         
         Args:
-            reg1: Primeiro registro
-            reg2: Segundo registro
-            indice_chave: Índice da coluna chave
-            ordem: Ordem de classificação
+            leitores: Leitores dos runs a mesclar
             
-        Returns:
-            True se reg1 deve vir antes de reg2
+        Yields:
+            Pares (chave, registro) em ordem
         """
-        if indice_chave >= len(reg1) or indice_chave >= len(reg2):
-            return False
+        iteradores = [iter(leitor) for leitor in leitores]
+        
+        # Carregar o primeiro registro de cada run na fila de prioridade.
+        # O índice do run desempata chaves iguais (merge estável).
+        heap = []
+        for indice_run, iterador in enumerate(iteradores):
+            par = next(iterador, None)
+            if par is not None:
+                chave, linha = par
+                heap.append((chave, indice_run, linha))
+        heapq.heapify(heap)
+        
+        while heap:
+            chave, indice_run, linha = heap[0]
+            yield chave, linha
+            
+            par = next(iteradores[indice_run], None)
+            if par is None:
+                heapq.heappop(heap)
+            else:
+                chave, linha = par
+                heapq.heapreplace(heap, (chave, indice_run, linha))
+    
+    def _limpar_arquivos_temporarios(self):
+        """Remove todos os arquivos temporários criados durante o processo."""
+        diretorios = [diretorio for diretorio in self.diretorios_spill if os.path.exists(diretorio)]
+        if diretorios:
+            for diretorio in diretorios:
+                shutil.rmtree(diretorio)
+            self._uso_disco['atual'] -= self.estatisticas['disco_temporario']
+            self.estatisticas['disco_temporario'] = 0
+            self._tamanhos_temporarios = {}
+            self._emitir('limpeza', "Arquivos temporários removidos",
+                         diretorio=self.diretorio_temp)
+
+
+def _carregar_indice_esparso(arquivo_csv: str, arquivo_indice: Optional[str] = None) -> dict:
+    """
+    Lê o índice esparso de um CSV ordenado e confere se ainda corresponde a ele.
+    
+    Args:
+        arquivo_csv: CSV ordenado
+        arquivo_indice: Índice esparso (padrão: `arquivo_csv` + '.idx')
         
-        chave1 = reg1[indice_chave]
-        chave2 = reg2[indice_chave]
+    Returns:
+        Conteúdo do índice (veja `OrdenacaoExterna._gravar_indice_esparso`)
+    """
+    if arquivo_indice is None:
+        arquivo_indice = arquivo_csv + EXTENSAO_INDICE
+    with open(arquivo_indice, 'r', encoding='utf-8') as arquivo:
+        indice = json.load(arquivo)
+    if indice.get('versao') != VERSAO_INDICE:
+        raise ValueError(f"Índice {arquivo_indice} tem versão não suportada")
+    if os.path.getsize(arquivo_csv) != indice['tamanho']:
+        raise ValueError(f"Índice {arquivo_indice} não corresponde a {arquivo_csv} "
+                         f"(o arquivo foi alterado depois da ordenação)")
+    return indice
+
+
+class ArquivoIndexado:
+    """
+    Consultas por chave em um CSV ordenado que tem índice esparso.
+    
+    O índice (gravado por `ordenar_arquivo` com `intervalo_indice`) dá a
+    chave e a posição de um registro a cada N. Uma consulta procura no
+    índice a última entrada antes da chave buscada, posiciona o arquivo nela
+    com um único seek e lê no máximo N registros até chegar à faixa pedida.
+    
+    Os valores de busca seguem as colunas da chave: um valor para chave
+    simples, uma tupla para chave composta, que pode cobrir só as primeiras
+    colunas (prefixo). Eles são convertidos e codificados como os campos do
+    CSV, então a comparação é a mesma da ordenação (inclusive colunas
+    decrescentes e colações).
+    
+    Exemplo:
+        with ArquivoIndexado('dados_ordenados.csv') as arquivo:
+            registros = arquivo.buscar(42)
+            for linha in arquivo.intervalo(100, 200):
+                ...
+    """
+    
+    def __init__(self, arquivo_csv: str, arquivo_indice: Optional[str] = None):
+        """
+        Args:
+            arquivo_csv: CSV ordenado
+            arquivo_indice: Índice esparso (padrão: `arquivo_csv` + '.idx')
+        """
+        indice = _carregar_indice_esparso(arquivo_csv, arquivo_indice)
+        self.colunas = [ColunaChave(*coluna) for coluna in indice['colunas']]
+        self._extrator = ExtratorChave(self.colunas)
+        self._chaves = [bytes.fromhex(chave) for chave in indice['chaves']]
+        self._posicoes = indice['posicoes']
+        self._arquivo = open(arquivo_csv, 'rb')
+        texto = io.TextIOWrapper(self._arquivo, encoding='utf-8', newline='')
+        self.cabecalho = next(csv.reader(texto), [])
+        texto.detach()
+    
+    def buscar(self, valores) -> List[List[str]]:
+        """
+        Retorna os registros cuja chave é igual a `valores` (ou começa com
+        eles, se forem só as primeiras colunas de uma chave composta).
+        """
+        chave = self._codificar(valores)
+        pares = itertools.takewhile(lambda par: par[0].startswith(chave),
+                                    self._pares_a_partir(chave))
+        return [linha for _, linha in pares]
+    
+    def intervalo(self, inicio=None, fim=None) -> Iterator[List[str]]:
+        """
+        Percorre, na ordem do arquivo, os registros de `inicio` (inclusive)
+        até `fim` (exclusive); None não limita aquele lado. Em colunas
+        decrescentes `inicio` é o maior valor.
         
-        # Tentar conversão numérica
+        O iterador usa o arquivo aberto: consuma-o antes da próxima consulta.
+        """
+        pares = self._pares_a_partir(None if inicio is None else self._codificar(inicio))
+        if fim is not None:
+            pares = _filtrar_intervalo(pares, None, self._codificar(fim))
+        return (linha for _, linha in pares)
+    
+    def fechar(self):
+        self._arquivo.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *excecao):
+        self.fechar()
+    
+    def _codificar(self, valores) -> bytes:
+        """Codifica valores de busca como as primeiras colunas da chave."""
+        if not isinstance(valores, (tuple, list)):
+            valores = (valores,)
+        if not 1 <= len(valores) <= len(self.colunas):
+            raise ValueError(f"Informe de 1 a {len(self.colunas)} valores de chave")
+        colunas = [coluna._replace(coluna=i) for i, coluna in enumerate(self.colunas[:len(valores)])]
+        return ExtratorChave(colunas)([valor if isinstance(valor, str) else str(valor)
+                                       for valor in valores])
+    
+    def _pares_a_partir(self, chave: Optional[bytes]) -> Iterator[Tuple[bytes, List[str]]]:
+        """Pares (chave, registro) a partir do primeiro registro com chave >= `chave`."""
+        if not self._posicoes:
+            return
+        # Última entrada com chave menor: registros iguais podem começar antes
+        # da primeira entrada igual
+        entrada = 0 if chave is None else max(bisect.bisect_left(self._chaves, chave) - 1, 0)
+        self._arquivo.seek(self._posicoes[entrada])
+        texto = io.TextIOWrapper(self._arquivo, encoding='utf-8', newline='')
         try:
-            chave1_num = float(chave1)
-            chave2_num = float(chave2)
-            comparacao = chave1_num <= chave2_num
-        except ValueError:
-            # Comparação como string
-            comparacao = chave1 <= chave2
+            extrator = self._extrator
+            pares = ((extrator(linha), linha) for linha in csv.reader(texto))
+            yield from _filtrar_intervalo(pares, chave, None)
+        finally:
+            texto.detach()
+
+
+def _permutacao_vetorizada(chaves: List[bytes]):
+    """
+    Calcula com NumPy a permutação estável que ordena as chaves codificadas.
+    
+    As codificações de `ExtratorChave` nunca são prefixo uma da outra, então
+    completar as chaves com bytes nulos até a mesma largura preserva a ordem.
+    Cada chave vira uma linha de inteiros de 64 bits big-endian, ordenada
+    com `argsort` estável (uma coluna) ou `lexsort` (várias colunas).
+    
+    Args:
+        chaves: Chaves codificadas
         
-        return comparacao if ordem == 'asc' else not comparacao
+    Returns:
+        Array de índices em ordem, ou None se alguma chave tem mais de
+        `LARGURA_MAXIMA_VETORIZADA` bytes
+    """
+    largura = max(map(len, chaves))
+    if largura > LARGURA_MAXIMA_VETORIZADA:
+        return None
+    colunas = (largura + 7) // 8
+    # O dtype 'S' completa cada chave com bytes nulos até a largura
+    matriz = (np.array(chaves, dtype=f'S{colunas * 8}').view('>u8')
+              .astype(np.uint64).reshape(len(chaves), colunas))
+    if colunas == 1:
+        return np.argsort(matriz[:, 0], kind='stable')
+    # No lexsort a última coluna informada é a mais significativa
+    return np.lexsort(matriz.T[::-1])
+
+
+def _ordenar_pares(pares: List[Tuple[bytes, Any]], contador: List[int],
+                   vetorizada: bool = False) -> List[Tuple[bytes, Any]]:
+    """
+    Ordena pares (chave codificada, registro) de forma estável.
     
-    def _get_coluna_chave(self):
-        """Método auxiliar para obter a coluna chave (usado no merge externo)"""
-        return self.coluna_chave_atual
+    Pares que já estão em ordem são devolvidos como estão e pares em ordem
+    estritamente decrescente são invertidos, com n - 1 comparações. Com
+    `vetorizada` e chaves curtas a permutação é calculada pelo NumPy e os
+    pares são reordenados de uma vez; as comparações são então estimadas em
+    n * ceil(log2(n)). Caso contrário usa o merge sort interno, que conta as
+    comparações exatas.
     
-    def _limpar_arquivos_temporarios(self):
-        """Remove todos os arquivos temporários criados durante o processo."""
-        if self.diretorio_temp and os.path.exists(self.diretorio_temp):
-            shutil.rmtree(self.diretorio_temp)
-            print("Arquivos temporários removidos")
+    Args:
+        pares: Pares a ordenar
+        contador: Lista de um elemento que acumula o número de comparações
+        vetorizada: Se True, tenta a ordenação com NumPy
+        
+    Returns:
+        Lista ordenada de pares
+    """
+    if len(pares) <= 1:
+        return pares
+    
+    # Buffers já em ordem (ou em ordem estritamente decrescente, que pode ser
+    # invertida sem perder a estabilidade) não precisam ser ordenados
+    chaves = [chave for chave, _ in pares]
+    if all(map(operator.le, chaves, itertools.islice(chaves, 1, None))):
+        contador[0] += len(pares) - 1
+        return pares
+    if all(map(operator.gt, chaves, itertools.islice(chaves, 1, None))):
+        contador[0] += len(pares) - 1
+        return pares[::-1]
+    
+    if vetorizada:
+        permutacao = _permutacao_vetorizada(chaves)
+        if permutacao is not None:
+            contador[0] += len(pares) * math.ceil(math.log2(len(pares)))
+            return [pares[i] for i in permutacao.tolist()]
+    return OrdenacaoExterna._merge_sort_interno(pares, contador)
+
+
+def _ordenar_e_gravar_run(buffer: List[List[str]], cabecalho: List[str],
+                          extrator: ExtratorChave, run_arquivo: str,
+                          compressao: Optional[str] = None,
+                          limite: Optional[int] = None,
+                          reducao: Optional[ReducaoRegistros] = None,
+                          vetorizada: bool = False) -> Tuple[int, int, int, float, Optional[tuple]]:
+    """
+    Ordena um buffer e grava o run correspondente.
+    
+    Função de módulo para que possa ser executada nos processos do pool.
+    
+    Args:
+        buffer: Lista de registros a serem ordenados
+        cabecalho: Cabeçalho do CSV
+        extrator: Extrator da chave de ordenação
+        run_arquivo: Caminho do arquivo de run
+        compressao: Compressão por bloco do run (None, 'zlib' ou 'lz4')
+        limite: Se informado, grava só os `limite` primeiros registros
+        reducao: Remoção de duplicatas ou agregação aplicada ao run
+        vetorizada: Se True, tenta ordenar com NumPy (`_ordenar_pares`)
+        
+    Returns:
+        Tupla (bytes gravados, registros gravados, comparações de chave,
+        segundos gastos, primeira e última chaves gravadas ou None)
+    """
+    inicio = time.perf_counter()
+    contador = [0]
+    
+    # Decodificar cada chave uma única vez e ordenar os pares
+    pares = [(extrator(linha), linha) for linha in buffer]
+    pares_ordenados = _ordenar_pares(pares, contador, vetorizada)
+    
+    if reducao is not None:
+        pares_ordenados = itertools.islice(reducao.reduzir(pares_ordenados, projetar=True), limite)
+    else:
+        pares_ordenados = pares_ordenados[:limite]
+    
+    escritor = EscritorRun(run_arquivo, cabecalho, compressao)
+    escritor.escrever_varios(pares_ordenados)
+    tamanho = escritor.fechar()
+    return (tamanho, escritor.registros, contador[0], time.perf_counter() - inicio,
+            escritor.limites)
+
+
+def _ordenar_e_gravar_indice(buffer: _IndiceRegistros, cabecalho: List[str],
+                             extrator: ExtratorChave, run_arquivo: str,
+                             compressao: Optional[str] = None,
+                             limite: Optional[int] = None,
+                             reducao: Optional[ReducaoRegistros] = None,
+                             vetorizada: bool = False) -> Tuple[int, int, int, float, Optional[tuple]]:
+    """
+    Ordena um buffer do modo de entrada mapeada e grava o run de índices.
+    
+    Recebe os mesmos argumentos de `_ordenar_e_gravar_run` (a redução não é
+    suportada neste modo). Os registros do run são tuplas (início, tamanho)
+    dos registros na entrada.
+    
+    Returns:
+        Tupla (bytes gravados, registros gravados, comparações de chave,
+        segundos gastos, primeira e última chaves gravadas ou None)
+    """
+    inicio = time.perf_counter()
+    contador = [0]
+    
+    # Ordenar pares (chave, posição no buffer), sem os registros
+    pares = list(zip(buffer.chaves, range(len(buffer))))
+    pares_ordenados = _ordenar_pares(pares, contador, vetorizada)[:limite]
+    
+    inicios, tamanhos = buffer.inicios, buffer.tamanhos
+    escritor = EscritorRun(run_arquivo, cabecalho, compressao)
+    escritor.escrever_varios((chave, (inicios[i], tamanhos[i])) for chave, i in pares_ordenados)
+    tamanho = escritor.fechar()
+    return (tamanho, escritor.registros, contador[0], time.perf_counter() - inicio,
+            escritor.limites)
+
+
+def _copiar_registros(arquivo_mapeado: str, arquivo_saida: str,
+                      pares: Iterator[Tuple[bytes, tuple]], tamanho_buffer: int,
+                      gravar_cabecalho: bool = True,
+                      intervalo: Optional[int] = None) -> List[Tuple[bytes, int]]:
+    """
+    Grava a saída do modo de entrada mapeada copiando da entrada os bytes
+    do cabeçalho e de cada registro, na ordem dos pares (chave, (início,
+    tamanho)). Os registros saem exatamente como estavam na entrada.
+    
+    Args:
+        arquivo_mapeado: Arquivo CSV de entrada
+        arquivo_saida: Caminho do CSV de saída
+        pares: Pares mesclados em ordem
+        tamanho_buffer: Buffer de escrita da saída
+        gravar_cabecalho: Se False grava só os registros (partes do merge
+                         particionado, exceto a primeira)
+        intervalo: Se informado, anota a chave e a posição na saída de um
+                  registro a cada `intervalo` (índice esparso)
+        
+    Returns:
+        Lista de (chave, posição) do índice (vazia sem `intervalo`)
+    """
+    entradas = []
+    with open(arquivo_mapeado, 'rb') as entrada, \
+            mmap.mmap(entrada.fileno(), 0, access=mmap.ACCESS_READ) as mapa, \
+            open(arquivo_saida, 'wb', buffering=tamanho_buffer) as saida:
+        inicio, fim, _ = next(_VarreduraMapeada(mapa))
+        cabecalho = mapa[inicio:fim]
+        terminador = b'\r\n' if cabecalho.endswith(b'\r\n') else b'\n'
+        if gravar_cabecalho:
+            saida.write(cabecalho if cabecalho.endswith(b'\n') else cabecalho + terminador)
+        
+        # Só o último registro da entrada pode não ter quebra de linha
+        tamanho_entrada = len(mapa)
+        sem_quebra = mapa[-1:] != b'\n'
+        escrever = saida.write
+        if intervalo is not None:
+            posicao = saida.tell()
+            for numero, (chave, (inicio, tamanho)) in enumerate(pares):
+                if numero % intervalo == 0:
+                    entradas.append((chave, posicao))
+                fim = inicio + tamanho
+                posicao += escrever(mapa[inicio:fim])
+                if sem_quebra and fim == tamanho_entrada:
+                    posicao += escrever(terminador)
+            return entradas
+        for _, (inicio, tamanho) in pares:
+            fim = inicio + tamanho
+            escrever(mapa[inicio:fim])
+            if sem_quebra and fim == tamanho_entrada:
+                escrever(terminador)
+    return entradas
+
+
+def _mesclar_faixa(entradas: List[List[str]], inicio: Optional[bytes], fim: Optional[bytes],
+                   arquivo_saida: str, gravar_cabecalho: bool, extrator: ExtratorChave,
+                   reducao: Optional[ReducaoRegistros] = None,
+                   arquivo_mapeado: Optional[str] = None,
+                   buffering: int = -1, profundidade: int = 0,
+                   intervalo: Optional[int] = None,
+                   formato: Optional[Formato] = None) -> Tuple[int, List[Tuple[bytes, int]]]:
+    """
+    Mescla a faixa de chaves [inicio, fim) das entradas em uma parte da saída.
+    
+    Função de módulo para que possa ser executada nos processos do pool.
+    
+    Args:
+        entradas: Cadeias de runs com chaves na faixa
+        inicio: Menor chave da faixa (None = sem limite inferior)
+        fim: Chave que encerra a faixa (None = sem limite superior)
+        arquivo_saida: Caminho da parte da saída
+        gravar_cabecalho: Se True a parte começa com o cabeçalho
+        extrator: Extrator da chave (para runs em CSV)
+        reducao: Remoção de duplicatas ou agregação aplicada no merge
+        arquivo_mapeado: Entrada do modo mapeado, de onde os registros são copiados
+        buffering: Tamanho do buffer de cada arquivo
+        profundidade: Blocos lidos antecipadamente por run (0 = síncrono)
+        intervalo: Se informado, anota o índice esparso da parte
+        formato: Formato da saída, se não for CSV (sem compressão, para que
+                as partes possam ser concatenadas)
+        
+    Returns:
+        Tupla (bytes gravados na parte, lista de (chave, posição na parte)
+        do índice esparso)
+    """
+    def abrir(run: str):
+        if run.endswith('.csv'):
+            return _LeitorRunCsv(run, extrator, buffering=buffering, inicio=inicio, fim=fim)
+        return LeitorRun(run, buffering=buffering, profundidade_assincrona=profundidade,
+                         inicio=inicio, fim=fim)
+    
+    leitores = []
+    try:
+        for entrada in entradas:
+            leitores.append(abrir(entrada[0]) if len(entrada) == 1
+                            else _LeitorEncadeado(entrada, abrir))
+        pares = OrdenacaoExterna._intercalar(leitores)
+        if reducao is not None:
+            pares = reducao.reduzir(pares)
+        
+        if formato is not None:
+            entradas_indice = []
+            with formato.abrir(arquivo_saida, 'wb') as saida:
+                formato.gravar(saida, leitores[0].cabecalho, (linha for _, linha in pares),
+                               gravar_cabecalho)
+        elif arquivo_mapeado is not None:
+            entradas_indice = _copiar_registros(arquivo_mapeado, arquivo_saida, pares, buffering,
+                                                gravar_cabecalho, intervalo)
+        else:
+            with open(arquivo_saida, 'wb', buffering=buffering) as saida:
+                entradas_indice = _gravar_csv_indexado(
+                    saida.write, pares, intervalo or REGISTROS_POR_BLOCO,
+                    cabecalho=leitores[0].cabecalho if gravar_cabecalho else None)[0]
+    finally:
+        for leitor in leitores:
+            leitor.fechar()
+    return os.path.getsize(arquivo_saida), entradas_indice if intervalo is not None else []
+
+
+def _dividir_intervalo(nome_arquivo: str, inicio: int, fim: int, numero: int,
+                       cabecalho: List[str], extrator: ExtratorChave, indice_chave: int,
+                       capacidade: int, por_memoria: bool, diretorios: List[str],
+                       compressao: Optional[str] = None, limite: Optional[int] = None,
+                       reducao: Optional[ReducaoRegistros] = None, vetorizada: bool = False):
+    """
+    Lê um intervalo de bytes do CSV e o divide em runs ordenados.
+    
+    Função de módulo para que possa ser executada nos processos do pool.
+    
+    Args:
+        nome_arquivo: Arquivo CSV
+        inicio: Posição do primeiro registro do intervalo
+        fim: Posição em que o intervalo termina (início do próximo registro)
+        numero: Número do intervalo (usado nos nomes dos runs)
+        cabecalho: Cabeçalho dos runs
+        extrator: Extrator da chave de ordenação
+        indice_chave: Maior índice de coluna usado pela chave
+        capacidade: Capacidade do buffer (registros ou bytes)
+        por_memoria: Se True a capacidade é em bytes (`memoria_max`)
+        diretorios: Diretórios dos runs, usados em rodízio
+        compressao: Compressão por bloco dos runs
+        limite: Registros mantidos por run (top-K)
+        reducao: Remoção de duplicatas ou agregação aplicada aos runs
+        vetorizada: Se True, tenta ordenar os runs com NumPy
+        
+    Returns:
+        Tupla (registros lidos, lista de (caminho do run, bytes, registros,
+        comparações, segundos, primeira e última chaves))
+    """
+    resultados = []
+    lidos = 0
+    buffer = []
+    ocupado = 0
+    
+    def salvar():
+        diretorio = diretorios[(numero + len(resultados)) % len(diretorios)]
+        run_arquivo = os.path.join(diretorio, f"run_{numero}_{len(resultados)}.run")
+        resultados.append((run_arquivo, *_ordenar_e_gravar_run(
+            buffer, cabecalho, extrator, run_arquivo, compressao, limite, reducao, vetorizada)))
+    
+    with open(nome_arquivo, 'rb', buffering=0) as arquivo:
+        arquivo.seek(inicio)
+        texto = io.TextIOWrapper(io.BufferedReader(_IntervaloArquivo(arquivo, fim),
+                                                   TAMANHO_BLOCO_CSV),
+                                 encoding='utf-8', newline='')
+        for linha in csv.reader(texto):
+            if len(linha) <= indice_chave:
+                continue  # Pular linhas com dados insuficientes
+            buffer.append(linha)
+            lidos += 1
+            ocupado += _tamanho_registro(linha) if por_memoria else 1
+            if ocupado >= capacidade:
+                salvar()
+                buffer = []
+                ocupado = 0
+        if buffer:
+            salvar()
+    
+    return lidos, resultados
+
+
+def _ordenar_fluxo(ordenador: OrdenacaoExterna, arquivo_entrada: str, coluna_chave,
+                   ordem: str, arquivo_saida: Optional[str]):
+    """
+    Ordena lendo de stdin e/ou escrevendo em stdout ('-') com a API de fluxo.
+    
+    As mensagens de progresso vão para stderr para não misturar com os dados.
+    """
+    with contextlib.ExitStack() as pilha:
+        pilha.enter_context(contextlib.redirect_stdout(sys.stderr))
+        if arquivo_entrada == '-':
+            entrada = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        else:
+            entrada = pilha.enter_context(open(arquivo_entrada, 'r', encoding='utf-8', newline=''))
+        if arquivo_saida in (None, '-'):
+            saida = io.TextIOWrapper(sys.__stdout__.buffer, encoding='utf-8', newline='')
+            pilha.callback(saida.detach)
+            pilha.callback(saida.flush)
+        else:
+            saida = pilha.enter_context(open(arquivo_saida, 'w', encoding='utf-8', newline=''))
+        
+        csv.writer(saida).writerows(
+            ordenador.ordenar_registros(csv.reader(entrada), coluna_chave, ordem))
+
+
+def _interpretar_chave(coluna_chave: str):
+    """
+    Interpreta a chave da linha de comando: "coluna[:ordem[:tipo[:colacao]]],...".
+    
+    Returns:
+        Nome ou índice da coluna, ou lista de colunas para uma chave composta
+    """
+    colunas = []
+    for especificacao in coluna_chave.split(','):
+        partes = especificacao.split(':')
+        # Tentar converter a coluna para inteiro se possível
+        try:
+            partes[0] = int(partes[0])
+        except ValueError:
+            pass  # Manter como string
+        colunas.append(tuple(partes) if len(partes) > 1 else partes[0])
+    return colunas if len(colunas) > 1 or isinstance(colunas[0], tuple) else colunas[0]
+
+
+def _mesclar_cli(ordenador: OrdenacaoExterna, argumentos: List[str]):
+    """Subcomando `mesclar`: mescla arquivos CSV já ordenados."""
+    unir = '--unir-cabecalhos' in argumentos
+    argumentos = [argumento for argumento in argumentos if argumento != '--unir-cabecalhos']
+    if len(argumentos) < 4:
+        print("Uso: python mergesort_externo.py mesclar <coluna_chave> <ordem> <arquivo_saida> "
+              "<arquivo> [<arquivo> ...] [--unir-cabecalhos]")
+        print("Exemplo: python mergesort_externo.py mesclar id asc todos.csv parte-*.csv")
+        return
+    
+    coluna_chave, ordem, arquivo_saida, *arquivos = argumentos
+    try:
+        resultado = ordenador.mesclar_arquivos(arquivos, _interpretar_chave(coluna_chave), ordem,
+                                               arquivo_saida, unir_cabecalhos=unir)
+        print(f"Sucesso! Arquivo mesclado salvo em: {resultado}")
+    except Exception as e:
+        print(f"Erro durante a mesclagem: {e}")
+
+
+def _incremental_cli(ordenador: OrdenacaoExterna, argumentos: List[str]):
+    """Subcomando `incremental`: incorpora um delta a uma saída já ordenada."""
+    if len(argumentos) < 3:
+        print("Uso: python mergesort_externo.py incremental <arquivo_anterior> <arquivo_delta> "
+              "<coluna_chave> [ordem] [arquivo_saida]")
+        print("Exemplo: python mergesort_externo.py incremental vendas_ordenado.csv novas.csv data")
+        return
+    
+    arquivo_anterior, arquivo_delta, coluna_chave = argumentos[:3]
+    ordem = argumentos[3] if len(argumentos) > 3 else 'asc'
+    arquivo_saida = argumentos[4] if len(argumentos) > 4 else None
+    try:
+        resultado = ordenador.ordenar_incremental(arquivo_anterior, arquivo_delta,
+                                                  _interpretar_chave(coluna_chave), ordem,
+                                                  arquivo_saida)
+        print(f"Sucesso! Arquivo ordenado salvo em: {resultado}")
+    except Exception as e:
+        print(f"Erro durante a ordenação incremental: {e}")
 
 
 def main():
     """Função principal para demonstrar o uso da ordenação externa."""
     
     # Criar instância da classe
-    ordenador = OrdenacaoExterna(tamanho_buffer=1000)  # Buffer de 1000 registros
+    ordenador = OrdenacaoExterna(tamanho_buffer=1000, fan_in=64)  # Buffer de 1000 registros
+    
+    if len(sys.argv) > 1 and sys.argv[1] == 'mesclar':
+        _mesclar_cli(ordenador, sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'incremental':
+        _incremental_cli(ordenador, sys.argv[2:])
+        return
     
     # Exemplo de uso
     if len(sys.argv) < 3:
         print("Uso: python mergesort_externo.py <arquivo_csv> <coluna_chave> [ordem] [arquivo_saida]")
         print("Exemplo: python mergesort_externo.py dados.csv nome asc dados_ordenados.csv")
+        print("Chave composta: coluna[:ordem[:tipo[:colacao]]] separadas por vírgula, "
+              "ex.: conta,data:desc:date,valor")
+        print("Use '-' como arquivo de entrada/saída para ler de stdin/escrever em stdout")
+        print("Mesclar arquivos já ordenados: python mergesort_externo.py mesclar "
+              "<coluna_chave> <ordem> <arquivo_saida> <arquivo> [<arquivo> ...]")
+        print("Incorporar registros novos: python mergesort_externo.py incremental "
+              "<arquivo_anterior> <arquivo_delta> <coluna_chave> [ordem] [arquivo_saida]")
         return
     
     arquivo_entrada = sys.argv[1]
@@ -383,15 +4925,12 @@ def main():
     ordem = sys.argv[3] if len(sys.argv) > 3 else 'asc'
     arquivo_saida = sys.argv[4] if len(sys.argv) > 4 else None
     
-    # Tentar converter coluna_chave para inteiro se possível
-    try:
-        coluna_chave = int(coluna_chave)
-    except ValueError:
-        pass  # Manter como string
+    coluna_chave = _interpretar_chave(coluna_chave)
     
     try:
-        # Guardar coluna chave para uso no merge externo
-        ordenador.coluna_chave_atual = coluna_chave
+        if arquivo_entrada == '-' or arquivo_saida == '-':
+            _ordenar_fluxo(ordenador, arquivo_entrada, coluna_chave, ordem, arquivo_saida)
+            return
         
         # Executar ordenação
         resultado = ordenador.ordenar_arquivo(arquivo_entrada, coluna_chave, ordem, arquivo_saida)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Testes de regressão da ordenação externa.
+
+Execute com `python -m unittest test_mergesort_externo` (ou `pytest`).
+"""
+
+import csv
+import gzip
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from mergesort_externo import FormatoBinario, ArquivoIndexado, OrdenacaoExterna
+
+
+def gravar_csv(caminho: str, cabecalho: list, linhas: list):
+    """Grava um CSV de teste."""
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        writer = csv.writer(arquivo)
+        writer.writerow(cabecalho)
+        writer.writerows(linhas)
+
+
+def ler_csv(caminho: str) -> list:
+    """Lê um CSV, incluindo o cabeçalho."""
+    with open(caminho, 'r', newline='', encoding='utf-8') as arquivo:
+        return list(csv.reader(arquivo))
+
+
+def ler_bytes(caminho: str) -> bytes:
+    with open(caminho, 'rb') as arquivo:
+        return arquivo.read()
+
+
+def registros_aleatorios(quantidade: int, semente: int) -> list:
+    """Registros (chave, texto, sequência) com chaves repetidas e textos com
+    vírgulas, aspas e quebras de linha."""
+    gerador = random.Random(semente)
+    textos = ['simples', 'com, vírgula', 'com "aspas"', 'duas\nlinhas', '']
+    return [[gerador.randint(1, quantidade // 4), gerador.choice(textos), i]
+            for i in range(quantidade)]
+
+
+class TesteBase(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def caminho(self, nome: str) -> str:
+        return os.path.join(self.diretorio, nome)
+
+
+class TesteChaves(TesteBase):
+    def test_fracao_em_coluna_detectada_como_inteira(self):
+        entrada, saida = self.caminho('entrada.csv'), self.caminho('saida.csv')
+        valores = [str(i) for i in range(1000, 1010)] + ['0.5', '1008.5', '-2.25', '1e3']
+        gravar_csv(entrada, ['k'], [[valor] for valor in valores])
+        # O primeiro buffer (a amostra da detecção) só tem inteiros
+        ordenador = OrdenacaoExterna(tamanho_buffer=5, silencioso=True)
+        ordenador.ordenar_arquivo(entrada, 'k', 'asc', saida)
+        obtidos = [linha[0] for linha in ler_csv(saida)[1:]]
+        self.assertEqual([float(valor) for valor in obtidos],
+                         sorted(float(valor) for valor in valores))
+
+
+class TesteIntervalos(TesteBase):
+    def test_intervalos_paralelos_iguais_a_leitura_sequencial(self):
+        # Campos com quebras de linha entre aspas não podem virar limite de intervalo
+        entrada = self.caminho('entrada.csv')
+        gravar_csv(entrada, ['k', 'texto', 'seq'], registros_aleatorios(3000, 2))
+        saidas = []
+        for workers in (1, 3):
+            saida = self.caminho(f'saida_{workers}.csv')
+            OrdenacaoExterna(tamanho_buffer=200, workers=workers, silencioso=True).ordenar_arquivo(
+                entrada, 'k', arquivo_saida=saida)
+            saidas.append(ler_bytes(saida))
+        self.assertEqual(saidas[0], saidas[1])
+        self.assertEqual(len(ler_csv(self.caminho('saida_3.csv'))), 3001)
+
+
+class TesteMapeado(TesteBase):
+    def test_entrada_mapeada_igual_a_leitura(self):
+        entrada = self.caminho('entrada.csv')
+        gravar_csv(entrada, ['k', 'texto', 'seq'], registros_aleatorios(2000, 3))
+        for ordem in ('asc', 'desc'):
+            with self.subTest(ordem=ordem):
+                saidas = []
+                for mapear in (False, True):
+                    saida = self.caminho(f'saida_{mapear}.csv')
+                    OrdenacaoExterna(tamanho_buffer=300, mapear_entrada=mapear,
+                                     silencioso=True).ordenar_arquivo(entrada, 'k', ordem, saida)
+                    saidas.append(ler_bytes(saida))
+                self.assertEqual(saidas[0], saidas[1])
+
+
+class TestePassagemDireta(TesteBase):
+    """Runs encadeados ao CSV da passagem direta não podem ser perdidos."""
+
+    def ordenar_chaves(self, chaves: list, tamanho_buffer: int, **opcoes) -> list:
+        entrada, saida = self.caminho('entrada.csv'), self.caminho('saida.csv')
+        gravar_csv(entrada, ['k', 'v'], [[chave, i] for i, chave in enumerate(chaves)])
+        ordenador = OrdenacaoExterna(tamanho_buffer=tamanho_buffer, silencioso=True, **opcoes)
+        ordenador.ordenar_arquivo(entrada, 'k', 'asc', saida)
+        return [int(linha[0]) for linha in ler_csv(saida)[1:]]
+
+    def test_runs_encadeados_a_passagem_direta(self):
+        chaves = [1, 2, 3, 5, 4, 6, 8, 7, 9]
+        self.assertEqual(self.ordenar_chaves(chaves, 3), sorted(chaves))
+
+    def test_blocos_disjuntos_apos_trecho_ordenado(self):
+        gerador = random.Random(7)
+        chaves = list(range(10))
+        for inicio in range(10, 100, 10):
+            bloco = list(range(inicio, inicio + 10))
+            gerador.shuffle(bloco)
+            chaves += bloco
+        for opcoes in ({}, {'io_assincrono': True}, {'compressao_runs': 'zlib'},
+                       {'particoes_merge': 2}):
+            with self.subTest(**opcoes):
+                self.assertEqual(self.ordenar_chaves(chaves, 10, **opcoes), sorted(chaves))
+
+
+class TesteParticoes(TesteBase):
+    def test_merge_particionado_igual_ao_sequencial(self):
+        entrada = self.caminho('entrada.csv')
+        gravar_csv(entrada, ['k', 'texto', 'seq'], registros_aleatorios(5000, 4))
+        saidas = []
+        for particoes in (1, 3):
+            saida = self.caminho(f'saida_{particoes}.csv')
+            eventos = []
+            OrdenacaoExterna(tamanho_buffer=500, particoes_merge=particoes, silencioso=True,
+                             ao_evento=eventos.append).ordenar_arquivo(entrada, 'k',
+                                                                       arquivo_saida=saida)
+            saidas.append(ler_bytes(saida))
+        # Chaves iguais caem na mesma faixa: a saída é idêntica à do merge sequencial
+        self.assertEqual(saidas[0], saidas[1])
+        faixas = [evento.dados['faixas'] for evento in eventos
+                  if evento.nome == 'merge_concluido' and 'faixas' in evento.dados]
+        self.assertEqual(len(faixas), 1)
+        self.assertGreater(faixas[0], 1)
+
+
+class TesteMultiplas(TesteBase):
+    def test_pool_compartilhado_igual_a_ordenacoes_separadas(self):
+        entrada = self.caminho('entrada.csv')
+        gravar_csv(entrada, ['k', 'texto', 'seq'], registros_aleatorios(3000, 6))
+        ordenacoes = [{'coluna_chave': 'k', 'arquivo_saida': self.caminho('k.csv')},
+                      {'coluna_chave': 'texto', 'ordem': 'desc',
+                       'arquivo_saida': self.caminho('texto.csv')}]
+        OrdenacaoExterna(tamanho_buffer=200, workers=3, silencioso=True).ordenar_multiplas(
+            entrada, ordenacoes)
+        for especificacao in ordenacoes:
+            referencia = self.caminho('referencia.csv')
+            OrdenacaoExterna(tamanho_buffer=200, silencioso=True).ordenar_arquivo(
+                entrada, especificacao['coluna_chave'], especificacao.get('ordem', 'asc'),
+                referencia)
+            self.assertEqual(ler_bytes(especificacao['arquivo_saida']), ler_bytes(referencia))
+
+    def test_cota_de_disco_vale_para_todas_as_ordenacoes(self):
+        entrada = self.caminho('entrada.csv')
+        gerador = random.Random(5)
+        gravar_csv(entrada, ['a', 'b', 'c'],
+                   [[gerador.randint(0, 10 ** 6), gerador.random(), 'x' * 20]
+                    for _ in range(3000)])
+        ordenacoes = [{'coluna_chave': coluna, 'arquivo_saida': self.caminho(f'{coluna}.csv')}
+                      for coluna in 'abc']
+        ordenador = OrdenacaoExterna(tamanho_buffer=300, silencioso=True)
+        ordenador.ordenar_multiplas(entrada, ordenacoes)
+        # Uma cota em que cada ordenação cabe sozinha, mas não todas juntas
+        cota = max(estatisticas['pico_disco_temporario']
+                   for estatisticas in ordenador.estatisticas['ordenacoes'])
+        self.assertGreater(ordenador.estatisticas['pico_disco_temporario'], cota)
+
+        for coluna in 'abc':
+            OrdenacaoExterna(tamanho_buffer=300, cota_disco=cota, silencioso=True).ordenar_arquivo(
+                entrada, coluna, arquivo_saida=self.caminho(f'{coluna}.csv'))
+        with self.assertRaisesRegex(ValueError, 'Cota de disco'):
+            OrdenacaoExterna(tamanho_buffer=300, cota_disco=cota,
+                             silencioso=True).ordenar_multiplas(entrada, ordenacoes)
+
+
+class TesteFormatos(TesteBase):
+    def test_conversao_entre_formatos(self):
+        entrada = self.caminho('entrada.csv')
+        linhas = [[i % 37, f'nome {i}', i * 0.5] for i in range(300)]
+        gravar_csv(entrada, ['k', 'nome', 'valor'], linhas)
+        ordenador = OrdenacaoExterna(tamanho_buffer=40, silencioso=True)
+
+        comprimido = ordenador.ordenar_arquivo(entrada, 'k', 'desc',
+                                               self.caminho('saida.csv.gz'))
+        with gzip.open(comprimido, 'rt', encoding='utf-8', newline='') as arquivo:
+            esperado = list(csv.reader(arquivo))
+        self.assertEqual([int(linha[0]) for linha in esperado[1:]],
+                         sorted((linha[0] for linha in linhas), reverse=True))
+
+        # JSONL -> binário -> CSV, sempre pela mesma chave: a ordem não muda
+        jsonl = ordenador.ordenar_arquivo(comprimido, 'k', 'desc', self.caminho('saida.jsonl'))
+        with open(jsonl, encoding='utf-8') as arquivo:
+            primeiro = json.loads(arquivo.readline())
+        self.assertEqual(primeiro, dict(zip(esperado[0], esperado[1])))
+        binario = FormatoBinario([('k', 'q'), ('nome', '12s'), ('valor', 'd')])
+        saida_binaria = ordenador.ordenar_arquivo(jsonl, 'k', 'desc', self.caminho('saida.bin'),
+                                                  formato_saida=binario)
+        final = ordenador.ordenar_arquivo(saida_binaria, 'k', 'desc', self.caminho('final.csv'),
+                                          formato_entrada=binario)
+        self.assertEqual(ler_csv(final), esperado)
+
+    def test_jsonl_mantem_numeros(self):
+        entrada, saida = self.caminho('entrada.jsonl'), self.caminho('saida.jsonl')
+        objetos = [{'k': k, 'nome': f'n{k}'} for k in (100, 9, 10, -1.5, 2)]
+        with open(entrada, 'w', encoding='utf-8') as arquivo:
+            arquivo.writelines(json.dumps(objeto) + '\n' for objeto in objetos)
+        OrdenacaoExterna(tamanho_buffer=2, silencioso=True).ordenar_arquivo(entrada, 'k',
+                                                                           arquivo_saida=saida)
+        with open(saida, encoding='utf-8') as arquivo:
+            obtidos = [json.loads(linha) for linha in arquivo]
+        # Ordem numérica, e os números continuam números na saída
+        self.assertEqual(obtidos, sorted(objetos, key=lambda objeto: objeto['k']))
+
+    def test_jsonl_vazio(self):
+        entrada = self.caminho('entrada.csv')
+        gravar_csv(entrada, ['k', 'v'], [])
+        ordenador = OrdenacaoExterna(silencioso=True)
+        # Sem registros, o JSONL gerado a partir do CSV só com cabeçalho é vazio
+        vazio = ordenador.ordenar_arquivo(entrada, 'k', arquivo_saida=self.caminho('vazio.jsonl'))
+        self.assertEqual(os.path.getsize(vazio), 0)
+        saida = ordenador.ordenar_arquivo(vazio, 'k', arquivo_saida=self.caminho('saida.jsonl'))
+        self.assertEqual(os.path.getsize(saida), 0)
+
+
+class Interrupcao(Exception):
+    """Simula a queda do processo no meio da ordenação."""
+
+
+class TesteRetomada(TesteBase):
+    def interromper_e_retomar(self, entrada: str, saida: str, **opcoes) -> list:
+        """
+        Interrompe uma ordenação na primeira passada intermediária (com a
+        divisão em runs concluída) e a retoma; devolve os eventos da retomada.
+        """
+        trabalho = self.caminho('trabalho')
+
+        def interromper(evento):
+            if evento.nome == 'passada_concluida':
+                raise Interrupcao()
+
+        ordenador = OrdenacaoExterna(tamanho_buffer=50, fan_in=3, silencioso=True,
+                                     ao_evento=interromper)
+        with self.assertRaises(Interrupcao):
+            ordenador.ordenar_arquivo(entrada, 'k', arquivo_saida=saida,
+                                      diretorio_trabalho=trabalho)
+        self.assertTrue(os.path.exists(trabalho))
+
+        eventos = []
+        ordenador = OrdenacaoExterna(tamanho_buffer=50, fan_in=3, silencioso=True,
+                                     ao_evento=eventos.append)
+        ordenador.ordenar_arquivo(entrada, 'k', arquivo_saida=saida,
+                                  diretorio_trabalho=trabalho, **opcoes)
+        self.assertFalse(os.path.exists(trabalho))
+        return eventos
+
+    def test_retomada_igual_a_ordenacao_completa(self):
+        entrada = self.caminho('entrada.csv')
+        gravar_csv(entrada, ['k', 'texto', 'seq'], registros_aleatorios(500, 1))
+        eventos = self.interromper_e_retomar(entrada, self.caminho('retomada.csv'))
+        self.assertEqual([evento.dados['fase'] for evento in eventos
+                          if evento.nome == 'retomada'], ['merge'])
+
+        referencia = self.caminho('referencia.csv')
+        OrdenacaoExterna(tamanho_buffer=50, fan_in=3, silencioso=True).ordenar_arquivo(
+            entrada, 'k', arquivo_saida=referencia)
+        self.assertEqual(ler_bytes(self.caminho('retomada.csv')), ler_bytes(referencia))
+
+    def test_retomada_com_indice_esparso(self):
+        entrada, saida = self.caminho('entrada.csv'), self.caminho('saida.csv')
+        gerador = random.Random(3)
+        gravar_csv(entrada, ['k', 'v'], [[gerador.randint(1, 10000), i] for i in range(500)])
+        self.interromper_e_retomar(entrada, saida, intervalo_indice=16)
+
+        linhas = ler_csv(saida)[1:]
+        chaves = [int(linha[0]) for linha in linhas]
+        self.assertEqual(chaves, sorted(chaves))
+        with ArquivoIndexado(saida) as arquivo:
+            self.assertEqual([linha[0] for linha in arquivo.buscar(chaves[250])],
+                             [str(chaves[250])] * chaves.count(chaves[250]))
+
+
+if __name__ == "__main__":
+    unittest.main()